@@ -1,12 +1,38 @@
 """
 Logging configuration for SoRa Core.
 """
+import atexit
 import logging
+import logging.handlers
+import os
+import queue
 import sys
 from pathlib import Path
 
-def setup_logging(log_level: str = "INFO", log_file: Path = None):
-    """Set up logging configuration."""
+# Background listener that owns the real (blocking) handlers
+_queue_listener = None
+
+
+def _stop_queue_listener():
+    """Flush queued records and stop the background listener."""
+    global _queue_listener
+    if _queue_listener is not None:
+        _queue_listener.stop()
+        _queue_listener = None
+
+atexit.register(_stop_queue_listener)
+
+
+def setup_logging(log_level: str = None, log_file: Path = None):
+    """
+    Set up logging configuration.
+    
+    Log calls only enqueue the record; a background QueueListener thread does
+    the formatting and stream/file writes, so hot paths never block on I/O.
+    The level defaults to the LOG_LEVEL environment variable (INFO if unset).
+    """
+    global _queue_listener
+    log_level = log_level or os.getenv("LOG_LEVEL", "INFO")
     
     # Create formatter
     formatter = logging.Formatter(
@@ -25,12 +51,21 @@ def setup_logging(log_level: str = "INFO", log_file: Path = None):
         file_handler.setFormatter(formatter)
         handlers.append(file_handler)
     
-    # Configure root logger
-    logging.basicConfig(
-        level=getattr(logging, log_level.upper()),
-        handlers=handlers,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    # Route records through a queue to the real handlers
+    _stop_queue_listener()
+    log_queue = queue.SimpleQueue()
+    _queue_listener = logging.handlers.QueueListener(
+        log_queue, *handlers, respect_handler_level=True
     )
+    _queue_listener.start()
+    
+    # Configure root logger (the queue handler must not format; the listener's handlers do)
+    root_logger = logging.getLogger()
+    for handler in root_logger.handlers[:]:
+        root_logger.removeHandler(handler)
+        handler.close()
+    root_logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    root_logger.setLevel(getattr(logging, log_level.upper()))
     
     # Silence noisy libraries
     logging.getLogger("httpx").setLevel(logging.WARNING)
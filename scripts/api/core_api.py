@@ -6,6 +6,7 @@ from fastapi import FastAPI, HTTPException, UploadFile, File, Form
 from fastapi.middleware.cors import CORSMiddleware
 from typing import List, Dict, Any, Optional
 from pydantic import BaseModel
+import importlib.util
 import uuid
 
 # Pydantic models for request/response
@@ -310,4 +311,31 @@ def create_core_api(
 # Convenience function to create app with default settings
 def create_app() -> FastAPI:
     """Create app with default configuration."""
-    return create_core_api()
\ No newline at end of file
+    return create_core_api()
+
+def run_server(app: FastAPI = None, host: str = "0.0.0.0", port: int = 8000):
+    """
+    Serve the API with uvicorn on uvloop and httptools when installed.
+    
+    Both ship with uvicorn[standard] and cut the per-request overhead of short
+    handlers (status, demo prompts, session reads) well below asyncio + h11.
+    
+    Args:
+        app: Application to serve (defaults to create_app())
+        host: Interface to bind
+        port: Port to bind
+    """
+    import uvicorn
+    
+    use_uvloop = importlib.util.find_spec("uvloop") is not None
+    if use_uvloop:
+        import uvloop
+        uvloop.install()
+    
+    uvicorn.run(
+        app or create_app(),
+        host=host,
+        port=port,
+        loop="uvloop" if use_uvloop else "asyncio",
+        http="httptools" if importlib.util.find_spec("httptools") is not None else "h11"
+    )
@@ -142,25 +142,22 @@ class PersonaUploader:
             
             print(f"📤 Uploading {len(chunks)} chunks to vector store...")
             
-            # Upload each chunk
+            # Store text in metadata so we can retrieve it
+            for chunk in chunks:
+                chunk["metadata"]["text"] = chunk["text"]
+            
+            # Upload all chunks in one write
+            success = await self.vector_store.store_embeddings_batch(
+                ids=[chunk["id"] for chunk in chunks],
+                embeddings=[[0.1] * 384 for _ in chunks],  # Mock embedding for now
+                metadatas=[chunk["metadata"] for chunk in chunks]
+            )
+            
             for i, chunk in enumerate(chunks, 1):
-                try:
-                    # Store text in metadata so we can retrieve it
-                    chunk["metadata"]["text"] = chunk["text"]
-                    
-                    success = await self.vector_store.store_embedding(
-                        id=chunk["id"],
-                        embedding=[0.1] * 384,  # Mock embedding for now
-                        metadata=chunk["metadata"]
-                    )
-                    
-                    if success:
-                        print(f"   ✅ [{i}/{len(chunks)}] {chunk['metadata']['type']}")
-                    else:
-                        print(f"   ❌ [{i}/{len(chunks)}] Failed: {chunk['metadata']['type']}")
-                        
-                except Exception as e:
-                    print(f"   ❌ [{i}/{len(chunks)}] Error: {e}")
+                if success:
+                    print(f"   ✅ [{i}/{len(chunks)}] {chunk['metadata']['type']}")
+                else:
+                    print(f"   ❌ [{i}/{len(chunks)}] Failed: {chunk['metadata']['type']}")
             
             # Update metadata
             persona_data["vector_store_status"] = "uploaded"
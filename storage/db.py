@@ -2,31 +2,124 @@
 Database operations for the Sora Core platform.
 Clean extraction focusing on core data management.
 """
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Callable, Iterable
+import asyncio
+import csv
+import io
 import json
+import logging
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import uuid
 
+from .persona_detector import PersonaDetector
+
+logger = logging.getLogger(__name__)
+
+# Hot statements prepared server-side once per pooled connection, so Postgres
+# skips parsing and planning on every call
+PREPARED_STATEMENTS = {
+    "insert_persona": """
+        INSERT INTO personas (id, name, description, consent_status, created_at, metadata)
+        VALUES ($1, $2, $3, $4, $5, $6)
+    """,
+    "select_persona": "SELECT * FROM personas WHERE id = $1",
+    "list_personas": """
+        SELECT * FROM personas
+        WHERE ($1::text IS NULL OR consent_status = $1)
+        ORDER BY created_at DESC
+        LIMIT $2 OFFSET $3
+    """,
+    "delete_persona": "DELETE FROM personas WHERE id = $1",
+    "insert_generation_job": """
+        INSERT INTO generation_jobs (id, type, persona_ids, prompt, parameters, status, created_at)
+        VALUES ($1, $2, $3, $4, $5, $6, $7)
+    """,
+    "select_generation_job": "SELECT * FROM generation_jobs WHERE id = $1",
+}
+
 class DatabaseClient:
     """Database client for managing personas, jobs, and application data."""
     
-    def __init__(self, connection_string: str = None):
+    def __init__(
+        self,
+        connection_string: str = None,
+        min_connections: int = 2,
+        max_connections: int = 16
+    ):
         self.connection_string = connection_string or "postgresql://localhost/sora_core"
-        self.connection = None
+        self.min_connections = min_connections
+        self.max_connections = max_connections
+        self.pool = None
+        # getconn() raises PoolError instead of waiting once every connection is
+        # checked out, so queries run on exactly max_connections threads and
+        # excess calls queue in the executor
+        self._executor = ThreadPoolExecutor(max_workers=max_connections, thread_name_prefix="db")
+        # Names prepared on each pooled connection; entries vanish with the connection
+        self._prepared = weakref.WeakKeyDictionary()
+        self._prepared_lock = threading.Lock()
         self._initialize_connection()
     
     def _initialize_connection(self):
-        """Initialize database connection."""
+        """
+        Initialize the database connection pool.
+        
+        Pooled connections are not fork-safe: create the client inside each
+        worker process rather than before forking.
+        """
         try:
-            import psycopg2
-            self.connection = psycopg2.connect(self.connection_string)
-            print(f"✅ Database connection established")
+            from psycopg2.pool import ThreadedConnectionPool
+            self.pool = ThreadedConnectionPool(
+                self.min_connections,
+                self.max_connections,
+                dsn=self.connection_string
+            )
+            logger.info("Database connection pool established (%d-%d connections)", self.min_connections, self.max_connections)
         except ImportError:
-            print("⚠️ psycopg2 not installed - using mock database")
-            self.connection = None
+            logger.warning("psycopg2 not installed - using mock database")
+            self.pool = None
         except Exception as e:
-            print(f"⚠️ Database connection failed: {e} - using mock database")
-            self.connection = None
+            logger.warning("Database connection failed: %s - using mock database", e)
+            self.pool = None
+    
+    def _with_conn(self, fn: Callable[[Any], Any]) -> Any:
+        """Check out a pooled connection, run fn(cursor) and commit."""
+        conn = self.pool.getconn()
+        try:
+            with conn.cursor() as cursor:
+                result = fn(cursor)
+            conn.commit()
+            return result
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            self.pool.putconn(conn)
+    
+    def _execute_prepared(self, cursor, name: str, params: tuple):
+        """Execute a PREPARED_STATEMENTS entry, preparing it on this connection first if needed."""
+        with self._prepared_lock:
+            prepared = self._prepared.setdefault(cursor.connection, set())
+        
+        if name not in prepared:
+            cursor.execute(f"PREPARE {name} AS {PREPARED_STATEMENTS[name]}")
+            prepared.add(name)
+        
+        placeholders = ", ".join(["%s"] * len(params))
+        cursor.execute(f"EXECUTE {name} ({placeholders})", params)
+    
+    async def _run(self, fn: Callable[[Any], Any]) -> Any:
+        """Run a blocking cursor function on one of the pool-sized worker threads."""
+        return await asyncio.get_running_loop().run_in_executor(self._executor, self._with_conn, fn)
+    
+    def close(self):
+        """Close all pooled connections."""
+        if self.pool:
+            self.pool.closeall()
+            self.pool = None
+        self._executor.shutdown(wait=False)
     
     async def create_persona(self, persona_data: Dict[str, Any]) -> str:
         """
@@ -39,30 +132,137 @@ class DatabaseClient:
             Created persona ID
         """
         try:
-            if self.connection:
-                cursor = self.connection.cursor()
-                cursor.execute("""
-                    INSERT INTO personas (id, name, description, consent_status, created_at, metadata)
-                    VALUES (%(id)s, %(name)s, %(description)s, %(consent_status)s, %(created_at)s, %(metadata)s)
-                """, {
-                    "id": persona_data["id"],
-                    "name": persona_data["name"],
-                    "description": persona_data.get("description", ""),
-                    "consent_status": persona_data.get("consent_status", "pending"),
-                    "created_at": persona_data.get("created_at", datetime.utcnow()),
-                    "metadata": json.dumps(persona_data.get("metadata", {}))
-                })
-                self.connection.commit()
-                cursor.close()
+            if self.pool:
+                params = (
+                    persona_data["id"],
+                    persona_data["name"],
+                    persona_data.get("description", ""),
+                    persona_data.get("consent_status", "pending"),
+                    persona_data.get("created_at", datetime.utcnow()),
+                    json.dumps(persona_data.get("metadata", {}))
+                )
+                await self._run(lambda cursor: self._execute_prepared(cursor, "insert_persona", params))
             else:
                 # Mock database operation
-                print(f"Mock: Created persona {persona_data['id']}")
+                logger.debug("Mock: Created persona %s", persona_data["id"])
             
-            print(f"✅ Created persona {persona_data['id']}")
+            PersonaDetector.invalidate()
+            logger.debug("Created persona %s", persona_data["id"])
             return persona_data["id"]
             
         except Exception as e:
-            print(f"❌ Error creating persona: {e}")
+            logger.error("Error creating persona: %s", e)
+            raise
+    
+    async def create_personas_bulk(
+        self,
+        personas: List[Dict[str, Any]],
+        page_size: int = 500
+    ) -> List[str]:
+        """
+        Create many personas with a single multi-row INSERT.
+        
+        Args:
+            personas: List of persona information dictionaries
+            page_size: Maximum rows folded into each INSERT statement
+            
+        Returns:
+            Created persona IDs
+        """
+        if not personas:
+            return []
+        
+        try:
+            if self.pool:
+                from psycopg2.extras import execute_values
+                
+                rows = [
+                    (
+                        p["id"],
+                        p["name"],
+                        p.get("description", ""),
+                        p.get("consent_status", "pending"),
+                        p.get("created_at", datetime.utcnow()),
+                        json.dumps(p.get("metadata", {}))
+                    )
+                    for p in personas
+                ]
+                
+                def insert(cursor):
+                    # Persona imports can be replayed, so skip the per-commit fsync
+                    cursor.execute("SET LOCAL synchronous_commit = off")
+                    execute_values(
+                        cursor,
+                        "INSERT INTO personas (id, name, description, consent_status, created_at, metadata) VALUES %s",
+                        rows,
+                        page_size=page_size
+                    )
+                
+                await self._run(insert)
+            else:
+                # Mock database operation
+                logger.debug("Mock: Created %d personas", len(personas))
+            
+            PersonaDetector.invalidate()
+            logger.debug("Created %d personas", len(personas))
+            return [p["id"] for p in personas]
+            
+        except Exception as e:
+            logger.error("Error creating personas: %s", e)
+            raise
+    
+    async def bulk_load_personas(self, personas: Iterable[Dict[str, Any]]) -> int:
+        """
+        Stream personas into the table with COPY FROM STDIN.
+        
+        Faster than batched INSERTs for large imports because Postgres skips
+        per-row statement parsing. Rows must not already exist.
+        
+        Args:
+            personas: Persona information dictionaries
+            
+        Returns:
+            Number of personas loaded
+        """
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        count = 0
+        
+        for p in personas:
+            created_at = p.get("created_at") or datetime.utcnow()
+            writer.writerow([
+                p["id"],
+                p["name"],
+                p.get("description", ""),
+                p.get("consent_status", "pending"),
+                created_at.isoformat() if isinstance(created_at, datetime) else created_at,
+                json.dumps(p.get("metadata", {}))
+            ])
+            count += 1
+        
+        if not count:
+            return 0
+        
+        try:
+            if self.pool:
+                buffer.seek(0)
+                # CSV reads an unquoted empty field as NULL; FORCE_NOT_NULL keeps an
+                # empty description as '' like create_persona writes it
+                await self._run(lambda cursor: cursor.copy_expert(
+                    "COPY personas (id, name, description, consent_status, created_at, metadata) "
+                    "FROM STDIN WITH (FORMAT CSV, FORCE_NOT_NULL (description))",
+                    buffer
+                ))
+            else:
+                # Mock database operation
+                logger.debug("Mock: Bulk loaded %d personas", count)
+            
+            PersonaDetector.invalidate()
+            logger.debug("Bulk loaded %d personas", count)
+            return count
+            
+        except Exception as e:
+            logger.error("Error bulk loading personas: %s", e)
             raise
     
     async def get_persona(self, persona_id: str) -> Optional[Dict[str, Any]]:
@@ -76,11 +276,12 @@ class DatabaseClient:
             Persona data or None if not found
         """
         try:
-            if self.connection:
-                cursor = self.connection.cursor()
-                cursor.execute("SELECT * FROM personas WHERE id = %s", (persona_id,))
-                result = cursor.fetchone()
-                cursor.close()
+            if self.pool:
+                def fetch(cursor):
+                    self._execute_prepared(cursor, "select_persona", (persona_id,))
+                    return cursor.fetchone()
+                
+                result = await self._run(fetch)
                 
                 if result:
                     return self._format_persona_result(result)
@@ -91,7 +292,7 @@ class DatabaseClient:
             return None
             
         except Exception as e:
-            print(f"❌ Error retrieving persona {persona_id}: {e}")
+            logger.error("Error retrieving persona %s: %s", persona_id, e)
             return None
     
     async def list_personas(
@@ -112,17 +313,12 @@ class DatabaseClient:
             List of persona dictionaries
         """
         try:
-            if self.connection:
-                cursor = self.connection.cursor()
-                query = """
-                    SELECT * FROM personas 
-                    WHERE ($3 IS NULL OR consent_status = $3)
-                    ORDER BY created_at DESC
-                    LIMIT $1 OFFSET $2
-                """
-                cursor.execute(query, (limit, offset, consent_status))
-                results = cursor.fetchall()
-                cursor.close()
+            if self.pool:
+                def fetch(cursor):
+                    self._execute_prepared(cursor, "list_personas", (consent_status, limit, offset))
+                    return cursor.fetchall()
+                
+                results = await self._run(fetch)
                 
                 return [self._format_persona_result(result) for result in results]
             else:
@@ -130,7 +326,7 @@ class DatabaseClient:
                 return [self._generate_mock_persona(f"persona_{i}") for i in range(min(limit, 3))]
             
         except Exception as e:
-            print(f"❌ Error listing personas: {e}")
+            logger.error("Error listing personas: %s", e)
             return []
     
     async def update_persona(
@@ -149,7 +345,7 @@ class DatabaseClient:
             True if successful
         """
         try:
-            if self.connection:
+            if self.pool:
                 # Build dynamic update query
                 set_clauses = []
                 values = []
@@ -164,79 +360,116 @@ class DatabaseClient:
                 
                 values.append(persona_id)
                 
-                cursor = self.connection.cursor()
                 query = f"UPDATE personas SET {', '.join(set_clauses)} WHERE id = %s"
-                cursor.execute(query, values)
-                self.connection.commit()
-                cursor.close()
+                await self._run(lambda cursor: cursor.execute(query, values))
             else:
                 # Mock database operation
-                print(f"Mock: Updated persona {persona_id} with {updates}")
+                logger.debug("Mock: Updated persona %s with %s", persona_id, updates)
             
-            print(f"✅ Updated persona {persona_id}")
+            PersonaDetector.invalidate()
+            logger.debug("Updated persona %s", persona_id)
             return True
             
         except Exception as e:
-            print(f"❌ Error updating persona {persona_id}: {e}")
+            logger.error("Error updating persona %s: %s", persona_id, e)
             return False
     
     async def delete_persona(self, persona_id: str) -> bool:
         """Delete a persona."""
         try:
-            if self.connection:
-                cursor = self.connection.cursor()
-                cursor.execute("DELETE FROM personas WHERE id = %s", (persona_id,))
-                self.connection.commit()
-                cursor.close()
+            if self.pool:
+                await self._run(
+                    lambda cursor: self._execute_prepared(cursor, "delete_persona", (persona_id,))
+                )
             else:
                 # Mock database operation
-                print(f"Mock: Deleted persona {persona_id}")
+                logger.debug("Mock: Deleted persona %s", persona_id)
             
-            print(f"✅ Deleted persona {persona_id}")
+            PersonaDetector.invalidate()
+            logger.debug("Deleted persona %s", persona_id)
             return True
             
         except Exception as e:
-            print(f"❌ Error deleting persona {persona_id}: {e}")
+            logger.error("Error deleting persona %s: %s", persona_id, e)
             return False
     
     async def create_generation_job(self, job_data: Dict[str, Any]) -> str:
         """Create a new generation job."""
         try:
-            if self.connection:
-                cursor = self.connection.cursor()
-                cursor.execute("""
-                    INSERT INTO generation_jobs (id, type, persona_ids, prompt, parameters, status, created_at)
-                    VALUES (%(id)s, %(type)s, %(persona_ids)s, %(prompt)s, %(parameters)s, %(status)s, %(created_at)s)
-                """, {
-                    "id": job_data["id"],
-                    "type": job_data["type"],
-                    "persona_ids": json.dumps(job_data["persona_ids"]),
-                    "prompt": job_data["prompt"],
-                    "parameters": json.dumps(job_data["parameters"]),
-                    "status": job_data["status"],
-                    "created_at": job_data["created_at"]
-                })
-                self.connection.commit()
-                cursor.close()
+            if self.pool:
+                params = (
+                    job_data["id"],
+                    job_data["type"],
+                    json.dumps(job_data["persona_ids"]),
+                    job_data["prompt"],
+                    json.dumps(job_data["parameters"]),
+                    job_data["status"],
+                    job_data["created_at"]
+                )
+                await self._run(lambda cursor: self._execute_prepared(cursor, "insert_generation_job", params))
             else:
                 # Mock database operation
-                print(f"Mock: Created generation job {job_data['id']}")
+                logger.debug("Mock: Created generation job %s", job_data["id"])
             
-            print(f"✅ Created generation job {job_data['id']}")
+            logger.debug("Created generation job %s", job_data["id"])
             return job_data["id"]
             
         except Exception as e:
-            print(f"❌ Error creating generation job: {e}")
+            logger.error("Error creating generation job: %s", e)
+            raise
+    
+    async def create_generation_jobs_bulk(
+        self,
+        jobs: List[Dict[str, Any]],
+        page_size: int = 500
+    ) -> List[str]:
+        """Create many generation jobs with a single multi-row INSERT."""
+        if not jobs:
+            return []
+        
+        try:
+            if self.pool:
+                from psycopg2.extras import execute_values
+                
+                rows = [
+                    (
+                        job["id"],
+                        job["type"],
+                        json.dumps(job["persona_ids"]),
+                        job["prompt"],
+                        json.dumps(job["parameters"]),
+                        job["status"],
+                        job["created_at"]
+                    )
+                    for job in jobs
+                ]
+                
+                await self._run(lambda cursor: execute_values(
+                    cursor,
+                    "INSERT INTO generation_jobs (id, type, persona_ids, prompt, parameters, status, created_at) VALUES %s",
+                    rows,
+                    page_size=page_size
+                ))
+            else:
+                # Mock database operation
+                logger.debug("Mock: Created %d generation jobs", len(jobs))
+            
+            logger.debug("Created %d generation jobs", len(jobs))
+            return [job["id"] for job in jobs]
+            
+        except Exception as e:
+            logger.error("Error creating generation jobs: %s", e)
             raise
     
     async def get_generation_job(self, job_id: str) -> Optional[Dict[str, Any]]:
         """Retrieve a generation job by ID."""
         try:
-            if self.connection:
-                cursor = self.connection.cursor()
-                cursor.execute("SELECT * FROM generation_jobs WHERE id = %s", (job_id,))
-                result = cursor.fetchone()
-                cursor.close()
+            if self.pool:
+                def fetch(cursor):
+                    self._execute_prepared(cursor, "select_generation_job", (job_id,))
+                    return cursor.fetchone()
+                
+                result = await self._run(fetch)
                 
                 if result:
                     return self._format_job_result(result)
@@ -247,13 +480,13 @@ class DatabaseClient:
             return None
             
         except Exception as e:
-            print(f"❌ Error retrieving job {job_id}: {e}")
+            logger.error("Error retrieving job %s: %s", job_id, e)
             return None
     
     async def update_generation_job(self, job_id: str, updates: Dict[str, Any]) -> bool:
         """Update a generation job."""
         try:
-            if self.connection:
+            if self.pool:
                 # Build dynamic update query
                 set_clauses = []
                 values = []
@@ -268,20 +501,17 @@ class DatabaseClient:
                 
                 values.append(job_id)
                 
-                cursor = self.connection.cursor()
                 query = f"UPDATE generation_jobs SET {', '.join(set_clauses)} WHERE id = %s"
-                cursor.execute(query, values)
-                self.connection.commit()
-                cursor.close()
+                await self._run(lambda cursor: cursor.execute(query, values))
             else:
                 # Mock database operation
-                print(f"Mock: Updated job {job_id} with {updates}")
+                logger.debug("Mock: Updated job %s with %s", job_id, updates)
             
-            print(f"✅ Updated job {job_id}")
+            logger.debug("Updated job %s", job_id)
             return True
             
         except Exception as e:
-            print(f"❌ Error updating job {job_id}: {e}")
+            logger.error("Error updating job %s: %s", job_id, e)
             return False
     
     def _format_persona_result(self, result: tuple) -> Dict[str, Any]:
@@ -339,6 +569,7 @@ class DatabaseClient:
         """Get database client status."""
         return {
             "connection_string": self.connection_string,
-            "connected": self.connection is not None,
-            "using_mock": self.connection is None
+            "connected": self.pool is not None,
+            "using_mock": self.pool is None,
+            "pool_size": f"{self.min_connections}-{self.max_connections}"
         }
\ No newline at end of file
@@ -0,0 +1,273 @@
+"""
+In-process FAISS index with a JSON metadata sidecar.
+Used by VectorStore(store_type="faiss") for hot, mostly read-only persona lookups.
+"""
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import faiss
+import numpy as np
+
+INDEX_FILE = "index.faiss"
+METADATA_FILE = "metadata.json"
+HNSW_EF_SEARCH = 64  # candidates explored per HNSW query; higher is slower but more exact
+QUANTIZE_TRAIN_SAMPLES = 10_000  # vectors used to learn per-dimension int8 ranges
+
+
+def _faiss_id(id: str) -> int:
+    """Map a string ID to a stable non-negative int64 (hash() is salted per process)."""
+    digest = hashlib.blake2b(id.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little") & 0x7FFFFFFFFFFFFFFF
+
+
+def _matches(metadata: Dict[str, Any], metadata_filter: Optional[Dict[str, Any]]) -> bool:
+    """Equality-only metadata filter."""
+    if not metadata_filter:
+        return True
+    return all(metadata.get(key) == value for key, value in metadata_filter.items())
+
+
+class FaissIndex:
+    """
+    L2 index behind an IndexIDMap2, keyed by string IDs.
+    
+    Vectors are stored as float32 (IndexFlatL2) or, with quantize=True, as one
+    int8 code per dimension (IndexScalarQuantizer, QT_8bit_uniform) scaled to
+    [-quantize_range, quantize_range] -- 4x smaller and faster to scan, which
+    suits normalized embeddings. With quantize_range=None each dimension gets
+    its own range instead (QT_8bit), learned from the first QUANTIZE_TRAIN_SAMPLES
+    vectors added, which keeps more precision for unnormalized or skewed
+    embeddings. With hnsw_m > 0 the vectors are linked into an
+    HNSW graph with hnsw_m neighbours per node, so queries take O(log n) instead
+    of scanning every vector, at the cost of approximate results and a rebuild on
+    removal. The index is created on the first add, once the embedding dimension
+    is known, and written back to disk by persist().
+    """
+    
+    def __init__(
+        self,
+        index_dir: Path,
+        quantize: bool = False,
+        quantize_range: Optional[float] = 1.0,
+        hnsw_m: int = 0
+    ):
+        self.index_dir = Path(index_dir)
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        self.quantize = quantize
+        self.quantize_range = quantize_range
+        self.hnsw_m = hnsw_m
+        self.index = None
+        self.records: Dict[int, Dict[str, Any]] = {}
+        self._dirty = False
+        
+        index_path = self.index_dir / INDEX_FILE
+        metadata_path = self.index_dir / METADATA_FILE
+        if index_path.exists() and metadata_path.exists():
+            self.index = faiss.read_index(str(index_path))
+            with open(metadata_path, "r") as f:
+                self.records = {int(key): value for key, value in json.load(f).items()}
+    
+    @property
+    def size(self) -> int:
+        """Number of stored embeddings."""
+        return len(self.records)
+    
+    def add(self, ids: List[str], embeddings: np.ndarray, metadatas: List[Dict[str, Any]]):
+        """Add (or replace) embeddings; embeddings is an (N, D) float32 array."""
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+        int_ids = np.fromiter((_faiss_id(id) for id in ids), dtype=np.int64, count=len(ids))
+        # Re-adding an ID replaces the old vector instead of duplicating it
+        self._remove_ids(int_ids)
+        
+        if self.index is None:
+            self.index = faiss.IndexIDMap2(self._create_base_index(embeddings.shape[1], embeddings))
+        self.index.add_with_ids(embeddings, int_ids)
+        
+        for int_id, id, metadata in zip(int_ids.tolist(), ids, metadatas):
+            self.records[int_id] = {"id": id, "metadata": metadata}
+        self._dirty = True
+    
+    def _create_base_index(self, dimension: int, sample: np.ndarray) -> "faiss.Index":
+        """Create the underlying float32 or int8 storage (flat or HNSW) for the given dimension."""
+        # Fixed symmetric range, or per-dimension ranges learned from the sample
+        qtype = faiss.ScalarQuantizer.QT_8bit_uniform if self.quantize_range else faiss.ScalarQuantizer.QT_8bit
+        if self.hnsw_m and self.quantize:
+            index = faiss.IndexHNSWSQ(dimension, qtype, self.hnsw_m)
+        elif self.hnsw_m:
+            index = faiss.IndexHNSWFlat(dimension, self.hnsw_m)
+        elif self.quantize:
+            index = faiss.IndexScalarQuantizer(dimension, qtype, faiss.METRIC_L2)
+        else:
+            return faiss.IndexFlatL2(dimension)
+        
+        if self.hnsw_m:
+            index.hnsw.efSearch = HNSW_EF_SEARCH
+        if self.quantize and self.quantize_range:
+            # A uniform quantizer only needs the value range, so train on its two bounds
+            # instead of waiting for a representative sample
+            bounds = np.array(
+                [[-self.quantize_range] * dimension, [self.quantize_range] * dimension],
+                dtype=np.float32
+            )
+            index.train(bounds)
+        elif self.quantize:
+            index.train(sample[:QUANTIZE_TRAIN_SAMPLES])
+        return index
+    
+    def _remove_ids(self, int_ids: np.ndarray):
+        """Drop vectors from the index; HNSW graphs cannot delete, so they are rebuilt without them."""
+        if self.index is None:
+            return
+        
+        try:
+            self.index.remove_ids(int_ids)
+            return
+        except RuntimeError:
+            pass
+        
+        removed = set(int_ids.tolist()) & self.records.keys()
+        if not removed:
+            return
+        
+        kept_ids = np.fromiter((int_id for int_id in self.records if int_id not in removed), dtype=np.int64)
+        if not len(kept_ids):
+            # The next add() recreates (and, if needed, retrains) the index
+            self.index = None
+            return
+        
+        vectors = np.vstack([self.index.reconstruct(int_id) for int_id in kept_ids.tolist()])
+        self.index = faiss.IndexIDMap2(self._create_base_index(self.index.d, vectors))
+        self.index.add_with_ids(vectors, kept_ids)
+    
+    def remove(self, ids: List[str]):
+        """Remove embeddings by ID (unknown IDs are ignored)."""
+        int_ids = np.fromiter((_faiss_id(id) for id in ids), dtype=np.int64, count=len(ids))
+        self._remove_ids(int_ids)
+        for int_id in int_ids.tolist():
+            self.records.pop(int_id, None)
+        self._dirty = True
+    
+    def remove_where(self, predicate: Callable[[Dict[str, Any]], bool]) -> int:
+        """Remove every embedding whose metadata matches predicate; returns how many were removed."""
+        int_ids = np.fromiter(
+            (int_id for int_id, record in self.records.items() if predicate(record["metadata"])),
+            dtype=np.int64
+        )
+        if len(int_ids):
+            self._remove_ids(int_ids)
+            for int_id in int_ids.tolist():
+                del self.records[int_id]
+            self._dirty = True
+        return len(int_ids)
+    
+    def get(self, id: str) -> Optional[Dict[str, Any]]:
+        """Return the stored record ({"id", "metadata"}) for an ID."""
+        return self.records.get(_faiss_id(id))
+    
+    def update_metadata(self, id: str, metadata: Dict[str, Any]):
+        """Replace the metadata of an existing embedding."""
+        record = self.records.get(_faiss_id(id))
+        if record is not None:
+            record["metadata"] = metadata
+            self._dirty = True
+    
+    def search(
+        self,
+        query_embedding: np.ndarray,
+        limit: int,
+        metadata_filter: Optional[Dict[str, Any]] = None,
+        include_embeddings: bool = False
+    ) -> List[Dict[str, Any]]:
+        """Return the nearest embeddings as {"id", "distance", "metadata", "embedding"} rows."""
+        if self.index is None or self.index.ntotal == 0:
+            return []
+        
+        query = np.ascontiguousarray(query_embedding, dtype=np.float32).reshape(1, -1)
+        # Filtering happens after the search, so scan everything when a filter is set
+        k = self.index.ntotal if metadata_filter else min(limit, self.index.ntotal)
+        distances, int_ids = self.index.search(query, k)
+        
+        results = []
+        for distance, int_id in zip(distances[0].tolist(), int_ids[0].tolist()):
+            record = self.records.get(int_id)
+            if int_id == -1 or record is None or not _matches(record["metadata"], metadata_filter):
+                continue
+            results.append({
+                "id": record["id"],
+                "distance": distance,
+                "metadata": record["metadata"],
+                "embedding": self.index.reconstruct(int_id).tolist() if include_embeddings else []
+            })
+            if len(results) == limit:
+                break
+        return results
+    
+    def get_embeddings(
+        self,
+        limit: int,
+        metadata_filter: Optional[Dict[str, Any]] = None
+    ) -> Tuple[List[str], np.ndarray]:
+        """Return the IDs and (N, D) float32 vectors of stored embeddings matching the filter."""
+        int_ids = [
+            int_id for int_id, record in self.records.items()
+            if _matches(record["metadata"], metadata_filter)
+        ][:limit]
+        if self.index is None or not int_ids:
+            return [], np.empty((0, self.index.d if self.index is not None else 0), dtype=np.float32)
+        
+        vectors = np.vstack([self.index.reconstruct(int_id) for int_id in int_ids])
+        return [self.records[int_id]["id"] for int_id in int_ids], vectors
+    
+    def list(
+        self,
+        limit: int,
+        offset: int,
+        metadata_filter: Optional[Dict[str, Any]] = None,
+        newest_first: bool = False
+    ) -> List[Dict[str, Any]]:
+        """List stored records (with their vectors) in insertion order, or newest timestamp_ns first."""
+        matching = [
+            (int_id, record) for int_id, record in self.records.items()
+            if _matches(record["metadata"], metadata_filter)
+        ]
+        if newest_first:
+            matching.sort(key=lambda item: item[1]["metadata"].get("timestamp_ns") or 0, reverse=True)
+        results = []
+        for position, (int_id, record) in enumerate(matching):
+            if position < offset:
+                continue
+            if len(results) == limit:
+                break
+            results.append({
+                "id": record["id"],
+                "metadata": record["metadata"],
+                "embedding": self.index.reconstruct(int_id) if self.index is not None else []
+            })
+        return results
+    
+    def persist(self):
+        """Write the index and metadata sidecar to disk if anything changed."""
+        if not self._dirty:
+            return
+        
+        index_path = self.index_dir / INDEX_FILE
+        metadata_path = self.index_dir / METADATA_FILE
+        if self.index is None:
+            # Everything was removed, so stale files must not come back on restart
+            index_path.unlink(missing_ok=True)
+            metadata_path.unlink(missing_ok=True)
+            self._dirty = False
+            return
+        
+        tmp_index = index_path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_metadata = metadata_path.with_suffix(f".{os.getpid()}.tmp")
+        
+        faiss.write_index(self.index, str(tmp_index))
+        with open(tmp_metadata, "w") as f:
+            json.dump({str(key): value for key, value in self.records.items()}, f)
+        os.replace(tmp_index, index_path)
+        os.replace(tmp_metadata, metadata_path)
+        self._dirty = False
@@ -0,0 +1,30 @@
+-- Server-side similarity search called by VectorStore.search_similar over PostgREST RPC.
+-- Apply once per Supabase project (SQL editor or psql); VectorStore also applies it
+-- at startup when connection_params includes db_url.
+--
+-- A SQL function's plan is cached per session; force_custom_plan re-plans with the
+-- actual LIMIT/threshold so the pgvector index stays usable.
+
+-- The earlier 4-argument version would make 4-argument calls ambiguous next to this one
+DROP FUNCTION IF EXISTS match_embeddings(vector, float, int, jsonb);
+
+CREATE OR REPLACE FUNCTION match_embeddings(
+    query_embedding vector,
+    match_threshold float,
+    match_count int,
+    filter jsonb DEFAULT NULL,
+    include_embedding boolean DEFAULT false
+)
+RETURNS TABLE (id text, metadata jsonb, embedding vector, similarity float)
+LANGUAGE sql STABLE
+SET plan_cache_mode = force_custom_plan
+AS $$
+    SELECT e.id, e.metadata,
+           CASE WHEN include_embedding THEN e.embedding END AS embedding,
+           1 - (e.embedding <=> query_embedding) AS similarity
+    FROM embeddings e
+    WHERE (filter IS NULL OR e.metadata @> filter)
+      AND 1 - (e.embedding <=> query_embedding) > match_threshold
+    ORDER BY e.embedding <=> query_embedding
+    LIMIT match_count;
+$$;
@@ -2,71 +2,233 @@
 Smart Persona Detection System
 Automatically detect which personas (if any) should be in a video based on the prompt.
 """
+import json
+import logging
 import os
+import re
+import threading
+from functools import lru_cache
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
+
+from .persona_metadata import load_persona_metadata
+
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Aggregate names/metadata for all personas, written inside the personas directory
+INDEX_CACHE_FILE = ".persona_index.json"
+
+# Lookup table of ASCII word bytes ([A-Za-z0-9_]), the characters regex \b treats as word
+_ASCII_WORD_BYTES = bytes(
+    1 if chr(byte).isalnum() or byte == ord('_') else 0 for byte in range(128)
+) + bytes(128)
 
 
 class PersonaDetector:
-    """Detect which personas should be included based on prompt content."""
+    """
+    Detect which personas should be included based on prompt content.
+    
+    Instances are shared per resolved personas directory, so constructing a
+    detector in a request handler only scans the filesystem once per process.
+    Call invalidate() after personas are added or removed.
+    """
+    
+    _instances: Dict[Path, "PersonaDetector"] = {}
+    _instances_lock = threading.Lock()
+    # Held while a new instance indexes, so threads sharing it wait for a complete index
+    _init_lock = threading.Lock()
+    _initialized = False
+    
+    def __new__(cls, personas_dir: str = "personas"):
+        key = Path(personas_dir).resolve()
+        with cls._instances_lock:
+            instance = cls._instances.get(key)
+            if instance is None:
+                instance = super().__new__(cls)
+                cls._instances[key] = instance
+        return instance
     
     def __init__(self, personas_dir: str = "personas"):
-        self.personas_dir = Path(personas_dir)
-        self._load_persona_index()
+        if self._initialized:
+            return  # Shared instance already indexed
+        with self._init_lock:
+            if self._initialized:
+                return
+            self.personas_dir = Path(personas_dir)
+            # Per-instance memo, so a detector dropped by invalidate() is freed with its
+            # cache instead of being kept alive by a class-level lru_cache
+            self._detect_personas = lru_cache(maxsize=1024)(self._detect_personas_uncached)
+            self._load_persona_index()
+            self._initialized = True
+    
+    @classmethod
+    def invalidate(cls, personas_dir: Optional[str] = None):
+        """Drop cached detectors so the next construction rescans the personas directory."""
+        with cls._instances_lock:
+            if personas_dir is None:
+                cls._instances.clear()
+            else:
+                cls._instances.pop(Path(personas_dir).resolve(), None)
     
     def _load_persona_index(self):
         """Build an index of all available personas and their names/aliases."""
         self.persona_index = {}
+        self._automaton = None
+        self._first_chars = frozenset()
         
         if not self.personas_dir.exists():
-            print(f"⚠️ Personas directory not found: {self.personas_dir}")
+            logger.warning("Personas directory not found: %s", self.personas_dir)
             return
         
         # Directories to skip (not real personas)
         skip_dirs = {'chroma_db', '__pycache__', '.git'}
         
-        # Scan personas directory for subdirectories
-        for persona_dir in self.personas_dir.iterdir():
-            if persona_dir.is_dir() and not persona_dir.name.startswith('.') and persona_dir.name not in skip_dirs:
-                persona_id = persona_dir.name
-                
-                # Load metadata to get full name and aliases
-                metadata_file = persona_dir / "metadata.json"
-                if metadata_file.exists():
-                    import json
-                    try:
-                        with open(metadata_file, 'r') as f:
-                            metadata = json.load(f)
-                        
-                        # Build list of names this persona responds to
-                        names = [persona_id]  # Directory name (e.g., "john")
-                        
-                        if 'name' in metadata:
-                            names.append(metadata['name'].lower())  # Full name (e.g., "john")
-                        
-                        if 'aliases' in metadata:
-                            names.extend([alias.lower() for alias in metadata['aliases']])
-                        
-                        self.persona_index[persona_id] = {
-                            'names': list(set(names)),  # Remove duplicates
-                            'metadata': metadata
-                        }
-                        
-                    except Exception as e:
-                        print(f"⚠️ Error loading metadata for {persona_id}: {e}")
-                        # Fallback: just use directory name
-                        self.persona_index[persona_id] = {
-                            'names': [persona_id],
-                            'metadata': {}
-                        }
-                else:
-                    # No metadata, just use directory name
-                    self.persona_index[persona_id] = {
-                        'names': [persona_id],
-                        'metadata': {}
-                    }
-        
-        print(f"📇 Loaded {len(self.persona_index)} personas: {list(self.persona_index.keys())}")
+        # Scan personas directory for subdirectories; DirEntry caches the file type
+        # from the directory read, so no extra stat per entry
+        with os.scandir(self.personas_dir) as entries:
+            persona_entries = [
+                entry for entry in entries
+                if not entry.name.startswith('.') and entry.name not in skip_dirs and entry.is_dir()
+            ]
+        
+        # Fingerprint every persona by its metadata mtime; if nothing changed since
+        # the on-disk index was written, skip opening each metadata.json
+        fingerprint = {
+            entry.name: self._metadata_mtime_ns(entry.path) for entry in persona_entries
+        }
+        cached_index = self._read_index_cache(fingerprint)
+        
+        if cached_index is not None:
+            self.persona_index = cached_index
+        else:
+            for persona_entry in persona_entries:
+                self.persona_index[persona_entry.name] = self._index_persona(persona_entry)
+            self._write_index_cache(fingerprint)
+        
+        # Compile one word-boundary alternation per persona so detection never recompiles
+        for persona_info in self.persona_index.values():
+            persona_info['pattern'] = self._compile_name_pattern(persona_info['names'])
+            persona_info['ascii_names'] = tuple(
+                name.lower().encode('ascii') for name in persona_info['names'] if name.isascii()
+            )
+        
+        # Every match must start with one of these, so prompts lacking all of them
+        # can be rejected without running any matcher
+        self._first_chars = frozenset(
+            name[:1].lower() for persona_info in self.persona_index.values() for name in persona_info['names']
+        )
+        
+        if AHOCORASICK_AVAILABLE and self.persona_index:
+            self._automaton = self._build_automaton()
+        
+        logger.info("Loaded %d personas: %s", len(self.persona_index), list(self.persona_index))
+    
+    @staticmethod
+    def _metadata_mtime_ns(persona_path: str) -> Optional[int]:
+        """Return the mtime of a persona's metadata.json, or None if it has none."""
+        try:
+            return os.stat(os.path.join(persona_path, "metadata.json")).st_mtime_ns
+        except OSError:
+            return None
+    
+    def _index_persona(self, persona_entry: os.DirEntry) -> Dict[str, Any]:
+        """Build the index entry (names + metadata) for one persona directory."""
+        persona_id = persona_entry.name
+        metadata_file = os.path.join(persona_entry.path, "metadata.json")
+        
+        if not os.path.isfile(metadata_file):
+            # No metadata, just use directory name
+            return {'names': [persona_id], 'metadata': {}}
+        
+        # Load metadata to get full name and aliases
+        try:
+            metadata = load_persona_metadata(metadata_file)
+            
+            # Build list of names this persona responds to
+            names = [persona_id]  # Directory name (e.g., "john")
+            
+            if 'name' in metadata:
+                names.append(metadata['name'])  # Full name (e.g., "John Smith")
+            
+            names.extend(metadata.get('aliases', []))
+            
+            return {
+                # Lowercase everything before an order-preserving dedupe
+                'names': list(dict.fromkeys(name.lower() for name in names)),
+                'metadata': metadata
+            }
+            
+        except Exception as e:
+            logger.warning("Error loading metadata for %s: %s", persona_id, e)
+            # Fallback: just use directory name
+            return {'names': [persona_id], 'metadata': {}}
+    
+    def _read_index_cache(self, fingerprint: Dict[str, Optional[int]]) -> Optional[Dict[str, Any]]:
+        """Return the cached persona index if it matches the current fingerprint."""
+        try:
+            with open(self.personas_dir / INDEX_CACHE_FILE, 'rb') as f:
+                cached = json.loads(f.read())
+        except (OSError, ValueError):
+            return None
+        
+        if cached.get('fingerprint') != fingerprint:
+            return None
+        return cached.get('personas')
+    
+    def _write_index_cache(self, fingerprint: Dict[str, Optional[int]]):
+        """Persist names/metadata for every persona into one aggregate index file."""
+        cache_file = self.personas_dir / INDEX_CACHE_FILE
+        tmp_file = cache_file.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            with open(tmp_file, 'w') as f:
+                json.dump({'fingerprint': fingerprint, 'personas': self.persona_index}, f)
+            os.replace(tmp_file, cache_file)
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning("Could not write persona index cache: %s", e)
+    
+    @staticmethod
+    def _compile_name_pattern(names: List[str]) -> "re.Pattern[str]":
+        """Compile a word-boundary regex matching any of the given names."""
+        # Longest first so an alias that prefixes another cannot shadow it
+        alternatives = sorted((name.lower() for name in names), key=len, reverse=True)
+        return re.compile(r'\b(?:' + '|'.join(re.escape(name) for name in alternatives) + r')\b')
+    
+    def _build_automaton(self) -> "ahocorasick.Automaton":
+        """Build an Aho-Corasick automaton over every persona name."""
+        personas_by_name = {}
+        for persona_id, persona_info in self.persona_index.items():
+            for name in persona_info['names']:
+                personas_by_name.setdefault(name.lower(), []).append(persona_id)
+        
+        automaton = ahocorasick.Automaton()
+        for name, persona_ids in personas_by_name.items():
+            automaton.add_word(name, (name, persona_ids))
+        automaton.make_automaton()
+        return automaton
+    
+    @staticmethod
+    def _is_word_boundary(text: str, start: int, end: int) -> bool:
+        """Check that text[start:end] is not embedded in a longer word (like regex \\b)."""
+        before = text[start - 1] if start > 0 else ' '
+        after = text[end] if end < len(text) else ' '
+        return not (before.isalnum() or before == '_') and not (after.isalnum() or after == '_')
+    
+    def _scan_with_automaton(self, prompt_lower: str) -> Dict[str, str]:
+        """Scan the prompt once, returning matched persona IDs mapped to the matched name."""
+        matches = {}
+        for end_index, (name, persona_ids) in self._automaton.iter(prompt_lower):
+            start = end_index - len(name) + 1
+            if not self._is_word_boundary(prompt_lower, start, end_index + 1):
+                continue
+            for persona_id in persona_ids:
+                matches.setdefault(persona_id, name)
+        return matches
     
     def detect_personas_in_prompt(self, prompt: str) -> List[str]:
         """
@@ -81,27 +243,64 @@ class PersonaDetector:
         """
         if not prompt:
             return []
+        return list(self._detect_personas(prompt))
+    
+    def _detect_personas_uncached(self, prompt: str) -> Tuple[str, ...]:
+        """Detection behind the _detect_personas memo; the same scene prompt is often checked several times per request."""
+        prompt_lower = prompt.lower()
+        matches = self._match_personas(prompt_lower)
         
-        import re
+        detected_personas = tuple(persona_id for persona_id in self.persona_index if persona_id in matches)
         
-        prompt_lower = prompt.lower()
-        detected_personas = []
+        if logger.isEnabledFor(logging.DEBUG):
+            for persona_id in detected_personas:
+                logger.debug("Detected persona '%s' (matched: '%s')", persona_id, matches[persona_id])
+            if not detected_personas:
+                logger.debug("No personas detected in prompt")
+        
+        return detected_personas
+    
+    def _match_personas(self, prompt_lower: str) -> Dict[str, str]:
+        """Map each persona mentioned in the lowercased prompt to the name that matched."""
+        if self._first_chars.isdisjoint(prompt_lower):
+            return {}
+        
+        if self._automaton is not None:
+            # Single O(len(prompt)) pass regardless of how many personas exist
+            return self._scan_with_automaton(prompt_lower)
         
+        if prompt_lower.isascii():
+            # Non-ASCII aliases cannot occur in an ASCII prompt, so plain byte
+            # searches plus a table lookup for \b replace the regex engine
+            return self._scan_ascii(prompt_lower.encode('ascii'))
+        
+        matches = {}
         for persona_id, persona_info in self.persona_index.items():
-            # Check if any of this persona's names appear in the prompt
-            for name in persona_info['names']:
-                # Use word boundaries to avoid partial matches
-                # \b ensures we match whole words only
-                pattern = r'\b' + re.escape(name.lower()) + r'\b'
-                if re.search(pattern, prompt_lower):
-                    detected_personas.append(persona_id)
-                    print(f"✅ Detected persona '{persona_id}' (matched: '{name}')")
-                    break  # Don't add same persona twice
+            # Patterns use \b word boundaries, so "Camera" never matches "Cam"
+            match = persona_info['pattern'].search(prompt_lower)
+            if match:
+                matches[persona_id] = match.group(0)
+        return matches
+    
+    def _scan_ascii(self, prompt_bytes: bytes) -> Dict[str, str]:
+        """Find whole-word occurrences of each persona's ASCII names in the prompt bytes."""
+        matches = {}
+        prompt_length = len(prompt_bytes)
         
-        if not detected_personas:
-            print(f"ℹ️ No personas detected in prompt")
+        for persona_id, persona_info in self.persona_index.items():
+            for needle in persona_info['ascii_names']:
+                position = prompt_bytes.find(needle)
+                while position != -1:
+                    end = position + len(needle)
+                    if (position == 0 or not _ASCII_WORD_BYTES[prompt_bytes[position - 1]]) and \
+                            (end == prompt_length or not _ASCII_WORD_BYTES[prompt_bytes[end]]):
+                        matches[persona_id] = needle.decode('ascii')
+                        break
+                    position = prompt_bytes.find(needle, position + 1)
+                if persona_id in matches:
+                    break
         
-        return detected_personas
+        return matches
     
     def get_persona_metadata(self, persona_id: str) -> Optional[Dict[str, Any]]:
         """Get metadata for a specific persona."""
@@ -115,7 +314,8 @@ class PersonaDetector:
 
 
 if __name__ == "__main__":
-    # Test the detector
+    # Test the detector (run as `python -m storage.persona_detector`)
+    logging.basicConfig(level=logging.DEBUG)
     detector = PersonaDetector()
     
     test_prompts = [
@@ -1,14 +1,112 @@
 """
 Persona loader for extracting and encoding reference images for video generation.
 """
+import asyncio
 import os
 import base64
-import json
+import hashlib
+import math
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from typing import List, Dict, Optional, Any
+from typing import Callable, List, Dict, Optional, Any, Union
 from PIL import Image
 import io
 
+from .persona_metadata import load_persona_metadata
+
+# libjpeg-turbo's SIMD encoder is 2-4x faster than Pillow's stock libjpeg (optional)
+try:
+    import numpy as np
+    from turbojpeg import TurboJPEG, TJPF_RGB, TJSAMP_420
+    _TURBO_JPEG = TurboJPEG()
+except Exception:
+    # ImportError, or OSError when the libjpeg-turbo shared library is missing
+    _TURBO_JPEG = None
+
+# VEO has size limits on reference images
+MAX_IMAGE_DIMENSION = 1024
+JPEG_QUALITY = 90
+
+# Encoded images are cached in a hidden sidecar directory next to the source images
+ENCODED_CACHE_DIR = ".cache"
+
+# Shared pool for image encoding, so loads don't spawn threads per call
+_ENCODE_EXECUTOR = ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 1), thread_name_prefix="persona-encode")
+
+
+def _render_jpeg(image_path: Path, max_dimension: int, quality: int) -> Union[bytes, memoryview]:
+    """Decode, downscale and re-encode an image as JPEG bytes."""
+    with Image.open(image_path) as img:
+        # For JPEGs, let libjpeg scale by 1/2, 1/4 or 1/8 in the DCT domain while
+        # decoding, so oversized sources never materialize at full resolution
+        if image_path.suffix.lower() in ('.jpg', '.jpeg') and max(img.size) > max_dimension:
+            ratio = max_dimension / max(img.size)
+            img.draft('RGB', (math.ceil(img.width * ratio), math.ceil(img.height * ratio)))
+        
+        # Convert to RGB if necessary
+        if img.mode != 'RGB':
+            img = img.convert('RGB')
+        
+        # Resize if too large; LANCZOS only pays off on aggressive downscales
+        if max(img.size) > max_dimension:
+            ratio = max_dimension / max(img.size)
+            new_size = tuple(int(dim * ratio) for dim in img.size)
+            resample = Image.Resampling.LANCZOS if ratio < 0.5 else Image.Resampling.BILINEAR
+            img = img.resize(new_size, resample)
+        
+        if _TURBO_JPEG is not None:
+            return _TURBO_JPEG.encode(
+                np.asarray(img),
+                quality=quality,
+                pixel_format=TJPF_RGB,
+                jpeg_subsample=TJSAMP_420
+            )
+        
+        buffer = io.BytesIO()
+        img.save(buffer, format='JPEG', quality=quality)
+        # Zero-copy view of the encoded bytes; b64encode accepts any buffer
+        return buffer.getbuffer()
+
+
+@lru_cache(maxsize=256)
+def _encode_image_base64(
+    path: str,
+    mtime_ns: int,
+    size: int,
+    max_dimension: int,
+    quality: int
+) -> str:
+    """
+    Return the base64 JPEG encoding of an image, memoized in memory and on disk.
+    
+    The key includes the file's mtime and size, so editing or replacing an
+    image invalidates both cache layers.
+    """
+    key = hashlib.blake2b(
+        f"{path}|{mtime_ns}|{size}|{max_dimension}|{quality}".encode(),
+        digest_size=16
+    ).hexdigest()
+    cache_file = Path(path).parent / ENCODED_CACHE_DIR / f"{key}.b64"
+    
+    try:
+        return cache_file.read_text(encoding='ascii')
+    except OSError:
+        pass
+    
+    encoded = base64.b64encode(_render_jpeg(Path(path), max_dimension, quality)).decode('ascii')
+    
+    try:
+        cache_file.parent.mkdir(exist_ok=True)
+        tmp_file = cache_file.with_suffix(f".{os.getpid()}.tmp")
+        tmp_file.write_text(encoded, encoding='ascii')
+        os.replace(tmp_file, cache_file)
+    except OSError as e:
+        # Read-only persona directories still benefit from the in-memory cache
+        print(f"⚠️ Could not write encoded image cache for {path}: {e}")
+    
+    return encoded
+
 
 class PersonaLoader:
     """Load and prepare persona reference images for VEO video generation."""
@@ -33,6 +131,34 @@ class PersonaLoader:
         Returns:
             List of dicts with format: {"bytesBase64Encoded": str, "mimeType": str}
         """
+        return self._load_reference_images(persona_name, max_images, emotion, self._encode_image)
+    
+    def get_persona_reference_images_binary(
+        self,
+        persona_name: str,
+        max_images: int = 3,
+        emotion: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Load persona reference images as raw JPEG bytes for multipart uploads.
+        
+        Avoids the 4/3 base64 inflation for APIs that accept binary parts. The
+        Vertex VEO endpoint only takes JSON bodies, so VeloClient keeps using
+        get_persona_reference_images.
+        
+        Returns:
+            List of dicts with format: {"bytes": bytes, "mimeType": str, "referenceType": str}
+        """
+        return self._load_reference_images(persona_name, max_images, emotion, self._encode_image_binary)
+    
+    def _load_reference_images(
+        self,
+        persona_name: str,
+        max_images: int,
+        emotion: Optional[str],
+        encode: Callable[[Path], Optional[Dict[str, Any]]]
+    ) -> List[Dict[str, Any]]:
+        """Load reference images for a persona, encoding each with the given encoder."""
         persona_path = self.personas_dir / persona_name
         
         if not persona_path.exists():
@@ -40,14 +166,14 @@ class PersonaLoader:
             return []
         
         # Try to load from reference_frames first
-        reference_images = self._load_from_reference_frames(persona_path, emotion, max_images)
+        reference_images = self._load_from_reference_frames(persona_path, emotion, max_images, encode)
         
         if reference_images:
             print(f"✅ Loaded {len(reference_images)} reference images for {persona_name}")
             return reference_images
         
         # Fallback: try processed directory
-        reference_images = self._load_from_processed(persona_path, max_images)
+        reference_images = self._load_from_processed(persona_path, max_images, encode)
         
         if reference_images:
             print(f"✅ Loaded {len(reference_images)} reference images from processed/ for {persona_name}")
@@ -56,12 +182,24 @@ class PersonaLoader:
         print(f"⚠️ No reference images found for {persona_name}")
         return []
     
+    async def aget_persona_reference_images(
+        self,
+        persona_name: str,
+        max_images: int = 3,
+        emotion: Optional[str] = None
+    ) -> List[Dict[str, str]]:
+        """Async variant of get_persona_reference_images that keeps PIL work off the event loop."""
+        return await asyncio.to_thread(
+            self.get_persona_reference_images, persona_name, max_images, emotion
+        )
+    
     def _load_from_reference_frames(
         self, 
         persona_path: Path, 
         emotion: Optional[str], 
-        max_images: int
-    ) -> List[Dict[str, str]]:
+        max_images: int,
+        encode: Callable[[Path], Optional[Dict[str, Any]]]
+    ) -> List[Dict[str, Any]]:
         """Load images from reference_frames directory."""
         ref_frames_dir = persona_path / "reference_frames"
         
@@ -72,58 +210,63 @@ class PersonaLoader:
         if emotion:
             emotion_dir = ref_frames_dir / emotion
             if emotion_dir.exists():
-                return self._encode_images_from_dir(emotion_dir, max_images)
+                return self._encode_images_from_dir(emotion_dir, max_images, encode)
         
         # Otherwise, load from neutral or first available
         neutral_dir = ref_frames_dir / "neutral"
         if neutral_dir.exists():
-            return self._encode_images_from_dir(neutral_dir, max_images)
+            return self._encode_images_from_dir(neutral_dir, max_images, encode)
         
         # Load from first available emotion
         for subdir in ref_frames_dir.iterdir():
             if subdir.is_dir():
-                images = self._encode_images_from_dir(subdir, max_images)
+                images = self._encode_images_from_dir(subdir, max_images, encode)
                 if images:
                     return images
         
         return []
     
-    def _load_from_processed(self, persona_path: Path, max_images: int) -> List[Dict[str, str]]:
+    def _load_from_processed(
+        self,
+        persona_path: Path,
+        max_images: int,
+        encode: Callable[[Path], Optional[Dict[str, Any]]]
+    ) -> List[Dict[str, Any]]:
         """Load images from processed directory."""
         processed_dir = persona_path / "processed"
         
         if not processed_dir.exists():
             return []
         
-        return self._encode_images_from_dir(processed_dir, max_images)
+        return self._encode_images_from_dir(processed_dir, max_images, encode)
     
-    def _encode_images_from_dir(self, directory: Path, max_images: int) -> List[Dict[str, str]]:
-        """Encode all images in a directory to base64."""
-        encoded_images = []
+    def _encode_images_from_dir(
+        self,
+        directory: Path,
+        max_images: int,
+        encode: Optional[Callable[[Path], Optional[Dict[str, Any]]]] = None
+    ) -> List[Dict[str, Any]]:
+        """Encode all images in a directory (base64 unless another encoder is given)."""
+        # Get all image files (DirEntry.is_file() reuses the type from the directory read)
+        image_extensions = {'jpg', 'jpeg', 'png', 'webp'}
+        with os.scandir(directory) as entries:
+            image_names = [
+                entry.name for entry in entries
+                if entry.name.rpartition('.')[2].lower() in image_extensions and entry.is_file()
+            ]
         
-        # Get all image files
-        image_extensions = {'.jpg', '.jpeg', '.png', '.webp'}
-        image_files = [
-            f for f in directory.iterdir() 
-            if f.is_file() and f.suffix.lower() in image_extensions
-        ]
+        # Sort for consistency, then limit to max_images
+        image_names.sort()
+        image_files = [directory / name for name in image_names[:max_images]]
         
-        # Sort for consistency
-        image_files.sort()
-        
-        # Limit to max_images
-        image_files = image_files[:max_images]
+        if not image_files:
+            return []
         
-        for image_file in image_files:
-            try:
-                encoded_image = self._encode_image(image_file)
-                if encoded_image:
-                    encoded_images.append(encoded_image)
-            except Exception as e:
-                print(f"⚠️ Error encoding {image_file.name}: {e}")
-                continue
+        # PIL releases the GIL while decoding/encoding, so images encode in parallel
+        encoded_images = list(_ENCODE_EXECUTOR.map(encode or self._encode_image, image_files))
         
-        return encoded_images
+        # Encoders return None for files it could not encode
+        return [image for image in encoded_images if image]
     
     def _encode_image(self, image_path: Path) -> Optional[Dict[str, Any]]:
         """
@@ -140,35 +283,46 @@ class PersonaLoader:
             }
         """
         try:
-            # Open and potentially resize image
-            with Image.open(image_path) as img:
-                # Convert to RGB if necessary
-                if img.mode != 'RGB':
-                    img = img.convert('RGB')
-                
-                # Resize if too large (VEO has size limits)
-                max_dimension = 1024
-                if max(img.size) > max_dimension:
-                    ratio = max_dimension / max(img.size)
-                    new_size = tuple(int(dim * ratio) for dim in img.size)
-                    img = img.resize(new_size, Image.Resampling.LANCZOS)
-                
-                # Save to bytes
-                buffer = io.BytesIO()
-                img.save(buffer, format='JPEG', quality=90)
-                image_bytes = buffer.getvalue()
-                
-                # Encode to base64
-                base64_encoded = base64.b64encode(image_bytes).decode('utf-8')
-                
-                # VEO API format for subject/asset images
-                return {
-                    "image": {
-                        "bytesBase64Encoded": base64_encoded,
-                        "mimeType": "image/jpeg"
-                    },
-                    "referenceType": "asset"  # "asset" for person/character, "style" for artistic style
-                }
+            # Repeat loads of an unchanged image skip the PIL decode/resize/encode
+            stat = image_path.stat()
+            base64_encoded = _encode_image_base64(
+                str(image_path),
+                stat.st_mtime_ns,
+                stat.st_size,
+                MAX_IMAGE_DIMENSION,
+                JPEG_QUALITY
+            )
+            
+            # VEO API format for subject/asset images
+            return {
+                "image": {
+                    "bytesBase64Encoded": base64_encoded,
+                    "mimeType": "image/jpeg"
+                },
+                "referenceType": "asset"  # "asset" for person/character, "style" for artistic style
+            }
+        
+        except Exception as e:
+            print(f"❌ Failed to encode {image_path}: {e}")
+            return None
+    
+    def _encode_image_binary(self, image_path: Path) -> Optional[Dict[str, Any]]:
+        """Encode a single image to raw JPEG bytes for multipart uploads."""
+        try:
+            stat = image_path.stat()
+            # Reuse the encoded-image cache; decoding base64 is far cheaper than PIL
+            base64_encoded = _encode_image_base64(
+                str(image_path),
+                stat.st_mtime_ns,
+                stat.st_size,
+                MAX_IMAGE_DIMENSION,
+                JPEG_QUALITY
+            )
+            return {
+                "bytes": base64.b64decode(base64_encoded),
+                "mimeType": "image/jpeg",
+                "referenceType": "asset"
+            }
         
         except Exception as e:
             print(f"❌ Failed to encode {image_path}: {e}")
@@ -182,8 +336,8 @@ class PersonaLoader:
             return {}
         
         try:
-            with open(metadata_path, 'r') as f:
-                return json.load(f)
+            # Cached per (path, mtime); copy so callers can't mutate the shared entry
+            return dict(load_persona_metadata(metadata_path))
         except Exception as e:
             print(f"⚠️ Error loading metadata for {persona_name}: {e}")
             return {}
@@ -0,0 +1,25 @@
+"""
+Cached persona metadata loading shared by the persona detector and loader.
+"""
+import json
+import os
+from functools import lru_cache
+from typing import Any, Dict, Union
+
+
+@lru_cache(maxsize=1024)
+def _load_metadata(path: str, mtime_ns: int) -> Dict[str, Any]:
+    """Parse a metadata file; mtime_ns is part of the cache key only."""
+    with open(path, 'rb') as f:
+        return json.loads(f.read())
+
+
+def load_persona_metadata(path: Union[str, os.PathLike]) -> Dict[str, Any]:
+    """
+    Load a persona metadata.json, re-parsing only when the file's mtime changes.
+    
+    The returned dict is shared between callers - treat it as read-only.
+    Raises the usual OSError / ValueError if the file is missing or invalid.
+    """
+    path = os.fspath(path)
+    return _load_metadata(path, os.stat(path).st_mtime_ns)
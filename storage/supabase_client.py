@@ -0,0 +1,47 @@
+"""
+Shared Supabase client construction.
+Gives PostgREST, Storage and Functions one pooled (HTTP/2 when available) httpx client.
+"""
+import importlib.util
+
+import httpx
+
+# One connection pool per Supabase client, reused by every REST/storage call
+HTTP_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=50)
+HTTP_TIMEOUT = httpx.Timeout(120.0, connect=10.0)  # uploads can be large
+
+
+def create_supabase_client(url: str, key: str):
+    """
+    Create a Supabase client whose sub-clients share a pooled httpx session.
+    
+    Args:
+        url: Supabase project URL
+        key: Supabase API key
+    
+    Returns:
+        supabase.Client (raises ImportError if supabase is not installed)
+    """
+    from supabase import create_client
+    try:
+        from supabase.lib.client_options import SyncClientOptions
+    except ImportError:
+        # supabase 2.x releases before SyncClientOptions; an ImportError escaping
+        # here would read as "supabase not installed" to callers
+        return create_client(url, key)
+    
+    # HTTP/2 multiplexes concurrent requests over one TLS connection (needs h2)
+    http_client = httpx.Client(
+        http2=importlib.util.find_spec("h2") is not None,
+        limits=HTTP_LIMITS,
+        timeout=HTTP_TIMEOUT
+    )
+    
+    try:
+        options = SyncClientOptions(httpx_client=http_client)
+    except TypeError:
+        # Older supabase releases have no httpx_client option; use their default sessions
+        http_client.close()
+        return create_client(url, key)
+    
+    return create_client(url, key, options=options)
@@ -2,12 +2,109 @@
 File upload and storage management.
 Clean extraction supporting local, S3, and Supabase storage.
 """
+import asyncio
+import functools
+import io
+import json
+import logging
 import os
-import uuid
+import secrets
+import shutil
+import sqlite3
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, Any, Optional, BinaryIO
+from typing import Dict, Any, List, Optional, BinaryIO
 import mimetypes
 
+try:
+    import aiofiles
+    AIOFILES_AVAILABLE = True
+except ImportError:
+    AIOFILES_AVAILABLE = False
+
+# Native asyncio S3 client (aiobotocore); falls back to boto3 on the I/O pool
+try:
+    import aioboto3
+    AIOBOTO3_AVAILABLE = True
+except ImportError:
+    AIOBOTO3_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Copy uploads to disk in bounded chunks instead of reading whole files into memory
+LOCAL_WRITE_CHUNK_SIZE = 1 << 20
+
+# Local upload metadata lives in one SQLite table instead of a .meta file per upload
+LOCAL_METADATA_DB = ".metadata.sqlite3"
+
+# S3 DeleteObjects accepts at most this many keys per request
+S3_DELETE_BATCH_SIZE = 1000
+
+# Content types for the extensions uploads actually use, resolved without mimetypes
+_COMMON_CONTENT_TYPES = {
+    ".jpg": "image/jpeg", ".jpeg": "image/jpeg", ".png": "image/png", ".gif": "image/gif",
+    ".webp": "image/webp", ".bmp": "image/bmp", ".tif": "image/tiff", ".tiff": "image/tiff",
+    ".heic": "image/heic", ".svg": "image/svg+xml", ".ico": "image/vnd.microsoft.icon",
+    ".mp4": "video/mp4", ".m4v": "video/mp4", ".mov": "video/quicktime", ".webm": "video/webm",
+    ".avi": "video/x-msvideo", ".mkv": "video/x-matroska", ".mpeg": "video/mpeg",
+    ".mpg": "video/mpeg", ".mp3": "audio/mpeg", ".wav": "audio/x-wav", ".m4a": "audio/mp4",
+    ".ogg": "audio/ogg", ".flac": "audio/flac", ".aac": "audio/aac",
+    ".json": "application/json", ".txt": "text/plain", ".csv": "text/csv",
+    ".md": "text/markdown", ".html": "text/html", ".xml": "application/xml",
+    ".pdf": "application/pdf", ".zip": "application/zip", ".gz": "application/gzip",
+    ".tar": "application/x-tar", ".srt": "text/plain", ".vtt": "text/vtt",
+    ".npy": "application/octet-stream", ".bin": "application/octet-stream",
+}
+
+
+def _disk_fileno(file_content: BinaryIO) -> Optional[int]:
+    """Return the descriptor of an on-disk upload, or None for in-memory streams."""
+    # fileno() on an in-memory SpooledTemporaryFile would force it to disk first
+    if isinstance(file_content, tempfile.SpooledTemporaryFile) and not file_content._rolled:
+        return None
+    try:
+        return file_content.fileno()
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        return None
+
+
+def _copy_file_range(src: BinaryIO, src_fd: int, dst_fd: int) -> bool:
+    """Copy src from its current position to dst in-kernel; False if unsupported."""
+    copy_file_range = getattr(os, "copy_file_range", None)  # Linux, Python 3.8+
+    if copy_file_range is None:
+        return False
+    
+    src.flush()  # make any buffered writes visible to the kernel copy
+    offset = src.tell()
+    remaining = os.fstat(src_fd).st_size - offset
+    copied = 0
+    try:
+        while remaining > 0:
+            count = copy_file_range(src_fd, dst_fd, remaining, offset + copied)
+            if count == 0:
+                break
+            copied += count
+            remaining -= count
+    except OSError:
+        if copied:
+            raise
+        return False  # e.g. EXDEV/ENOSYS on older kernels; caller copies in user space
+    
+    src.seek(offset + copied)
+    return True
+
+
+@functools.lru_cache(maxsize=4096)
+def _guess_content_type(extension: str) -> Optional[str]:
+    """Map a file extension (e.g. ".png") to its content type, memoized."""
+    extension = extension.lower()
+    content_type = _COMMON_CONTENT_TYPES.get(extension)
+    if content_type is None:
+        content_type, _ = mimetypes.guess_type(f"file{extension}")
+    return content_type
+
 class StorageClient:
     """Client for managing file uploads and storage."""
     
@@ -15,6 +112,17 @@ class StorageClient:
         self.storage_type = storage_type
         self.config = config or {}
         self.client = None
+        self._transfer_config = None
+        self._public_url_prefix = None
+        self._s3_session = None
+        self._s3_client_ctx = None
+        self._async_s3 = None
+        self._s3_init_lock = asyncio.Lock()
+        self._metadata_db = None
+        self._metadata_lock = threading.Lock()
+        # The S3/Supabase SDKs and local file I/O are blocking; run them here
+        # so concurrent uploads don't stall the event loop
+        self._io_pool = ThreadPoolExecutor(max_workers=16, thread_name_prefix="storage-io")
         self._initialize_storage()
     
     def _initialize_storage(self):
@@ -22,40 +130,133 @@ class StorageClient:
         if self.storage_type == "s3":
             try:
                 import boto3
+                from boto3.s3.transfer import TransferConfig
                 self.client = boto3.client(
                     's3',
                     aws_access_key_id=self.config.get("access_key"),
                     aws_secret_access_key=self.config.get("secret_key"),
                     region_name=self.config.get("region", "us-east-1")
                 )
-                print(f"✅ S3 storage client initialized")
+                # Files over 8 MB go up as parallel multipart parts streamed from the file object
+                self._transfer_config = TransferConfig(
+                    multipart_threshold=8 * 1024 * 1024,
+                    multipart_chunksize=8 * 1024 * 1024,
+                    max_concurrency=10,
+                    use_threads=True
+                )
+                if AIOBOTO3_AVAILABLE:
+                    # The async client is opened lazily by initialize() inside the event loop
+                    self._s3_session = aioboto3.Session(
+                        aws_access_key_id=self.config.get("access_key"),
+                        aws_secret_access_key=self.config.get("secret_key"),
+                        region_name=self.config.get("region", "us-east-1")
+                    )
+                # Public object URLs only vary by key
+                bucket = self.config.get("bucket", "sora-core")
+                region = self.config.get("region", "us-east-1")
+                self._public_url_prefix = f"https://{bucket}.s3.{region}.amazonaws.com/"
+                logger.info("S3 storage client initialized")
             except ImportError:
-                print("⚠️ boto3 not installed - falling back to local storage")
+                logger.warning("boto3 not installed - falling back to local storage")
                 self.storage_type = "local"
             except Exception as e:
-                print(f"⚠️ S3 initialization failed: {e} - falling back to local storage")
+                logger.warning("S3 initialization failed: %s - falling back to local storage", e)
                 self.storage_type = "local"
         
         elif self.storage_type == "supabase":
             try:
-                from supabase import create_client
-                self.client = create_client(
+                from .supabase_client import create_supabase_client
+                self.client = create_supabase_client(
                     self.config.get("url"),
                     self.config.get("key")
                 )
-                print(f"✅ Supabase storage client initialized")
+                # Same URL storage.from_(bucket).get_public_url() builds, computed once
+                bucket = self.config.get("bucket", "uploads")
+                base_url = self.config.get("url", "").rstrip("/")
+                self._public_url_prefix = f"{base_url}/storage/v1/object/public/{bucket}/"
+                logger.info("Supabase storage client initialized")
             except ImportError:
-                print("⚠️ Supabase client not installed - falling back to local storage")
+                logger.warning("Supabase client not installed - falling back to local storage")
                 self.storage_type = "local"
             except Exception as e:
-                print(f"⚠️ Supabase initialization failed: {e} - falling back to local storage")
+                logger.warning("Supabase initialization failed: %s - falling back to local storage", e)
                 self.storage_type = "local"
         
         # Set up local storage directory
         if self.storage_type == "local":
             self.local_dir = Path(self.config.get("upload_dir", "data/uploads"))
             self.local_dir.mkdir(parents=True, exist_ok=True)
-            print(f"✅ Local storage initialized at {self.local_dir}")
+            self._open_metadata_db()
+            logger.info("Local storage initialized at %s", self.local_dir)
+    
+    def _open_metadata_db(self):
+        """Open the local metadata table (shared by the I/O pool threads)."""
+        self._metadata_db = sqlite3.connect(
+            str(self.local_dir / LOCAL_METADATA_DB),
+            check_same_thread=False,
+            isolation_level=None  # autocommit; each upsert is its own WAL append
+        )
+        self._metadata_db.execute("PRAGMA journal_mode=WAL")
+        self._metadata_db.execute("PRAGMA synchronous=NORMAL")
+        self._metadata_db.execute(
+            "CREATE TABLE IF NOT EXISTS files (storage_path TEXT PRIMARY KEY, meta TEXT NOT NULL)"
+        )
+    
+    def _save_local_metadata(self, storage_path: str, metadata: Dict[str, Any]):
+        """Insert or replace the metadata row for a local upload."""
+        with self._metadata_lock:
+            self._metadata_db.execute(
+                "INSERT OR REPLACE INTO files (storage_path, meta) VALUES (?, ?)",
+                (storage_path, json.dumps(metadata))
+            )
+    
+    def _load_local_metadata(self, storage_path: str) -> Dict[str, Any]:
+        """Load metadata for a local upload (falls back to a legacy .meta sidecar)."""
+        with self._metadata_lock:
+            row = self._metadata_db.execute(
+                "SELECT meta FROM files WHERE storage_path = ?", (storage_path,)
+            ).fetchone()
+        if row:
+            return json.loads(row[0])
+        
+        full_path = self.local_dir / storage_path
+        metadata_path = full_path.with_suffix(full_path.suffix + ".meta")
+        if metadata_path.exists():
+            with open(metadata_path, "r") as f:
+                return json.load(f)
+        return {}
+    
+    async def initialize(self):
+        """Open the long-lived async S3 client (no-op unless S3 + aioboto3)."""
+        if self._s3_session is None or self._async_s3 is not None:
+            return
+        async with self._s3_init_lock:
+            if self._async_s3 is None:
+                self._s3_client_ctx = self._s3_session.client('s3')
+                self._async_s3 = await self._s3_client_ctx.__aenter__()
+    
+    async def close(self):
+        """Close the async S3 client and shut down the I/O pool."""
+        if self._s3_client_ctx is not None:
+            await self._s3_client_ctx.__aexit__(None, None, None)
+            self._s3_client_ctx = None
+            self._async_s3 = None
+        if self._metadata_db is not None:
+            self._metadata_db.close()
+            self._metadata_db = None
+        self._io_pool.shutdown(wait=False)
+    
+    async def _run_io(self, fn, *args, **kwargs):
+        """Run a blocking storage call on the I/O thread pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._io_pool, functools.partial(fn, *args, **kwargs))
+    
+    async def _s3_call(self, method: str, *args, **kwargs):
+        """Call an S3 client method natively async via aioboto3, else boto3 on the I/O pool."""
+        if self._s3_session is not None:
+            await self.initialize()
+            return await getattr(self._async_s3, method)(*args, **kwargs)
+        return await self._run_io(getattr(self.client, method), *args, **kwargs)
     
     async def upload_file(
         self,
@@ -78,13 +279,12 @@ class StorageClient:
         """
         try:
             # Generate unique file ID
-            file_id = str(uuid.uuid4())
-            file_extension = Path(filename).suffix
+            file_id = secrets.token_hex(16)
+            file_extension = os.path.splitext(filename)[1]
             stored_filename = f"{file_id}{file_extension}"
             
             # Determine content type
-            content_type, _ = mimetypes.guess_type(filename)
-            content_type = content_type or "application/octet-stream"
+            content_type = _guess_content_type(file_extension) or "application/octet-stream"
             
             # Build storage path
             if persona_id:
@@ -119,7 +319,7 @@ class StorageClient:
             }
             
         except Exception as e:
-            print(f"❌ Upload failed: {e}")
+            logger.error("Upload failed: %s", e)
             return {
                 "success": False,
                 "error": str(e)
@@ -142,19 +342,20 @@ class StorageClient:
                 s3_metadata[f"x-amz-meta-{key}"] = str(value)
         
         # Upload to S3
-        self.client.upload_fileobj(
+        await self._s3_call(
+            "upload_fileobj",
             file_content,
             bucket,
             storage_path,
             ExtraArgs={
                 "ContentType": content_type,
                 "Metadata": s3_metadata
-            }
+            },
+            Config=self._transfer_config
         )
         
         # Return public URL
-        region = self.config.get("region", "us-east-1")
-        return f"https://{bucket}.s3.{region}.amazonaws.com/{storage_path}"
+        return self._public_url_prefix + storage_path
     
     async def _upload_to_supabase(
         self,
@@ -165,16 +366,31 @@ class StorageClient:
         """Upload file to Supabase Storage."""
         bucket = self.config.get("bucket", "uploads")
         
+        # Buffered file handles are streamed by the Supabase client as a multipart
+        # body; other on-disk files get a buffered reader over the same descriptor,
+        # and only in-memory streams are read whole
+        if isinstance(file_content, io.BufferedReader):
+            body = file_content
+        else:
+            fd = _disk_fileno(file_content)
+            if fd is not None:
+                position = file_content.tell()
+                body = open(fd, "rb", closefd=False)
+                body.seek(position)
+            else:
+                body = file_content.read()
+        
         # Upload to Supabase
-        result = self.client.storage.from_(bucket).upload(
+        storage_bucket = self.client.storage.from_(bucket)
+        await self._run_io(
+            storage_bucket.upload,
             storage_path,
-            file_content.read(),
+            body,
             file_options={"metadata": metadata or {}}
         )
         
-        # Get public URL
-        url_result = self.client.storage.from_(bucket).get_public_url(storage_path)
-        return url_result
+        # Return public URL
+        return self._public_url_prefix + storage_path
     
     async def _upload_to_local(
         self,
@@ -183,58 +399,139 @@ class StorageClient:
         metadata: Dict[str, Any]
     ) -> str:
         """Upload file to local storage."""
-        # Create directory structure
         full_path = self.local_dir / storage_path
+        
+        if AIOFILES_AVAILABLE and _disk_fileno(file_content) is None:
+            await self._run_io(full_path.parent.mkdir, parents=True, exist_ok=True)
+            
+            # Stream the upload to disk chunk by chunk
+            async with aiofiles.open(full_path, "wb") as f:
+                while True:
+                    chunk = await self._run_io(file_content.read, LOCAL_WRITE_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    await f.write(chunk)
+            
+            # Save metadata if provided
+            if metadata:
+                await self._run_io(self._save_local_metadata, storage_path, metadata)
+        else:
+            # On-disk uploads are copied in-kernel by _write_local_file
+            await self._run_io(self._write_local_file, storage_path, file_content, metadata)
+        
+        # Return local URL
+        return f"file://{full_path.absolute()}"
+    
+    def _write_local_file(
+        self,
+        storage_path: str,
+        file_content: BinaryIO,
+        metadata: Dict[str, Any]
+    ):
+        """Write an uploaded file to disk and record its metadata."""
+        full_path = self.local_dir / storage_path
+        
+        # Create directory structure
         full_path.parent.mkdir(parents=True, exist_ok=True)
         
-        # Write file
+        # Write file; on-disk sources skip user space entirely via copy_file_range
         with open(full_path, "wb") as f:
-            f.write(file_content.read())
+            src_fd = _disk_fileno(file_content)
+            if src_fd is None or not _copy_file_range(file_content, src_fd, f.fileno()):
+                shutil.copyfileobj(file_content, f, LOCAL_WRITE_CHUNK_SIZE)
         
         # Save metadata if provided
         if metadata:
-            metadata_path = full_path.with_suffix(full_path.suffix + ".meta")
-            import json
-            with open(metadata_path, "w") as f:
-                json.dump(metadata, f)
-        
-        # Return local URL
-        return f"file://{full_path.absolute()}"
+            self._save_local_metadata(storage_path, metadata)
     
     async def delete_file(self, storage_path: str) -> bool:
         """Delete a file from storage."""
         try:
             if self.storage_type == "s3":
                 bucket = self.config.get("bucket", "sora-core")
-                self.client.delete_object(Bucket=bucket, Key=storage_path)
+                await self._s3_call("delete_object", Bucket=bucket, Key=storage_path)
             
             elif self.storage_type == "supabase":
                 bucket = self.config.get("bucket", "uploads")
-                self.client.storage.from_(bucket).remove([storage_path])
+                await self._run_io(self.client.storage.from_(bucket).remove, [storage_path])
             
             else:  # local
-                full_path = self.local_dir / storage_path
-                if full_path.exists():
-                    full_path.unlink()
-                    
-                # Remove metadata file if exists
-                metadata_path = full_path.with_suffix(full_path.suffix + ".meta")
-                if metadata_path.exists():
-                    metadata_path.unlink()
+                await self._run_io(self._delete_local_file, storage_path)
             
-            print(f"✅ Deleted file: {storage_path}")
+            logger.debug("Deleted file: %s", storage_path)
             return True
             
         except Exception as e:
-            print(f"❌ Error deleting file {storage_path}: {e}")
+            logger.error("Error deleting file %s: %s", storage_path, e)
             return False
     
+    async def delete_files(self, storage_paths: List[str]) -> bool:
+        """
+        Delete many files from storage in as few requests as possible.
+        
+        Args:
+            storage_paths: Storage paths to delete
+            
+        Returns:
+            True if every file was deleted
+        """
+        if not storage_paths:
+            return True
+        
+        try:
+            if self.storage_type == "s3":
+                bucket = self.config.get("bucket", "sora-core")
+                errors = []
+                for start in range(0, len(storage_paths), S3_DELETE_BATCH_SIZE):
+                    batch = storage_paths[start:start + S3_DELETE_BATCH_SIZE]
+                    response = await self._s3_call(
+                        "delete_objects",
+                        Bucket=bucket,
+                        Delete={"Objects": [{"Key": key} for key in batch], "Quiet": True}
+                    )
+                    errors.extend(response.get("Errors", []))
+                
+                if errors:
+                    logger.error("Failed to delete %d of %d files", len(errors), len(storage_paths))
+                    return False
+            
+            elif self.storage_type == "supabase":
+                bucket = self.config.get("bucket", "uploads")
+                await self._run_io(self.client.storage.from_(bucket).remove, list(storage_paths))
+            
+            else:  # local
+                await asyncio.gather(*(
+                    self._run_io(self._delete_local_file, storage_path)
+                    for storage_path in storage_paths
+                ))
+            
+            logger.debug("Deleted %d files", len(storage_paths))
+            return True
+            
+        except Exception as e:
+            logger.error("Error deleting %d files: %s", len(storage_paths), e)
+            return False
+    
+    def _delete_local_file(self, storage_path: str):
+        """Remove a local file and its metadata if present."""
+        full_path = self.local_dir / storage_path
+        if full_path.exists():
+            full_path.unlink()
+        
+        with self._metadata_lock:
+            self._metadata_db.execute("DELETE FROM files WHERE storage_path = ?", (storage_path,))
+            
+        # Remove legacy metadata file if exists
+        metadata_path = full_path.with_suffix(full_path.suffix + ".meta")
+        if metadata_path.exists():
+            metadata_path.unlink()
+    
     async def get_file_info(self, storage_path: str) -> Optional[Dict[str, Any]]:
         """Get information about a stored file."""
         try:
             if self.storage_type == "s3":
                 bucket = self.config.get("bucket", "sora-core")
-                response = self.client.head_object(Bucket=bucket, Key=storage_path)
+                response = await self._s3_call("head_object", Bucket=bucket, Key=storage_path)
                 
                 return {
                     "storage_path": storage_path,
@@ -246,7 +543,8 @@ class StorageClient:
             
             elif self.storage_type == "supabase":
                 bucket = self.config.get("bucket", "uploads")
-                file_list = self.client.storage.from_(bucket).list(
+                file_list = await self._run_io(
+                    self.client.storage.from_(bucket).list,
                     path=os.path.dirname(storage_path),
                     search=os.path.basename(storage_path)
                 )
@@ -262,31 +560,30 @@ class StorageClient:
                     }
             
             else:  # local
-                full_path = self.local_dir / storage_path
-                if full_path.exists():
-                    stat = full_path.stat()
-                    metadata = {}
-                    
-                    # Load metadata if available
-                    metadata_path = full_path.with_suffix(full_path.suffix + ".meta")
-                    if metadata_path.exists():
-                        import json
-                        with open(metadata_path, "r") as f:
-                            metadata = json.load(f)
-                    
-                    return {
-                        "storage_path": storage_path,
-                        "size": stat.st_size,
-                        "content_type": mimetypes.guess_type(str(full_path))[0],
-                        "last_modified": stat.st_mtime,
-                        "metadata": metadata
-                    }
+                return await self._run_io(self._read_local_file_info, storage_path)
             
             return None
             
         except Exception as e:
-            print(f"❌ Error getting file info for {storage_path}: {e}")
+            logger.error("Error getting file info for %s: %s", storage_path, e)
+            return None
+    
+    def _read_local_file_info(self, storage_path: str) -> Optional[Dict[str, Any]]:
+        """Stat a local file and load its metadata sidecar."""
+        full_path = self.local_dir / storage_path
+        if not full_path.exists():
             return None
+        
+        stat = full_path.stat()
+        metadata = self._load_local_metadata(storage_path)
+        
+        return {
+            "storage_path": storage_path,
+            "size": stat.st_size,
+            "content_type": _guess_content_type(full_path.suffix),
+            "last_modified": stat.st_mtime,
+            "metadata": metadata
+        }
     
     def get_status(self) -> Dict[str, Any]:
         """Get storage client status."""
@@ -1,9 +1,80 @@
 """
 Vector store operations for managing embeddings and similarity search.
-Clean extraction supporting ChromaDB and Supabase Vector extensions.
+Clean extraction supporting ChromaDB, Supabase Vector extensions, and an in-process FAISS index.
 """
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Union, Callable, Tuple
+import asyncio
+import atexit
+import csv
+import io
+import json
+import logging
+import threading
 import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Embeddings travel as contiguous float32 arrays when numpy is available (optional)
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+    Vector = Union[List[float], "np.ndarray"]
+except ImportError:
+    NUMPY_AVAILABLE = False
+    Vector = List[float]
+
+logger = logging.getLogger(__name__)
+
+# PersistentClient loads the HNSW index from disk, so share one client/collection
+# per database path across every VectorStore in the process
+_CHROMA_CLIENTS: Dict[str, Any] = {}
+_CHROMA_COLLECTIONS: Dict[str, Any] = {}
+_CHROMA_LOCK = threading.Lock()
+
+# Connections in the direct Postgres pool; getconn() fails rather than waits when
+# they are all checked out, so pooled work runs on this many threads at most
+PG_POOL_SIZE = 8
+
+# Single store_embedding calls are coalesced into one collection.add per window
+EMBEDDING_FLUSH_INTERVAL = 0.05  # seconds
+EMBEDDING_FLUSH_MAX_BATCH = 256
+
+# Server-side similarity search called by search_similar over PostgREST RPC. The
+# migration is the source of truth, so deployments without db_url can apply it by hand.
+MATCH_EMBEDDINGS_SQL = (Path(__file__).parent / "migrations" / "001_match_embeddings.sql").read_text()
+
+# Retention deletes (delete_older_than) are range scans on this expression index
+TIMESTAMP_INDEX_SQL = """
+CREATE INDEX IF NOT EXISTS embeddings_timestamp_ns_idx
+    ON embeddings (((metadata->>'timestamp_ns')::bigint));
+"""
+
+
+def _as_vector(embedding: Vector) -> Vector:
+    """Coerce an embedding to a contiguous float32 array (once, at the API boundary)."""
+    if NUMPY_AVAILABLE:
+        return np.ascontiguousarray(embedding, dtype=np.float32)
+    return embedding
+
+
+def _as_matrix(embeddings: List[Vector]) -> Vector:
+    """Stack a batch of embeddings into one (N, D) float32 array."""
+    if NUMPY_AVAILABLE:
+        return np.ascontiguousarray(embeddings, dtype=np.float32)
+    return embeddings
+
+
+def _to_chroma(embeddings: List[Vector]) -> List[List[float]]:
+    """Convert a batch of embeddings to nested lists; chromadb 0.4.x rejects numpy arrays."""
+    if hasattr(embeddings, "tolist"):
+        return embeddings.tolist()  # (N, D) matrix in one call
+    return [embedding.tolist() if hasattr(embedding, "tolist") else list(embedding) for embedding in embeddings]
+
+
+def _to_pgvector(embedding: Vector) -> str:
+    """Format an embedding as a pgvector text literal, e.g. "[0.1,0.2]"."""
+    return "[" + ",".join(f"{x:.6g}" for x in embedding) + "]"
+
 
 class VectorStore:
     """Vector database client for storing and querying embeddings."""
@@ -13,6 +84,11 @@ class VectorStore:
         self.connection_params = connection_params or {}
         self.client = None
         self.collection = None
+        self._pending_embeddings = None
+        self._flusher_task = None
+        self._supports_upsert = False
+        self._pg_pool = None
+        self._pg_executor: Optional[ThreadPoolExecutor] = None
         self._initialize_client()
     
     def _initialize_client(self):
@@ -20,40 +96,130 @@ class VectorStore:
         if self.store_type == "chroma":
             try:
                 import chromadb
-                from pathlib import Path
                 
                 # Use persistent storage so embeddings survive restarts
                 db_path = Path(__file__).parent.parent / "personas" / "chroma_db"
                 db_path.mkdir(parents=True, exist_ok=True)
                 
-                self.client = chromadb.PersistentClient(path=str(db_path))
-                self.collection = self.client.get_or_create_collection("personas")
-                print(f"✅ ChromaDB client initialized (persistent: {db_path})")
+                with _CHROMA_LOCK:
+                    key = str(db_path)
+                    if key not in _CHROMA_CLIENTS:
+                        client = chromadb.PersistentClient(path=key)
+                        collection = client.get_or_create_collection("personas")
+                        # Warm the collection at startup instead of on the first request
+                        collection.count()
+                        _CHROMA_CLIENTS[key] = client
+                        _CHROMA_COLLECTIONS[key] = collection
+                    self.client = _CHROMA_CLIENTS[key]
+                    self.collection = _CHROMA_COLLECTIONS[key]
+                # upsert arrived in ChromaDB 0.4; older collections need delete + add
+                self._supports_upsert = hasattr(self.collection, "upsert")
+                logger.info("ChromaDB client initialized (persistent: %s)", db_path)
             except ImportError:
-                print("⚠️ ChromaDB not installed - using mock mode")
+                logger.warning("ChromaDB not installed - using mock mode")
                 self.client = None
         elif self.store_type == "supabase":
             try:
-                from supabase import create_client
+                from .supabase_client import create_supabase_client
                 if "url" in self.connection_params and "key" in self.connection_params:
-                    self.client = create_client(
+                    self.client = create_supabase_client(
                         self.connection_params["url"],
                         self.connection_params["key"]
                     )
-                    print(f"✅ Supabase client initialized")
+                    logger.info("Supabase client initialized")
+                    
+                    # A direct Postgres connection (if given) installs the RPC, which
+                    # PostgREST can't do, and bulk-loads embeddings with COPY
+                    if self.connection_params.get("db_url"):
+                        self._open_pg_pool(self.connection_params["db_url"])
+                        self._ensure_match_function()
                 else:
-                    print("⚠️ Supabase credentials missing - using mock mode")
+                    logger.warning("Supabase credentials missing - using mock mode")
                     self.client = None
             except ImportError:
-                print("⚠️ Supabase client not installed - using mock mode")
+                logger.warning("Supabase client not installed - using mock mode")
                 self.client = None
+        elif self.store_type == "faiss":
+            try:
+                from .faiss_index import FaissIndex
+                
+                index_dir = Path(
+                    self.connection_params.get("path")
+                    or Path(__file__).parent.parent / "personas" / "faiss_index"
+                )
+                
+                # In-process index: one Python<->native call per query, no SQLite reads
+                self.collection = FaissIndex(
+                    index_dir,
+                    quantize=self.connection_params.get("quantize", False),
+                    quantize_range=self.connection_params.get("quantize_range", 1.0),
+                    hnsw_m=self.connection_params.get("hnsw_m", 0)
+                )
+                self.client = self.collection
+                atexit.register(self.collection.persist)
+                logger.info("FAISS index initialized (%d embeddings, persistent: %s)", self.collection.size, index_dir)
+            except ImportError:
+                logger.warning("FAISS not installed - using mock mode")
+                self.client = None
+        
+        logger.info("Vector store initialized: %s", self.store_type)
+    
+    def _open_pg_pool(self, db_url: str):
+        """Open a small psycopg2 pool directly against the Supabase database."""
+        try:
+            from psycopg2.pool import ThreadedConnectionPool
+            self._pg_pool = ThreadedConnectionPool(1, PG_POOL_SIZE, db_url)
+            self._pg_executor = ThreadPoolExecutor(max_workers=PG_POOL_SIZE, thread_name_prefix="vector-pg")
+            logger.info("Direct Postgres pool established for embeddings")
+        except Exception as e:
+            logger.warning("Direct Postgres connection unavailable - using REST only: %s", e)
+            self._pg_pool = None
+    
+    def _with_pg_conn(self, fn: Callable[[Any], Any]) -> Any:
+        """Run fn(cursor) on a pooled connection, committing on success."""
+        connection = self._pg_pool.getconn()
+        try:
+            with connection.cursor() as cursor:
+                result = fn(cursor)
+            connection.commit()
+            return result
+        except Exception:
+            connection.rollback()
+            raise
+        finally:
+            self._pg_pool.putconn(connection)
+    
+    async def _run_pg(self, fn: Callable[..., Any], *args) -> Any:
+        """Run a blocking pooled-connection call on a pool-sized worker thread (extra calls queue)."""
+        return await asyncio.get_running_loop().run_in_executor(self._pg_executor, fn, *args)
+    
+    def _ensure_match_function(self):
+        """Create or replace the match_embeddings RPC (and the timestamp index) in the Supabase database."""
+        if not self._pg_pool:
+            return
+        try:
+            self._with_pg_conn(lambda cursor: cursor.execute(MATCH_EMBEDDINGS_SQL + TIMESTAMP_INDEX_SQL))
+            logger.info("match_embeddings function installed")
+        except Exception as e:
+            logger.warning("Could not install match_embeddings function: %s", e)
+    
+    def _copy_embeddings(self, ids: List[str], embeddings: Vector, metadatas: List[Dict[str, Any]]):
+        """Bulk-load rows with COPY; embeddings go as pgvector text, not JSON arrays."""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for id, embedding, metadata in zip(ids, embeddings, metadatas):
+            writer.writerow([id, _to_pgvector(embedding), json.dumps(metadata)])
+        buffer.seek(0)
         
-        print(f"Vector store initialized: {self.store_type}")
+        self._with_pg_conn(lambda cursor: cursor.copy_expert(
+            "COPY embeddings (id, embedding, metadata) FROM STDIN WITH (FORMAT CSV)",
+            buffer
+        ))
     
     async def store_embedding(
         self,
         id: str,
-        embedding: List[float],
+        embedding: Vector,
         metadata: Dict[str, Any]
     ) -> bool:
         """
@@ -61,42 +227,155 @@ class VectorStore:
         
         Args:
             id: Unique identifier for the embedding
-            embedding: Vector embedding as list of floats
+            embedding: Vector embedding as list of floats or numpy array
             metadata: Associated metadata dictionary
             
         Returns:
             True if successful
         """
+        embedding = _as_vector(embedding)
+        
+        if self.store_type in ("chroma", "faiss") and self.client:
+            # Each collection.add is its own index update (+ SQLite commit for
+            # Chroma), so concurrent callers share one batched add
+            return await self._enqueue_embedding(id, embedding, metadata)
+        
+        if self.store_type == "supabase" and self._pg_pool:
+            return await self.store_embeddings_batch([id], [embedding], [metadata])
+        
         try:
-            if self.store_type == "chroma" and self.client:
-                self.collection.add(
-                    embeddings=[embedding],
-                    metadatas=[metadata],
-                    ids=[id]
-                )
-            elif self.store_type == "supabase" and self.client:
+            if self.store_type == "supabase" and self.client:
                 # Insert into vector table using pgvector
                 result = self.client.table("embeddings").insert({
                     "id": id,
-                    "embedding": embedding,
+                    "embedding": _to_pgvector(embedding),
                     "metadata": metadata
                 }).execute()
             else:
                 # Mock storage
-                print(f"Mock: Stored embedding {id} with {len(embedding)} dimensions")
+                logger.debug("Mock: Stored embedding %s with %d dimensions", id, len(embedding))
             
-            print(f"✅ Stored embedding {id} with {len(embedding)} dimensions")
+            logger.debug("Stored embedding %s with %d dimensions", id, len(embedding))
             return True
             
         except Exception as e:
-            print(f"❌ Error storing embedding {id}: {e}")
+            logger.error("Error storing embedding %s: %s", id, e)
             return False
     
+    async def store_embeddings_batch(
+        self,
+        ids: List[str],
+        embeddings: Union[List[Vector], Vector],
+        metadatas: List[Dict[str, Any]]
+    ) -> bool:
+        """
+        Store many embeddings in a single write.
+        
+        Args:
+            ids: Unique identifiers, one per embedding
+            embeddings: Vector embeddings, or an (N, D) numpy array
+            metadatas: Metadata dictionaries, one per embedding
+            
+        Returns:
+            True if successful
+        """
+        if not ids:
+            return True
+        
+        try:
+            embeddings = _as_matrix(embeddings)
+        except (TypeError, ValueError) as e:
+            # Ragged batches (embeddings of different dimensions) cannot be stacked
+            logger.error("Cannot store %d embeddings with mismatched dimensions: %s", len(ids), e)
+            return False
+        
+        try:
+            if self.store_type == "chroma" and self.client:
+                self.collection.add(
+                    embeddings=_to_chroma(embeddings),
+                    metadatas=metadatas,
+                    ids=ids
+                )
+            elif self.store_type == "faiss" and self.client:
+                self.collection.add(ids, embeddings, metadatas)
+            elif self.store_type == "supabase" and self._pg_pool:
+                await self._run_pg(self._copy_embeddings, ids, embeddings, metadatas)
+            elif self.store_type == "supabase" and self.client:
+                # One PostgREST request / INSERT for the whole batch
+                rows = [
+                    {"id": id, "embedding": _to_pgvector(embedding), "metadata": metadata}
+                    for id, embedding, metadata in zip(ids, embeddings, metadatas)
+                ]
+                self.client.table("embeddings").insert(rows).execute()
+            else:
+                # Mock storage
+                logger.debug("Mock: Stored %d embeddings", len(ids))
+            
+            logger.debug("Stored %d embeddings", len(ids))
+            return True
+            
+        except Exception as e:
+            logger.error("Error storing %d embeddings: %s", len(ids), e)
+            return False
+    
+    async def _enqueue_embedding(
+        self,
+        id: str,
+        embedding: Vector,
+        metadata: Dict[str, Any]
+    ) -> bool:
+        """Queue one embedding for the background flusher and wait for its batch."""
+        if self._flusher_task is None or self._flusher_task.done():
+            self._pending_embeddings = asyncio.Queue()
+            self._flusher_task = asyncio.create_task(self._flush_embeddings())
+        
+        future = asyncio.get_running_loop().create_future()
+        await self._pending_embeddings.put((id, embedding, metadata, future))
+        return await future
+    
+    async def _flush_embeddings(self):
+        """Drain queued embeddings, writing up to EMBEDDING_FLUSH_MAX_BATCH per add."""
+        queue = self._pending_embeddings
+        loop = asyncio.get_running_loop()
+        
+        while True:
+            batch = [await queue.get()]
+            deadline = loop.time() + EMBEDDING_FLUSH_INTERVAL
+            
+            while len(batch) < EMBEDDING_FLUSH_MAX_BATCH:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            
+            # One malformed embedding must not fail (or stack into) the others' write,
+            # so each embedding dimension is written as its own batch
+            groups: Dict[Any, List[Tuple]] = {}
+            for item in batch:
+                shape = np.shape(item[1]) if NUMPY_AVAILABLE else len(item[1])
+                groups.setdefault(shape, []).append(item)
+            
+            for group in groups.values():
+                ids, embeddings, metadatas, futures = zip(*group)
+                try:
+                    stored = await self.store_embeddings_batch(list(ids), list(embeddings), list(metadatas))
+                except Exception as e:
+                    # Keep the flusher alive; its callers would otherwise wait forever
+                    logger.error("Error flushing %d queued embeddings: %s", len(ids), e)
+                    stored = False
+                for future in futures:
+                    if not future.done():
+                        future.set_result(stored)
+    
     async def search_similar(
         self,
-        query_embedding: List[float],
+        query_embedding: Vector,
         limit: int = 10,
-        metadata_filter: Dict[str, Any] = None
+        metadata_filter: Dict[str, Any] = None,
+        include_embeddings: bool = False
     ) -> List[Dict[str, Any]]:
         """
         Search for similar embeddings.
@@ -105,35 +384,51 @@ class VectorStore:
             query_embedding: Query vector to search for
             limit: Maximum number of results
             metadata_filter: Optional metadata filtering
+            include_embeddings: Also return each match's vector (otherwise "embedding" is [])
             
         Returns:
             List of similar embeddings with metadata and distances
         """
+        query_embedding = _as_vector(query_embedding)
+        
         try:
             if self.store_type == "chroma" and self.client:
+                # Only materialize vectors in Python when the caller asks for them
+                include = ["metadatas", "distances"]
+                if include_embeddings:
+                    include.append("embeddings")
                 results = self.collection.query(
-                    query_embeddings=[query_embedding],
+                    query_embeddings=_to_chroma([query_embedding]),
                     n_results=limit,
-                    where=metadata_filter
+                    where=metadata_filter,
+                    include=include
                 )
                 return self._format_chroma_results(results)
                 
+            elif self.store_type == "faiss" and self.client:
+                return self.collection.search(query_embedding, limit, metadata_filter, include_embeddings)
+                
             elif self.store_type == "supabase" and self.client:
                 # Use Supabase RPC for vector similarity search
-                results = self.client.rpc("match_embeddings", {
-                    "query_embedding": query_embedding,
+                params = {
+                    "query_embedding": _to_pgvector(query_embedding),
                     "match_threshold": 0.7,
                     "match_count": limit,
                     "filter": metadata_filter
-                }).execute()
-                return self._format_supabase_results(results.data)
+                }
+                # Only the 5-argument function (migrations/001_match_embeddings.sql) takes
+                # this flag; leaving it out keeps older 4-argument installs working
+                if include_embeddings:
+                    params["include_embedding"] = True
+                results = self.client.rpc("match_embeddings", params).execute()
+                return self._format_supabase_results(results.data, include_embeddings)
             
             else:
                 # Mock search results
                 return self._generate_mock_results(query_embedding, limit)
             
         except Exception as e:
-            print(f"❌ Error searching embeddings: {e}")
+            logger.error("Error searching embeddings: %s", e)
             return []
     
     def _format_chroma_results(self, results: Dict[str, Any]) -> List[Dict[str, Any]]:
@@ -147,32 +442,43 @@ class VectorStore:
             if "ids" not in results or not results["ids"]:
                 return []
             
-            # ChromaDB returns lists of lists
-            ids = results["ids"][0] if results["ids"] else []
-            metadatas_raw = results.get("metadatas") or [[]]
-            distances_raw = results.get("distances") or [[]]
-            embeddings_raw = results.get("embeddings") or [[]]
+            # ChromaDB returns lists of lists (one inner list per query)
+            ids = results["ids"][0]
+            count = len(ids)
+            distances = self._padded(self._first_query(results, "distances"), count, 0.0)
+            metadatas = self._padded(self._first_query(results, "metadatas"), count, {})
+            embeddings = self._padded(self._first_query(results, "embeddings"), count, [])
             
-            metadatas = metadatas_raw[0] if metadatas_raw else []
-            distances = distances_raw[0] if distances_raw else []
-            embeddings = embeddings_raw[0] if embeddings_raw else []
-            
-            for i, id in enumerate(ids):
-                formatted.append({
-                    "id": id,
-                    "distance": distances[i] if i < len(distances) else 0.0,
-                    "metadata": metadatas[i] if i < len(metadatas) else {},
-                    "embedding": embeddings[i] if i < len(embeddings) else []
-                })
+            formatted = [
+                {"id": id, "distance": distance, "metadata": metadata, "embedding": embedding}
+                for id, distance, metadata, embedding in zip(ids, distances, metadatas, embeddings)
+            ]
         except Exception as e:
-            print(f"❌ Error formatting ChromaDB results: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Error formatting ChromaDB results: %s", e)
         
         return formatted
     
-    def _format_supabase_results(self, results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Format Supabase results."""
+    @staticmethod
+    def _first_query(results: Dict[str, Any], key: str) -> List[Any]:
+        """Return the first query's column from a ChromaDB result, or [] if absent."""
+        column = results.get(key)
+        if column is None or len(column) == 0:
+            return []
+        return column[0] if column[0] is not None else []
+    
+    @staticmethod
+    def _padded(values: List[Any], count: int, default: Any) -> List[Any]:
+        """Pad a result column to count entries (only when ChromaDB omitted some)."""
+        if len(values) >= count:
+            return values
+        return list(values) + [default] * (count - len(values))
+    
+    def _format_supabase_results(
+        self,
+        results: List[Dict[str, Any]],
+        include_embeddings: bool = False
+    ) -> List[Dict[str, Any]]:
+        """Format Supabase results (older RPC installs return vectors even when not asked)."""
         formatted = []
         
         for result in results:
@@ -180,7 +486,7 @@ class VectorStore:
                 "id": result.get("id"),
                 "distance": result.get("similarity", 0.0),
                 "metadata": result.get("metadata", {}),
-                "embedding": result.get("embedding", [])
+                "embedding": (result.get("embedding") or []) if include_embeddings else []
             })
         
         return formatted
@@ -208,76 +514,199 @@ class VectorStore:
         try:
             if self.store_type == "chroma" and self.client:
                 self.collection.delete(ids=[id])
+            elif self.store_type == "faiss" and self.client:
+                self.collection.remove([id])
             elif self.store_type == "supabase" and self.client:
                 self.client.table("embeddings").delete().eq("id", id).execute()
             else:
-                print(f"Mock: Deleted embedding {id}")
+                logger.debug("Mock: Deleted embedding %s", id)
             
-            print(f"✅ Deleted embedding {id}")
+            logger.debug("Deleted embedding %s", id)
             return True
             
         except Exception as e:
-            print(f"❌ Error deleting embedding {id}: {e}")
+            logger.error("Error deleting embedding %s: %s", id, e)
             return False
     
+    async def delete_older_than(
+        self,
+        cutoff_ns: int,
+        metadata_filter: Dict[str, Any] = None,
+        timestamp_key: str = "timestamp_ns"
+    ) -> int:
+        """
+        Delete embeddings whose integer timestamp metadata is below a cutoff.
+        
+        Args:
+            cutoff_ns: Exclusive upper bound, in nanoseconds since the epoch
+            metadata_filter: Optional equality filter on other metadata
+            timestamp_key: Metadata key holding the timestamp
+            
+        Returns:
+            Number of embeddings deleted
+        """
+        try:
+            if self.store_type == "chroma" and self.client:
+                clauses = [{timestamp_key: {"$lt": cutoff_ns}}]
+                clauses += [{key: value} for key, value in (metadata_filter or {}).items()]
+                where = clauses[0] if len(clauses) == 1 else {"$and": clauses}
+                ids = self.collection.get(where=where, include=[])["ids"]
+                if ids:
+                    self.collection.delete(ids=ids)
+                deleted = len(ids)
+            elif self.store_type == "faiss" and self.client:
+                deleted = self.collection.remove_where(
+                    lambda metadata: isinstance(metadata.get(timestamp_key), int)
+                    and metadata[timestamp_key] < cutoff_ns
+                    and all(metadata.get(key) == value for key, value in (metadata_filter or {}).items())
+                )
+            elif self.store_type == "supabase" and self._pg_pool:
+                sql = (
+                    f"DELETE FROM embeddings WHERE (metadata->>%s)::bigint < %s"
+                    f"{' AND metadata @> %s::jsonb' if metadata_filter else ''}"
+                )
+                params = (timestamp_key, cutoff_ns) + ((json.dumps(metadata_filter),) if metadata_filter else ())
+                
+                def delete(cursor):
+                    cursor.execute(sql, params)
+                    return cursor.rowcount
+                
+                deleted = await self._run_pg(self._with_pg_conn, delete)
+            elif self.store_type == "supabase" and self.client:
+                # PostgREST compares ->> as text, which orders correctly for the
+                # fixed-width (19-digit) nanosecond timestamps
+                query = self.client.table("embeddings").delete().lt(f"metadata->>{timestamp_key}", str(cutoff_ns))
+                for key, value in (metadata_filter or {}).items():
+                    query = query.eq(f"metadata->>{key}", value)
+                deleted = len(query.execute().data or [])
+            else:
+                logger.debug("Mock: Deleted embeddings older than %d", cutoff_ns)
+                deleted = 0
+            
+            logger.debug("Deleted %d embeddings older than %d", deleted, cutoff_ns)
+            return deleted
+            
+        except Exception as e:
+            logger.error("Error deleting embeddings older than %d: %s", cutoff_ns, e)
+            return 0
+    
     async def update_embedding(
         self,
         id: str,
-        embedding: List[float] = None,
+        embedding: Optional[Vector] = None,
         metadata: Dict[str, Any] = None
     ) -> bool:
         """Update an existing embedding."""
+        if embedding is not None:
+            embedding = _as_vector(embedding)
+        
         try:
             if self.store_type == "chroma" and self.client:
-                # ChromaDB doesn't support updates, need to delete and re-add
-                if embedding and metadata:
-                    self.collection.delete(ids=[id])
-                    self.collection.add(
-                        embeddings=[embedding],
-                        metadatas=[metadata],
-                        ids=[id]
-                    )
+                if embedding is not None and metadata:
+                    if self._supports_upsert:
+                        # Replace the record in place rather than delete + re-add
+                        self.collection.upsert(
+                            embeddings=_to_chroma([embedding]),
+                            metadatas=[metadata],
+                            ids=[id]
+                        )
+                    else:
+                        self.collection.delete(ids=[id])
+                        self.collection.add(
+                            embeddings=_to_chroma([embedding]),
+                            metadatas=[metadata],
+                            ids=[id]
+                        )
+                elif embedding is not None:
+                    self.collection.update(ids=[id], embeddings=_to_chroma([embedding]))
+                elif metadata:
+                    self.collection.update(ids=[id], metadatas=[metadata])
+            elif self.store_type == "faiss" and self.client:
+                if embedding is not None:
+                    record = self.collection.get(id)
+                    current = record["metadata"] if record else {}
+                    self.collection.add([id], _as_matrix([embedding]), [metadata or current])
+                elif metadata:
+                    self.collection.update_metadata(id, metadata)
+            elif self.store_type == "supabase" and self.client and embedding is not None and metadata:
+                # Full replacement: a single upsert keyed on id
+                self.client.table("embeddings").upsert(
+                    [{"id": id, "embedding": _to_pgvector(embedding), "metadata": metadata}],
+                    on_conflict="id"
+                ).execute()
             elif self.store_type == "supabase" and self.client:
                 update_data = {}
-                if embedding:
-                    update_data["embedding"] = embedding
+                if embedding is not None:
+                    update_data["embedding"] = _to_pgvector(embedding)
                 if metadata:
                     update_data["metadata"] = metadata
                 
                 self.client.table("embeddings").update(update_data).eq("id", id).execute()
             else:
-                print(f"Mock: Updated embedding {id}")
+                logger.debug("Mock: Updated embedding %s", id)
             
-            print(f"✅ Updated embedding {id}")
+            logger.debug("Updated embedding %s", id)
             return True
             
         except Exception as e:
-            print(f"❌ Error updating embedding {id}: {e}")
+            logger.error("Error updating embedding %s: %s", id, e)
             return False
     
     async def list_embeddings(
         self,
         limit: int = 100,
         offset: int = 0,
-        metadata_filter: Dict[str, Any] = None
+        metadata_filter: Dict[str, Any] = None,
+        newest_first: bool = False
     ) -> List[Dict[str, Any]]:
-        """List embeddings with optional filtering."""
+        """
+        List embeddings with optional filtering.
+        
+        With newest_first=True, pages are ordered by metadata timestamp_ns, newest
+        first (records without one come last); otherwise the backend's own order.
+        """
         try:
-            if self.store_type == "chroma" and self.client:
-                # ChromaDB doesn't have direct pagination
+            if self.store_type == "chroma" and self.client and newest_first:
+                # Chroma cannot sort, so order the matching IDs by their metadata and
+                # fetch vectors for the requested page only
+                candidates = self.collection.get(where=metadata_filter, include=["metadatas"])
+                ordered = sorted(
+                    zip(candidates["ids"], candidates["metadatas"] or [{}] * len(candidates["ids"])),
+                    key=lambda item: (item[1] or {}).get("timestamp_ns") or 0,
+                    reverse=True
+                )
+                page_ids = [id for id, _ in ordered[offset:offset + limit]]
+                if not page_ids:
+                    return []
+                page = self._format_chroma_get_results(
+                    self.collection.get(ids=page_ids, include=["metadatas", "embeddings"])
+                )
+                by_id = {memory["id"]: memory for memory in page}
+                return [by_id[id] for id in page_ids if id in by_id]
+            
+            elif self.store_type == "chroma" and self.client:
+                # ChromaDB doesn't have direct pagination; get() leaves out the
+                # vectors unless they are asked for
                 results = self.collection.get(
                     where=metadata_filter,
                     limit=limit,
-                    offset=offset
+                    offset=offset,
+                    include=["metadatas", "embeddings"]
                 )
                 return self._format_chroma_get_results(results)
                 
+            elif self.store_type == "faiss" and self.client:
+                return self.collection.list(limit, offset, metadata_filter, newest_first)
+                
             elif self.store_type == "supabase" and self.client:
                 query = self.client.table("embeddings").select("*")
                 
                 if metadata_filter:
                     for key, value in metadata_filter.items():
                         query = query.eq(f"metadata->>{key}", value)
+                if newest_first:
+                    # Text order matches numeric order for the fixed-width (19-digit) timestamps
+                    query = query.order("metadata->>timestamp_ns", desc=True)
                 
                 results = query.range(offset, offset + limit - 1).execute()
                 return results.data
@@ -287,19 +716,65 @@ class VectorStore:
                 return self._generate_mock_results([0.0] * 384, min(limit, 5))
             
         except Exception as e:
-            print(f"❌ Error listing embeddings: {e}")
+            logger.error("Error listing embeddings: %s", e)
             return []
     
+    async def get_persona_embeddings(self, persona_id: str, limit: int = 1000) -> Tuple[List[str], Vector]:
+        """
+        Fetch a persona's stored embeddings as one matrix.
+        
+        Args:
+            persona_id: Persona whose embeddings (metadata persona_id) to fetch
+            limit: Maximum number of embeddings
+            
+        Returns:
+            (ids, embeddings) where embeddings is an (N, D) float32 array
+            (a list of lists without numpy); ([], []) if none are stored
+        """
+        metadata_filter = {"persona_id": persona_id}
+        try:
+            if self.store_type == "chroma" and self.client:
+                results = self.collection.get(where=metadata_filter, limit=limit, include=["embeddings"])
+                ids, rows = results["ids"], results["embeddings"]
+                
+            elif self.store_type == "faiss" and self.client:
+                ids, matrix = self.collection.get_embeddings(limit, metadata_filter)
+                return (ids, matrix) if ids else ([], [])
+                
+            elif self.store_type == "supabase" and self.client:
+                results = self.client.table("embeddings").select("id,embedding") \
+                    .eq("metadata->>persona_id", persona_id).limit(limit).execute()
+                ids = [row["id"] for row in results.data]
+                # PostgREST returns pgvector columns as "[0.1,0.2]" text
+                rows = [
+                    json.loads(row["embedding"]) if isinstance(row["embedding"], str) else row["embedding"]
+                    for row in results.data
+                ]
+            
+            else:
+                return [], []
+            
+        except Exception as e:
+            logger.error("Error fetching embeddings for persona %s: %s", persona_id, e)
+            return [], []
+        
+        if not len(ids):
+            return [], []
+        return list(ids), _as_matrix(rows)
+    
     def _format_chroma_get_results(self, results: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Format ChromaDB get results."""
         formatted = []
         
         if results and "ids" in results:
+            # Fields that were not included come back as None rather than missing
+            metadatas = results.get("metadatas")
+            embeddings = results.get("embeddings")
             for i, id in enumerate(results["ids"]):
                 formatted.append({
                     "id": id,
-                    "metadata": results["metadatas"][i] if "metadatas" in results else {},
-                    "embedding": results["embeddings"][i] if "embeddings" in results else []
+                    "metadata": (metadatas[i] if metadatas is not None else None) or {},
+                    "embedding": embeddings[i] if embeddings is not None else []
                 })
         
         return formatted
@@ -309,5 +784,10 @@ class VectorStore:
         return {
             "store_type": self.store_type,
             "client_available": self.client is not None,
-            "collection_name": "personas" if self.store_type == "chroma" else "embeddings"
-        }
\ No newline at end of file
+            "collection_name": "personas" if self.store_type in ("chroma", "faiss") else "embeddings"
+        }
+    
+    def persist(self):
+        """Flush the FAISS index to disk (no-op for other backends, which persist on write)."""
+        if self.store_type == "faiss" and self.client:
+            self.collection.persist()
\ No newline at end of file
@@ -0,0 +1,49 @@
+"""
+Numeric kernels for story-arc analysis.
+Compiled with Numba when it is installed, with equivalent NumPy fallbacks.
+"""
+import numpy as np
+
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+
+if NUMBA_AVAILABLE:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _consecutive_cosine(vecs):
+        n, d = vecs.shape
+        out = np.empty(max(n - 1, 0), np.float32)
+        for i in prange(n - 1):
+            dot = 0.0
+            norm_a = 0.0
+            norm_b = 0.0
+            for k in range(d):
+                dot += vecs[i, k] * vecs[i + 1, k]
+                norm_a += vecs[i, k] * vecs[i, k]
+                norm_b += vecs[i + 1, k] * vecs[i + 1, k]
+            out[i] = dot / (np.sqrt(norm_a) * np.sqrt(norm_b) + 1e-9)
+        return out
+else:
+    def _consecutive_cosine(vecs):
+        dots = np.einsum("ij,ij->i", vecs[:-1], vecs[1:])
+        norms = np.linalg.norm(vecs, axis=1)
+        return (dots / (norms[:-1] * norms[1:] + 1e-9)).astype(np.float32)
+
+
+def consecutive_cosine(embeddings) -> np.ndarray:
+    """
+    Cosine similarity between each embedding and the next one.
+    
+    Args:
+        embeddings: (N, D) embeddings in story order
+    
+    Returns:
+        (N - 1,) float32 similarities
+    """
+    vecs = np.ascontiguousarray(embeddings, dtype=np.float32)
+    if vecs.ndim != 2 or len(vecs) < 2:
+        return np.empty(0, np.float32)
+    return _consecutive_cosine(vecs)
@@ -0,0 +1,143 @@
+"""
+Shared sentence embedder for the storytelling module.
+The MiniLM model is loaded once per process and reused by every caller, and
+encoded texts are kept in a SQLite cache so restarts do not re-encode them.
+"""
+import hashlib
+import importlib.util
+import logging
+import os
+import sqlite3
+import threading
+from functools import lru_cache
+from typing import Optional
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+EMBEDDING_CACHE_PATH = os.getenv("CINEGEN_EMBEDDING_CACHE", "embedding_cache.sqlite3")
+
+
+class EmbeddingDiskCache:
+    """
+    Persistent text -> embedding cache backed by SQLite.
+    
+    Rows are keyed by SHA-256 of the model name and text, so switching models
+    never returns stale vectors. Each vector is stored as symmetric int8 codes
+    plus one float scale (max |v| / 127): 384 bytes per MiniLM embedding instead
+    of 1536, with a per-component error below 0.5% of the largest component.
+    One connection is shared by the worker threads that run encodes.
+    """
+    
+    def __init__(self, path: str = EMBEDDING_CACHE_PATH, model_name: str = EMBEDDING_MODEL):
+        self.model_name = model_name
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings_q8 "
+            "(hash BLOB PRIMARY KEY, scale REAL NOT NULL, vec BLOB NOT NULL)"
+        )
+        self._conn.commit()
+    
+    def _key(self, text: str) -> bytes:
+        return hashlib.sha256(f"{self.model_name}\0{text}".encode("utf-8")).digest()
+    
+    def get(self, text: str) -> Optional["np.ndarray"]:
+        """Return the cached embedding of text, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT scale, vec FROM embeddings_q8 WHERE hash = ?", (self._key(text),)
+            ).fetchone()
+        if row is None:
+            return None
+        scale, codes = row
+        return np.frombuffer(codes, dtype=np.int8).astype(np.float32) * np.float32(scale)
+    
+    def set(self, text: str, vector: "np.ndarray"):
+        """Store the embedding of text (an existing row is kept)."""
+        vector = np.asarray(vector, dtype=np.float32)
+        scale = float(np.abs(vector).max()) / 127 or 1.0
+        codes = np.round(vector / scale).astype(np.int8)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO embeddings_q8 (hash, scale, vec) VALUES (?, ?, ?)",
+                (self._key(text), scale, codes.tobytes())
+            )
+            self._conn.commit()
+
+
+@lru_cache(maxsize=1)
+def get_embedder():
+    """Load the sentence embedding model on first use (None if not installed)."""
+    try:
+        from sentence_transformers import SentenceTransformer
+    except ImportError:
+        return None
+    return SentenceTransformer(EMBEDDING_MODEL)
+
+
+@lru_cache(maxsize=1)
+def get_disk_cache() -> Optional[EmbeddingDiskCache]:
+    """Open the persistent embedding cache on first use (None if it cannot be opened)."""
+    # Without an embedder there is nothing to cache
+    if not NUMPY_AVAILABLE or importlib.util.find_spec("sentence_transformers") is None:
+        return None
+    try:
+        return EmbeddingDiskCache()
+    except sqlite3.Error as e:
+        logger.warning("Embedding cache unavailable (%s): %s", EMBEDDING_CACHE_PATH, e)
+        return None
+
+
+def _encode(text: str) -> Optional["np.ndarray"]:
+    """Raw float32 embedding of text, served from the disk cache when possible."""
+    disk_cache = get_disk_cache()
+    if disk_cache is not None:
+        try:
+            cached = disk_cache.get(text)
+            if cached is not None:
+                return cached
+        except sqlite3.Error as e:
+            logger.warning("Embedding cache read failed: %s", e)
+    
+    model = get_embedder()
+    if model is None or not NUMPY_AVAILABLE:
+        return None
+    vector = np.asarray(model.encode(text), dtype=np.float32)
+    
+    if disk_cache is not None:
+        try:
+            disk_cache.set(text, vector)
+        except sqlite3.Error as e:
+            logger.warning("Embedding cache write failed: %s", e)
+    return vector
+
+
+def embed_prompt(text: str) -> Optional["np.ndarray"]:
+    """Return a unit-length float32 embedding of text, or None without sentence-transformers."""
+    vector = _encode(text)
+    if vector is None:
+        return None
+    return vector / np.linalg.norm(vector)
+
+
+@lru_cache(maxsize=1024)
+def embed_text(text: str) -> Optional["np.ndarray"]:
+    """
+    Return the raw float32 embedding of text, memoized so repeated prompts skip the encode.
+    
+    The array is shared by every caller asking for the same text, so it is read-only.
+    """
+    vector = _encode(text)
+    if vector is None:
+        return None
+    vector = np.ascontiguousarray(vector, dtype=np.float32)
+    vector.flags.writeable = False
+    return vector
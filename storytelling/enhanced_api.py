@@ -1,29 +1,120 @@
 """
 Enhanced Storytelling API endpoints with multi-persona support and Gemini integration.
+
+Most handlers here are short, so serve the app on uvloop + httptools
+(scripts.api.core_api.run_server does this) to keep per-request overhead low.
 """
-from fastapi import APIRouter, HTTPException
-from typing import Dict, Any, List, Optional
-from pydantic import BaseModel
+import asyncio
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+from typing import Dict, Any, List, Optional, AsyncIterator, Tuple
+from pydantic import BaseModel, ConfigDict, conint
 from ..storytelling.enhanced_cinegen import EnhancedCinegenAgent, VideoProductionBreakdown
+from ..storytelling.session_store import SessionStore
+
+try:
+    import orjson
+    from fastapi.responses import ORJSONResponse
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# orjson encodes large breakdown payloads several times faster than the stdlib
+RESPONSE_CLASS = ORJSONResponse if ORJSON_AVAILABLE else JSONResponse
+
+# Video generation requests arriving within this window are submitted together
+VIDEO_BATCH_WINDOW = 0.025  # seconds
+VIDEO_MAX_BATCH = 8
+VIDEO_MAX_CONCURRENT_BATCHES = 2
+
+DEMO_PROMPTS = {
+    "single_character": [
+        "Someone walking through a park and having a moment of realization",
+        "A person sitting in a coffee shop, writing in their journal",
+        "Someone discovering something amazing in their backyard"
+    ],
+    "multi_character": [
+        "Two friends meeting for lunch and sharing exciting news",
+        "Three colleagues brainstorming in a creative workspace",
+        "A group of friends exploring a new city together"
+    ],
+    "action_scenes": [
+        "Two people running through the city streets",
+        "Someone climbing a mountain with determination",
+        "A group working together to solve an urgent problem"
+    ],
+    "emotional_moments": [
+        "A heartfelt conversation between old friends",
+        "Someone receiving life-changing news",
+        "A moment of quiet reflection by the ocean"
+    ]
+}
+DEMO_PROMPTS_BYTES = json.dumps(DEMO_PROMPTS, separators=(",", ":")).encode("utf-8")
+DEMO_PROMPTS_ETAG = f'"{hashlib.blake2b(DEMO_PROMPTS_BYTES, digest_size=8).hexdigest()}"'
+
+# Video scripts memoized per unchanged breakdown (keyed by story and ETag)
+SCRIPT_CACHE_SIZE = 256
+
 
+# Enhanced Pydantic models. Requests are read-only, and stripping whitespace
+# keeps otherwise identical prompts on the same cache entries
+REQUEST_MODEL_CONFIG = ConfigDict(frozen=True, str_strip_whitespace=True)
+
+# Scenes are numbered from 1; anything lower is rejected with 422 during parsing
+SceneNumber = conint(ge=1)
 
-# Enhanced Pydantic models
 class EnhancedStorySessionCreate(BaseModel):
+    model_config = REQUEST_MODEL_CONFIG
     persona_ids: List[str]  # Multiple personas as main characters
     story_theme: Optional[str] = None
     user_input: Optional[str] = None
     target_duration: int = 60  # Target total video duration in seconds
 
 class SimplePromptRequest(BaseModel):
+    model_config = REQUEST_MODEL_CONFIG
     user_prompt: str  # Simple user input
-    scene_number: Optional[int] = None
+    scene_number: Optional[SceneNumber] = None
     duration_seconds: Optional[int] = None  # Custom scene duration
 
 class VideoGenerationFromBreakdown(BaseModel):
-    scene_number: int
+    model_config = REQUEST_MODEL_CONFIG
+    scene_number: SceneNumber
     quality: str = "hd"
     duration: int = 15
 
+class StatusResponse(BaseModel):
+    enhanced_agent: Dict[str, Any]
+    gemini_ai_available: bool
+    active_stories: int
+    # Capability flags are constant, so they live on the schema
+    multi_persona_support: bool = True
+    professional_breakdown: bool = True
+    duration_awareness: bool = True
+    detailed_responses: bool = True
+
+
+def breakdown_etag(breakdown: VideoProductionBreakdown) -> str:
+    """Strong ETag over a breakdown's content."""
+    if ORJSON_AVAILABLE:
+        encoded = orjson.dumps(breakdown.to_dict(), option=orjson.OPT_SORT_KEYS)
+    else:
+        encoded = json.dumps(breakdown.to_dict(), sort_keys=True, separators=(",", ":")).encode("utf-8")
+    return f'"{hashlib.blake2b(encoded, digest_size=12).hexdigest()}"'
+
+
+async def sse_wrap(events: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[str]:
+    """Format each event as a Server-Sent Events data frame."""
+    try:
+        async for event in events:
+            yield f"data: {json.dumps(event)}\n\n"
+    except Exception as e:
+        # Headers are already sent, so report failures in-band
+        yield f"data: {json.dumps({'type': 'error', 'detail': str(e)})}\n\n"
+
 
 def create_enhanced_storytelling_router(
     vector_store=None,
@@ -32,31 +123,192 @@ def create_enhanced_storytelling_router(
 ) -> APIRouter:
     """Create enhanced storytelling API router with multi-persona support."""
     
-    router = APIRouter(prefix="/cinegen", tags=["enhanced-storytelling"])
+    router = APIRouter(
+        prefix="/cinegen",
+        tags=["enhanced-storytelling"],
+        default_response_class=RESPONSE_CLASS
+    )
+    
+    # Bound concurrent Gemini generations so bursts queue here instead of hitting 429s
+    gemini_slots = asyncio.Semaphore(int(os.getenv("GEMINI_CONCURRENCY", "4")))
     
-    # Initialize enhanced agent
+    # Initialize enhanced agent (owns the Gemini model that story agents share)
     enhanced_agent = EnhancedCinegenAgent(
         vector_store=vector_store,
-        db_client=db_client
+        db_client=db_client,
+        gemini_slots=gemini_slots
     )
     
+    # One agent per story, each with its own lock, so concurrent stories never
+    # overwrite each other's session state
+    story_sessions: Dict[str, Tuple[EnhancedCinegenAgent, asyncio.Lock]] = {}
+    sessions_lock = asyncio.Lock()
+    
+    def new_story_agent() -> EnhancedCinegenAgent:
+        """Create an agent with fresh session state sharing the base agent's clients."""
+        return EnhancedCinegenAgent(
+            vector_store=enhanced_agent.vector_store,
+            db_client=enhanced_agent.db_client,
+            gemini_model=enhanced_agent.gemini_model,
+            breakdown_cache=enhanced_agent.breakdown_cache,
+            gemini_slots=gemini_slots
+        )
+    
+    # Sessions are saved after every change so another worker (or a restart)
+    # can resume them instead of starting the story over
+    session_store = SessionStore()
+    
+    async def find_session(story_id: str) -> Optional[Tuple[EnhancedCinegenAgent, asyncio.Lock]]:
+        """Get a story's agent and lock from memory, else restore it from the session store."""
+        session = story_sessions.get(story_id)
+        if session is not None:
+            return session
+        
+        state = await session_store.load(story_id)
+        async with sessions_lock:
+            session = story_sessions.get(story_id)
+            if session is None and state is not None:
+                agent = new_story_agent()
+                await agent.restore_story_session(state)
+                session = story_sessions[story_id] = (agent, asyncio.Lock())
+            return session
+    
+    async def get_or_create_session(story_id: str) -> Tuple[EnhancedCinegenAgent, asyncio.Lock]:
+        """Get a story's agent and lock, starting an empty session for unknown IDs."""
+        session = await find_session(story_id)
+        if session is not None:
+            return session
+        
+        async with sessions_lock:
+            session = story_sessions.get(story_id)
+            if session is None:
+                agent = new_story_agent()
+                await agent.start_story_session(story_id=story_id)
+                session = story_sessions[story_id] = (agent, asyncio.Lock())
+            return session
+    
+    async def get_session_agent(story_id: str) -> EnhancedCinegenAgent:
+        """Get a story's agent or raise 404."""
+        session = await find_session(story_id)
+        if session is None:
+            raise HTTPException(status_code=404, detail="Story session not found")
+        return session[0]
+    
+    # Continuous batching for video generation: handlers queue
+    # (script, prepared, future) entries and one background task groups them into
+    # generate_video_batch calls
+    video_queue: Optional[asyncio.Queue] = None
+    video_batch_task: Optional[asyncio.Task] = None
+    video_batch_slots: Optional[asyncio.Semaphore] = None
+    in_flight_batches = set()  # strong references so running batches are not collected
+    
+    async def prepare_video_generation() -> Optional[Dict[str, Any]]:
+        """Run the video client's script-independent setup, if it has any."""
+        if hasattr(video_client, "prepare"):
+            return await video_client.prepare()
+        return None
+    
+    async def generate_video_batched(
+        script: Dict[str, Any],
+        prepared: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Queue one script for the batch worker and wait for its result."""
+        nonlocal video_queue, video_batch_task, video_batch_slots
+        if video_batch_task is None or video_batch_task.done():
+            # Started lazily: the router is built before the event loop runs
+            video_queue = asyncio.Queue()
+            video_batch_slots = asyncio.Semaphore(VIDEO_MAX_CONCURRENT_BATCHES)
+            video_batch_task = asyncio.create_task(video_batch_worker(video_queue, video_batch_slots))
+        
+        future = asyncio.get_running_loop().create_future()
+        await video_queue.put((script, prepared, future))
+        return await future
+    
+    async def video_batch_worker(queue: asyncio.Queue, slots: asyncio.Semaphore):
+        """Drain queued scripts, submitting up to VIDEO_MAX_BATCH per batch."""
+        loop = asyncio.get_running_loop()
+        
+        while True:
+            batch = [await queue.get()]
+            deadline = loop.time() + VIDEO_BATCH_WINDOW
+            
+            while len(batch) < VIDEO_MAX_BATCH:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            
+            # Keep collecting the next batch while this one generates
+            await slots.acquire()
+            task = asyncio.create_task(submit_video_batch(batch, slots))
+            in_flight_batches.add(task)
+            task.add_done_callback(in_flight_batches.discard)
+    
+    async def submit_video_batch(batch: List[Any], slots: asyncio.Semaphore):
+        """Generate one batch of videos and resolve each waiting handler."""
+        scripts, contexts, futures = zip(*batch)
+        try:
+            if hasattr(video_client, "generate_video_batch"):
+                results = await video_client.generate_video_batch(list(scripts), prepared=list(contexts))
+            else:
+                results = await asyncio.gather(*(
+                    video_client.generate_video(script, prepared=context) if context is not None
+                    else video_client.generate_video(script)
+                    for script, context in zip(scripts, contexts)
+                ))
+            for future, result in zip(futures, results):
+                if not future.done():
+                    future.set_result(result)
+        except Exception as e:
+            for future in futures:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            slots.release()
+    
+    video_scripts: "OrderedDict[Tuple[str, str], Dict[str, Any]]" = OrderedDict()
+    
+    async def get_cached_video_script(
+        agent: EnhancedCinegenAgent,
+        story_id: str,
+        breakdown: VideoProductionBreakdown,
+        etag: str
+    ) -> Dict[str, Any]:
+        """Build a breakdown's video script once per ETag (LRU-bounded)."""
+        key = (story_id, etag)
+        script = video_scripts.get(key)
+        if script is None:
+            script = await agent.get_video_generation_script(breakdown)
+            video_scripts[key] = script
+            while len(video_scripts) > SCRIPT_CACHE_SIZE:
+                video_scripts.popitem(last=False)
+        video_scripts.move_to_end(key)
+        return script
+    
     @router.post("/sessions")
     async def create_enhanced_story_session(request: EnhancedStorySessionCreate):
         """Start a new story session with multiple personas."""
         try:
-            story_id = await enhanced_agent.start_story_session(
+            agent = new_story_agent()
+            story_id = await agent.start_story_session(
                 persona_ids=request.persona_ids,
                 story_theme=request.story_theme,
                 user_input=request.user_input,
                 target_duration=request.target_duration
             )
+            async with sessions_lock:
+                story_sessions[story_id] = (agent, asyncio.Lock())
+            await session_store.save(story_id, agent.session_state())
             
             return {
                 "story_id": story_id,
                 "status": "active",
                 "message": "Enhanced story session started",
-                "personas_loaded": len(enhanced_agent.active_personas),
-                "character_names": [p.get('name', 'Unknown') for p in enhanced_agent.active_personas.values()],
+                "personas_loaded": len(agent.active_personas),
+                "character_names": agent.character_names,
                 "theme": request.story_theme
             }
             
@@ -67,28 +319,32 @@ def create_enhanced_storytelling_router(
     async def process_user_prompt(story_id: str, request: SimplePromptRequest):
         """Process a simple user prompt into professional video production breakdown."""
         try:
-            if enhanced_agent.current_story_id != story_id:
-                # In a real implementation, would restore session state
-                enhanced_agent.current_story_id = story_id
+            agent, story_lock = await get_or_create_session(story_id)
             
-            # The heavy lifting happens here
-            breakdown = await enhanced_agent.process_user_prompt(
-                user_prompt=request.user_prompt,
-                scene_number=request.scene_number,
-                duration_seconds=request.duration_seconds
-            )
+            # Scenes of one story are produced in order; other stories proceed in parallel
+            async with story_lock:
+                scene_number = request.scene_number or agent.next_scene_number()
+                
+                # The heavy lifting happens here (near-duplicates are served from the agent's
+                # cache; only actual Gemini calls wait for one of gemini_slots)
+                breakdown = await agent.process_user_prompt(
+                    user_prompt=request.user_prompt,
+                    scene_number=scene_number,
+                    duration_seconds=request.duration_seconds
+                )
+                
+                await session_store.save(story_id, agent.session_state())
             
-            # Format for display
-            formatted_output = enhanced_agent.format_breakdown_output(
-                breakdown, 
-                request.scene_number or len(enhanced_agent.scenes)
+            # Format for display, off the event loop
+            formatted_output = await asyncio.to_thread(
+                agent.format_breakdown_output, breakdown, scene_number
             )
             
             return {
                 "breakdown": breakdown.to_dict(),
                 "formatted_output": formatted_output,
                 "story_id": story_id,
-                "scene_number": request.scene_number or len(enhanced_agent.scenes),
+                "scene_number": scene_number,
                 "ready_for_video": True,
                 "personas_involved": breakdown.personas_involved
             }
@@ -96,19 +352,44 @@ def create_enhanced_storytelling_router(
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
     
+    @router.post("/sessions/{story_id}/process/stream")
+    async def process_user_prompt_stream(story_id: str, request: SimplePromptRequest):
+        """Stream a prompt's breakdown as Server-Sent Events while Gemini generates it."""
+        agent, story_lock = await get_or_create_session(story_id)
+        
+        async def locked_events():
+            async with story_lock:
+                async for event in agent.process_user_prompt_stream(
+                    user_prompt=request.user_prompt,
+                    scene_number=request.scene_number,
+                    duration_seconds=request.duration_seconds
+                ):
+                    yield event
+                await session_store.save(story_id, agent.session_state())
+        
+        return StreamingResponse(sse_wrap(locked_events()), media_type="text/event-stream")
+    
     @router.get("/sessions/{story_id}/breakdown/{scene_number}")
-    async def get_scene_breakdown(story_id: str, scene_number: int):
+    async def get_scene_breakdown(story_id: str, scene_number: SceneNumber, request: Request, response: Response):
         """Get a specific scene breakdown."""
         try:
-            if enhanced_agent.current_story_id != story_id:
-                raise HTTPException(status_code=404, detail="Story session not found")
-            
-            if scene_number > len(enhanced_agent.scenes) or scene_number < 1:
+            agent = await get_session_agent(story_id)
+            breakdown = agent.get_scene(story_id, scene_number)
+            if breakdown is None:
                 raise HTTPException(status_code=404, detail="Scene not found")
             
-            breakdown = enhanced_agent.scenes[scene_number - 1]
-            formatted_output = enhanced_agent.format_breakdown_output(breakdown, scene_number)
-            video_script = await enhanced_agent.get_video_generation_script(breakdown)
+            # Unchanged breakdowns skip formatting and script generation entirely
+            etag = breakdown_etag(breakdown)
+            cache_headers = {"ETag": etag, "Cache-Control": "private, max-age=60"}
+            if request.headers.get("if-none-match") == etag:
+                return Response(status_code=304, headers=cache_headers)
+            response.headers.update(cache_headers)
+            
+            # Independent work: format in a worker thread while the script is built
+            formatted_output, video_script = await asyncio.gather(
+                asyncio.to_thread(agent.format_breakdown_output, breakdown, scene_number),
+                get_cached_video_script(agent, story_id, breakdown, etag)
+            )
             
             return {
                 "breakdown": breakdown.to_dict(),
@@ -125,7 +406,7 @@ def create_enhanced_storytelling_router(
     @router.post("/sessions/{story_id}/breakdown/{scene_number}/generate-video")
     async def generate_video_from_breakdown(
         story_id: str, 
-        scene_number: int, 
+        scene_number: SceneNumber, 
         request: VideoGenerationFromBreakdown
     ):
         """Generate video from a professional breakdown."""
@@ -133,21 +414,21 @@ def create_enhanced_storytelling_router(
             if not video_client:
                 raise HTTPException(status_code=503, detail="Video generation not available")
             
-            if enhanced_agent.current_story_id != story_id:
-                raise HTTPException(status_code=404, detail="Story session not found")
-            
-            if scene_number > len(enhanced_agent.scenes) or scene_number < 1:
+            agent = await get_session_agent(story_id)
+            breakdown = agent.get_scene(story_id, scene_number)
+            if breakdown is None:
                 raise HTTPException(status_code=404, detail="Scene not found")
             
-            breakdown = enhanced_agent.scenes[scene_number - 1]
-            
-            # Get video generation script
-            script = await enhanced_agent.get_video_generation_script(breakdown)
+            # Build the script while the video client does its own setup (auth, connections)
+            script, prepared = await asyncio.gather(
+                agent.get_video_generation_script(breakdown),
+                prepare_video_generation()
+            )
             script["quality"] = request.quality
             script["duration"] = request.duration
             
-            # Generate video using SoRa Core
-            result = await video_client.generate_video(script)
+            # Generate video using SoRa Core, batched with concurrent requests
+            result = await generate_video_batched(script, prepared)
             
             return {
                 "scene_number": scene_number,
@@ -167,11 +448,9 @@ def create_enhanced_storytelling_router(
     async def get_enhanced_story_session(story_id: str):
         """Get enhanced story session details."""
         try:
-            if enhanced_agent.current_story_id != story_id:
-                raise HTTPException(status_code=404, detail="Story session not found")
-            
-            story_export = await enhanced_agent.export_story()
-            return story_export
+            agent = await get_session_agent(story_id)
+            # Already-encoded JSON skips FastAPI's jsonable_encoder pass
+            return Response(content=await agent.export_story_json(), media_type="application/json")
             
         except HTTPException:
             raise
@@ -182,17 +461,17 @@ def create_enhanced_storytelling_router(
     async def list_scene_breakdowns(story_id: str):
         """List all scene breakdowns in the story."""
         try:
-            if enhanced_agent.current_story_id != story_id:
-                raise HTTPException(status_code=404, detail="Story session not found")
-            
-            breakdowns = [scene.to_dict() for scene in enhanced_agent.scenes]
+            agent = await get_session_agent(story_id)
+            scenes = agent.story_scenes()
+            breakdowns = [scenes[number].to_dict() for number in sorted(scenes)]
             
-            return {
+            # Already plain data, so skip FastAPI's jsonable_encoder pass
+            return RESPONSE_CLASS(content={
                 "story_id": story_id,
                 "breakdowns": breakdowns,
                 "total_scenes": len(breakdowns),
-                "personas_involved": list(enhanced_agent.active_personas.keys())
-            }
+                "personas_involved": agent.persona_ids
+            })
             
         except HTTPException:
             raise
@@ -200,39 +479,23 @@ def create_enhanced_storytelling_router(
             raise HTTPException(status_code=500, detail=str(e))
     
     @router.get("/demo/prompts")
-    async def get_demo_prompts():
+    async def get_demo_prompts(request: Request):
         """Get example prompts for different scenarios."""
-        return {
-            "single_character": [
-                "Someone walking through a park and having a moment of realization",
-                "A person sitting in a coffee shop, writing in their journal",
-                "Someone discovering something amazing in their backyard"
-            ],
-            "multi_character": [
-                "Two friends meeting for lunch and sharing exciting news",
-                "Three colleagues brainstorming in a creative workspace",
-                "A group of friends exploring a new city together"
-            ],
-            "action_scenes": [
-                "Two people running through the city streets",
-                "Someone climbing a mountain with determination",
-                "A group working together to solve an urgent problem"
-            ],
-            "emotional_moments": [
-                "A heartfelt conversation between old friends",
-                "Someone receiving life-changing news",
-                "A moment of quiet reflection by the ocean"
-            ]
-        }
+        # The catalog never changes, so serve the bytes encoded at import time
+        if request.headers.get("if-none-match") == DEMO_PROMPTS_ETAG:
+            return Response(status_code=304, headers={"ETag": DEMO_PROMPTS_ETAG})
+        return Response(
+            content=DEMO_PROMPTS_BYTES,
+            media_type="application/json",
+            headers={"ETag": DEMO_PROMPTS_ETAG}
+        )
     
     @router.get("/sessions/{story_id}/timing")
     async def get_story_timing(story_id: str):
         """Get detailed timing information for the story."""
         try:
-            if enhanced_agent.current_story_id != story_id:
-                raise HTTPException(status_code=404, detail="Story session not found")
-            
-            timing_info = enhanced_agent.get_timing_info()
+            agent = await get_session_agent(story_id)
+            timing_info = agent.get_timing_info()
             return timing_info
             
         except HTTPException:
@@ -240,18 +503,15 @@ def create_enhanced_storytelling_router(
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
     
-    @router.get("/status")
+    @router.get("/status", response_model=StatusResponse)
     async def get_enhanced_storytelling_status():
         """Get enhanced storytelling system status."""
         try:
-            return {
-                "enhanced_agent": enhanced_agent.get_status(),
-                "gemini_ai_available": bool(enhanced_agent.gemini_model),
-                "multi_persona_support": True,
-                "professional_breakdown": True,
-                "duration_awareness": True,
-                "detailed_responses": True
-            }
+            return StatusResponse(
+                enhanced_agent=enhanced_agent.get_status(),
+                gemini_ai_available=bool(enhanced_agent.gemini_model),
+                active_stories=len(story_sessions)
+            )
             
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
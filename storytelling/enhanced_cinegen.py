@@ -4,11 +4,18 @@ Working implementation without syntax errors
 """
 import asyncio
 import json
+import re
+import statistics
+import time
 import uuid
 import os
-from typing import Dict, Any, List, Optional, Union
-from datetime import datetime
-from dataclasses import dataclass
+from collections import deque
+from contextlib import nullcontext
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, Union, AsyncIterator, Tuple
+from datetime import datetime, timedelta
+from pathlib import Path
+from dataclasses import dataclass, field, replace
 
 # Load environment variables
 try:
@@ -23,11 +30,176 @@ try:
 except ImportError:
     GEMINI_AVAILABLE = False
 
+try:
+    from google.generativeai import caching
+    GEMINI_CACHING_AVAILABLE = True
+except ImportError:
+    GEMINI_CACHING_AVAILABLE = False
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    from google import genai as genai_sdk  # google-genai, for the Batch API
+    GEMINI_BATCH_AVAILABLE = True
+except ImportError:
+    GEMINI_BATCH_AVAILABLE = False
+
 from storage.vector_store import VectorStore
 from storage.db import DatabaseClient
+from .embeddings import embed_text
+from .semantic_cache import SemanticResponseCache
+
+DEFAULT_SCENE_DURATION = 30  # seconds, when a prompt does not specify one
+PERSONA_CONTEXT_TTL = 600.0  # seconds a retrieved persona context is reused for the same prompt
+
+# Fixed part of every breakdown prompt; it leads the prompt so provider-side
+# prefix caching can reuse it across requests
+BREAKDOWN_INSTRUCTIONS = """You are CINEGEN, an AI video director. Take the user's scene request and create a professional video breakdown.
+
+IMPORTANT: When the user mentions "I", "me", "myself", they refer to the main persona in the scene.
+
+Your job: Create a SPECIFIC scene breakdown based on exactly what the user described. Don't use templates or generic descriptions.
+
+Respond with:
+
+SUBJECT: [Exactly who is in the scene and what they're doing - be specific to the user's request]
+
+SETTING: [The exact location described - be specific and detailed]
+
+ACTION: [What specifically happens in this scene, paced to the scene duration - timeline of events]
+
+STYLE: [Visual style that matches this specific scene]
+
+CAMERA: [Camera work that captures this particular action]
+
+LIGHTING: [Lighting that enhances this specific setting and mood]
+
+AUDIO: [Sound design for this exact scene]
+
+GENERATION_PROMPT: [Clean, detailed prompt optimized for Veo - no fluff, just the visual scene]
+
+BE SPECIFIC to the user's request. Don't use generic templates."""
+
+# Explicit Gemini context caches have a minimum size; shorter session prefixes
+# rely on the provider's implicit prefix caching instead
+CONTEXT_CACHE_MIN_TOKENS = int(os.getenv("GEMINI_CONTEXT_CACHE_MIN_TOKENS", "1024"))
+CONTEXT_CACHE_TTL = timedelta(hours=1)
+# A cache is recreated this long before Gemini expires it, so no call races the expiry
+CONTEXT_CACHE_EXPIRY_MARGIN = 60.0  # seconds
+
+# Per-scene part of the breakdown prompt; it follows the session prefix
+SCENE_PROMPT_TEMPLATE = """{prefix}
+{persona_context}
+
+USER REQUEST: "{user_prompt}"
+SCENE DURATION: {duration_seconds} seconds{story_context}"""
+STORY_CONTEXT_TEMPLATE = "\n\nSTORY CONTEXT:\nPrevious scenes: {scene_count}\nPrevious scene: {last_action}...\n"
+
+# Breakdown section header -> VideoProductionBreakdown field, the single dispatch
+# table for parsing Gemini responses
+_FIELD_KEYS = {
+    "subject": "subject",
+    "setting": "context_setting",
+    "action": "action",
+    "style": "style_aesthetic",
+    "camera": "camera_composition",
+    "lighting": "lighting_ambience",
+    "audio": "audio_dialogue",
+    "generation_prompt": "generation_prompt"
+}
+_FIELD_HEADERS = "|".join(_FIELD_KEYS)
+
+# One section of a Gemini breakdown: a header at the start of a line, then
+# everything up to the next header (or the end of the response)
+_FIELD_RE = re.compile(
+    rf"^\s*({_FIELD_HEADERS}):\s*(.*?)(?=^\s*(?:{_FIELD_HEADERS}):|\Z)",
+    re.M | re.S | re.I
+)
+
+# A streamed breakdown is first shown to clients once these sections are complete
+PARTIAL_REQUIRED_FIELDS = ("subject", "action")
+
+
+def _parse_sections(response_text: str) -> Dict[str, str]:
+    """Map each breakdown field found in a Gemini response to its text (lines joined with spaces)."""
+    return {
+        _FIELD_KEYS[match.group(1).lower()]: " ".join(match.group(2).split())
+        for match in _FIELD_RE.finditer(response_text)
+    }
+
+
+def _completed_sections(partial_text: str) -> Dict[str, str]:
+    """Like _parse_sections, minus the last section, which may still be streaming."""
+    matches = list(_FIELD_RE.finditer(partial_text))
+    return {
+        _FIELD_KEYS[match.group(1).lower()]: " ".join(match.group(2).split())
+        for match in matches[:-1]
+    }
+
+# Short single-subject prompts go to a faster model; override with GEMINI_FAST_MODEL
+FAST_MODEL_NAME = os.getenv("GEMINI_FAST_MODEL", "gemini-2.0-flash")
+FAST_PROMPT_MAX_WORDS = 20
+MULTI_SUBJECT_WORDS = frozenset({"group", "together", "and", "crowd", "friends", "colleagues"})
+
+# Gemini Batch API jobs run at half price but finish in minutes, not seconds
+BATCH_POLL_SECONDS = 15
+MAX_CONCURRENT_SCENES = 5  # parallel Gemini calls per process_user_prompts() call
+BATCH_DONE_STATES = frozenset({
+    "JOB_STATE_SUCCEEDED", "JOB_STATE_FAILED", "JOB_STATE_CANCELLED", "JOB_STATE_EXPIRED"
+})
+
+# Recent Gemini call latencies (seconds) per model, shared by every agent
+LATENCY_SAMPLES = 500
+_model_latencies: Dict[str, deque] = {}
+
+
+def list_persona_dirs() -> Tuple[Path, ...]:
+    """List the persona directories (agents keep one snapshot per story session)."""
+    personas_dir = Path(__file__).parent.parent / "personas"
+    if not personas_dir.exists():
+        return ()
+    return tuple(d for d in personas_dir.iterdir() if d.is_dir() and d.name != "example_persona")
+
+
+@lru_cache(maxsize=8)
+def _generative_model(model_name: str):
+    """Create one GenerativeModel per name and reuse it across agents."""
+    return genai.GenerativeModel(model_name)
+
+
+def _record_latency(model_name: str, seconds: float):
+    """Record one call's latency for the model's percentiles."""
+    samples = _model_latencies.get(model_name)
+    if samples is None:
+        samples = _model_latencies.setdefault(model_name, deque(maxlen=LATENCY_SAMPLES))
+    samples.append(seconds)
+
+
+def _latency_summary() -> Dict[str, Dict[str, Any]]:
+    """p50/p95 latency in milliseconds for each model with samples."""
+    summary = {}
+    for model_name, samples in list(_model_latencies.items()):
+        ordered = sorted(samples)
+        if not ordered:
+            continue
+        if len(ordered) > 1:
+            cut_points = statistics.quantiles(ordered, n=20, method="inclusive")
+            p50, p95 = cut_points[9], cut_points[18]
+        else:
+            p50 = p95 = ordered[0]
+        summary[model_name] = {
+            "count": len(ordered),
+            "p50_ms": round(p50 * 1000, 1),
+            "p95_ms": round(p95 * 1000, 1)
+        }
+    return summary
 
 
-@dataclass
+@dataclass(slots=True)
 class VideoProductionBreakdown:
     """Professional video production breakdown fields with duration awareness."""
     subject: str
@@ -43,9 +215,25 @@ class VideoProductionBreakdown:
     reference_notes: Optional[str] = None
     personas_involved: List[str] = None
     scene_transitions: Optional[str] = None
+    # Derived state, not part of the breakdown: memoized to_dict() and prefetched video script
+    _cached_dict: Optional[Dict[str, Any]] = field(default=None, init=False, repr=False, compare=False)
+    _script_task: Optional[asyncio.Task] = field(default=None, init=False, repr=False, compare=False)
+    
+    def __setattr__(self, name: str, value: Any):
+        object.__setattr__(self, name, value)
+        # Any public field change invalidates the memoized dictionary and prefetched script
+        if not name.startswith("_"):
+            object.__setattr__(self, "_cached_dict", None)
+            object.__setattr__(self, "_script_task", None)
     
     def to_dict(self) -> Dict[str, Any]:
-        """Convert to dictionary."""
+        """Convert to dictionary (memoized until a field changes; treat as read-only)."""
+        if self._cached_dict is None:
+            self._cached_dict = self._build_dict()
+        return self._cached_dict
+    
+    def _build_dict(self) -> Dict[str, Any]:
+        """Build the dictionary form of the breakdown."""
         return {
             "subject": self.subject,
             "context_setting": self.context_setting,
@@ -72,12 +260,19 @@ class EnhancedCinegenAgent:
         db_client: DatabaseClient = None,
         google_api_key: str = None,
         temperature: float = 0.9,
-        max_tokens: int = 2048
+        max_tokens: int = 2048,
+        gemini_model: Any = None,
+        breakdown_cache: SemanticResponseCache = None,
+        gemini_slots: asyncio.Semaphore = None
     ):
         self.vector_store = vector_store or VectorStore()
         self.db_client = db_client or DatabaseClient()
         self.temperature = temperature
         self.max_tokens = max_tokens
+        # Near-duplicate requests reuse an earlier Gemini breakdown (may be shared between agents)
+        self.breakdown_cache = breakdown_cache or SemanticResponseCache(maxsize=200)
+        # Bounds concurrent Gemini calls (may be shared between agents); cache hits never take a slot
+        self.gemini_slots = gemini_slots or nullcontext()
         
         # Initialize Gemini
         # Accept either GEMINI_API_KEY (preferred) or GOOGLE_API_KEY for backwards compatibility
@@ -86,15 +281,37 @@ class EnhancedCinegenAgent:
             or os.getenv("GEMINI_API_KEY")
             or os.getenv("GOOGLE_API_KEY")
         )
-        self.gemini_model = None
-        self._initialize_gemini()
+        # An already-configured model (e.g. shared by per-story agents) skips setup
+        self.gemini_model = gemini_model
+        if self.gemini_model is None:
+            self._initialize_gemini()
+        # Built once and passed to every generate call
+        self._gen_config = genai.types.GenerationConfig(
+            temperature=self.temperature,
+            max_output_tokens=self.max_tokens
+        ) if self.gemini_model else None
         
         # Current story session
         self.active_personas = {}
+        # Read-only snapshots of active_personas, refreshed whenever it changes
+        self.persona_ids: Tuple[str, ...] = ()
+        self.character_names: Tuple[str, ...] = ()
         self.current_story_id = None
-        self.scenes = []
+        # story_id -> {scene_number: breakdown}, so stories never share scene state
+        self.scenes: Dict[str, Dict[int, VideoProductionBreakdown]] = {}
         self.target_video_duration = 60
-        self.scene_durations = []
+        self.story_theme = None
+        self._prompt_prefix = BREAKDOWN_INSTRUCTIONS
+        # prompt -> (expires_at, persona context); cleared whenever the session changes
+        self._persona_context_cache: Dict[str, Tuple[float, str]] = {}
+        # Persona directories, listed once per session (see refresh_persona_dirs)
+        self._persona_dirs: Tuple[Path, ...] = ()
+        # Reference frames from the persona manifests, loaded on first use per session
+        self._reference_images: Optional[Tuple[str, ...]] = None
+        # Model bound to a Gemini context cache of _prompt_prefix, rebuilt when the prefix changes
+        self._context_cache_prefix: Optional[str] = None
+        self._context_cached_model = None
+        self._context_cache_expires_at = 0.0  # time.monotonic() deadline
         
         print("Enhanced CINEGEN Story Director initialized")
         print(f"   Gemini AI: {'Active' if self.gemini_model else 'Mock mode'}")
@@ -164,24 +381,75 @@ class EnhancedCinegenAgent:
         persona_ids: List[str] = None,
         story_theme: str = None,
         user_input: str = None,
-        target_duration: int = 60
+        target_duration: int = 60,
+        story_id: str = None
     ) -> str:
-        """Start a new story session."""
-        self.current_story_id = str(uuid.uuid4())
-        self.scenes = []
-        self.scene_durations = []
+        """Start a new story session (under story_id if given, otherwise a new ID)."""
+        self.current_story_id = story_id or str(uuid.uuid4())
+        self.scenes[self.current_story_id] = {}
         self.target_video_duration = target_duration
+        self.story_theme = story_theme
+        self._persona_context_cache.clear()
+        await self.refresh_persona_dirs()
         
         # Load personas if provided
         if persona_ids:
             await self.load_personas(persona_ids)
             print(f"Loaded {len(self.active_personas)} personas")
         
+        self._prompt_prefix = self._render_prompt_prefix(story_theme)
+        
         print(f"Started story session: {self.current_story_id}")
         print(f"   Target Duration: {target_duration} seconds")
         
         return self.current_story_id
     
+    async def refresh_persona_dirs(self):
+        """Re-list the persona directories, e.g. after personas were added mid-session."""
+        self._persona_dirs = await asyncio.to_thread(list_persona_dirs)
+        self._reference_images = None
+    
+    def session_state(self) -> Dict[str, Any]:
+        """JSON-serializable state of the current story session."""
+        return {
+            "story_id": self.current_story_id,
+            "persona_ids": list(self.persona_ids),
+            "story_theme": self.story_theme,
+            "target_duration": self.target_video_duration,
+            "scenes": {
+                str(number): breakdown.to_dict()
+                for number, breakdown in self.story_scenes().items()
+            }
+        }
+    
+    async def restore_story_session(self, state: Dict[str, Any]) -> str:
+        """Resume a story session from session_state() output."""
+        self.current_story_id = state["story_id"]
+        self.target_video_duration = state.get("target_duration", 60)
+        self.story_theme = state.get("story_theme")
+        self._persona_context_cache.clear()
+        await self.refresh_persona_dirs()
+        
+        self.active_personas = {}
+        await self.load_personas(state.get("persona_ids") or [])
+        self._prompt_prefix = self._render_prompt_prefix(self.story_theme)
+        
+        self.scenes[self.current_story_id] = {
+            int(number): VideoProductionBreakdown(**fields)
+            for number, fields in state.get("scenes", {}).items()
+        }
+        print(f"Restored story session: {self.current_story_id} ({len(self.story_scenes())} scenes)")
+        return self.current_story_id
+    
+    def _render_prompt_prefix(self, story_theme: str = None) -> str:
+        """Render the static, per-session part of the breakdown prompt once."""
+        prefix = BREAKDOWN_INSTRUCTIONS
+        if self.character_names:
+            prefix += f"\n\nCAST: {', '.join(self.character_names)}"
+        if story_theme:
+            prefix += f"\nSTORY THEME: {story_theme}"
+        return prefix
+    
     async def load_personas(self, persona_ids: List[str]) -> Dict[str, Any]:
         """Load personas for the story session."""
         for persona_id in persona_ids:
@@ -195,6 +463,8 @@ class EnhancedCinegenAgent:
             except Exception as e:
                 print(f"Warning: Could not load persona {persona_id}: {e}")
         
+        self.persona_ids = tuple(self.active_personas)
+        self.character_names = tuple(p.get('name', 'Unknown') for p in self.active_personas.values())
         return self.active_personas
     
     async def process_user_prompt(
@@ -208,8 +478,8 @@ class EnhancedCinegenAgent:
         if not self.current_story_id:
             await self.start_story_session()
         
-        scene_number = scene_number or len(self.scenes) + 1
-        duration_seconds = duration_seconds or 30
+        scene_number = scene_number or self.next_scene_number()
+        duration_seconds = duration_seconds or DEFAULT_SCENE_DURATION
         
         print(f"Processing user prompt for Scene {scene_number}...")
         
@@ -218,12 +488,250 @@ class EnhancedCinegenAgent:
             user_prompt, scene_number, duration_seconds
         )
         
-        # Store the scene
-        self.scenes.append(breakdown)
-        self.scene_durations.append(duration_seconds)
-        
+        return self.record_scene(breakdown, scene_number)
+    
+    def story_scenes(self, story_id: str = None) -> Dict[int, VideoProductionBreakdown]:
+        """Scenes of a story (the current one by default), keyed by scene number."""
+        return self.scenes.setdefault(story_id or self.current_story_id, {})
+    
+    def get_scene(self, story_id: str, scene_number: int) -> Optional[VideoProductionBreakdown]:
+        """Look up one scene; None if the story or scene does not exist."""
+        return self.scenes.get(story_id, {}).get(scene_number)
+    
+    def next_scene_number(self, story_id: str = None) -> int:
+        """Scene number that a new scene in the story would get."""
+        return max(self.story_scenes(story_id), default=0) + 1
+    
+    def record_scene(
+        self,
+        breakdown: VideoProductionBreakdown,
+        scene_number: int = None,
+        story_id: str = None
+    ) -> VideoProductionBreakdown:
+        """Store a breakdown (freshly generated or served from a cache) as a scene of the story."""
+        scenes = self.story_scenes(story_id)
+        scenes[scene_number or max(scenes, default=0) + 1] = breakdown
+        self._prefetch_video_script(breakdown)
         return breakdown
     
+    def _prefetch_video_script(self, breakdown: VideoProductionBreakdown):
+        """Start building the scene's video script now; generate-video usually follows."""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        task = loop.create_task(self._build_video_generation_script(breakdown))
+        # Retrieve failures so an unused task never logs "exception was never retrieved"
+        task.add_done_callback(lambda done: done.cancelled() or done.exception())
+        breakdown._script_task = task
+    
+    async def process_user_prompt_stream(
+        self,
+        user_prompt: str,
+        scene_number: int = None,
+        duration_seconds: int = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Process a user prompt like process_user_prompt, streaming Gemini's text as it arrives.
+        
+        Yields {"type": "delta", "text"} events while Gemini generates, plus a
+        {"type": "partial", "scene_number", "fields"} event each time another section
+        completes once SUBJECT and ACTION are known, then one
+        {"type": "breakdown", "scene_number", "breakdown", "formatted_output"} event
+        once the scene has been parsed and stored.
+        """
+        if not self.current_story_id:
+            await self.start_story_session()
+        
+        scene_number = scene_number or self.next_scene_number()
+        duration_seconds = duration_seconds or DEFAULT_SCENE_DURATION
+        breakdown = None
+        cache_scope = (tuple(sorted(self.persona_ids)), duration_seconds, scene_number)
+        
+        cached_breakdown = await self.breakdown_cache.get(cache_scope, user_prompt)
+        if cached_breakdown is not None:
+            # Nothing to stream; the breakdown event follows immediately
+            breakdown = replace(cached_breakdown)
+        elif self.gemini_model:
+            system_prompt = await self._build_gemini_prompt(user_prompt, duration_seconds)
+            try:
+                print("Streaming scene breakdown from Gemini AI...")
+                response_parts = []
+                partial_fields = {}
+                async with self.gemini_slots:
+                    response = await self._select_model(user_prompt).generate_content_async(
+                        system_prompt,
+                        generation_config=self._gen_config,
+                        stream=True
+                    )
+                    
+                    async for chunk in response:
+                        text = chunk.text
+                        response_parts.append(text)
+                        yield {"type": "delta", "text": text}
+                        
+                        # A new header can only arrive with a colon; re-parse only then
+                        if ":" not in text:
+                            continue
+                        fields = _completed_sections("".join(response_parts))
+                        if len(fields) > len(partial_fields) and all(
+                            fields.get(field) for field in PARTIAL_REQUIRED_FIELDS
+                        ):
+                            partial_fields = fields
+                            yield {"type": "partial", "scene_number": scene_number, "fields": fields}
+                
+                breakdown = self._parse_gemini_response(
+                    "".join(response_parts), duration_seconds, scene_number
+                )
+                await self.breakdown_cache.set(cache_scope, user_prompt, replace(breakdown))
+            except Exception as e:
+                print(f"Gemini streaming failed: {e}")
+        
+        if breakdown is None:
+            breakdown = await self._generate_mock_breakdown(user_prompt, scene_number, duration_seconds)
+        
+        self.record_scene(breakdown, scene_number)
+        yield {
+            "type": "breakdown",
+            "scene_number": scene_number,
+            "breakdown": breakdown.to_dict(),
+            "formatted_output": self.format_breakdown_output(breakdown, scene_number)
+        }
+    
+    async def process_user_prompts(
+        self,
+        scene_requests: List[Tuple[str, int, int]],
+        max_concurrency: int = MAX_CONCURRENT_SCENES
+    ) -> List[VideoProductionBreakdown]:
+        """
+        Generate several scenes concurrently instead of one Gemini call at a time.
+        
+        Like the batch path, every scene sees the story context as it was before
+        the call, so use process_user_prompt when a scene must build on the previous one.
+        
+        Args:
+            scene_requests: (user_prompt, scene_number, duration_seconds) per scene;
+                scene_number and duration_seconds may be None
+            max_concurrency: Maximum Gemini calls in flight at once
+        
+        Returns:
+            The recorded breakdowns, in request order
+        """
+        if not self.current_story_id:
+            await self.start_story_session()
+        
+        first_scene = self.next_scene_number()
+        scenes = [
+            (user_prompt, scene_number or first_scene + index, duration_seconds or DEFAULT_SCENE_DURATION)
+            for index, (user_prompt, scene_number, duration_seconds) in enumerate(scene_requests)
+        ]
+        
+        slots = asyncio.Semaphore(max_concurrency)
+        
+        async def generate(user_prompt: str, scene_number: int, duration_seconds: int) -> VideoProductionBreakdown:
+            async with slots:
+                return await self._generate_production_breakdown(user_prompt, scene_number, duration_seconds)
+        
+        print(f"Processing {len(scenes)} scenes concurrently...")
+        breakdowns = await asyncio.gather(*(generate(*scene) for scene in scenes))
+        
+        return [
+            self.record_scene(breakdown, scene_number)
+            for breakdown, (_, scene_number, _) in zip(breakdowns, scenes)
+        ]
+    
+    async def process_user_prompts_batch(
+        self,
+        user_prompts: List[str],
+        duration_seconds: int = None,
+        use_batch_api: bool = True
+    ) -> List[VideoProductionBreakdown]:
+        """
+        Process several user prompts into consecutive scenes with one Gemini batch job.
+        
+        Batch jobs cost half as much as individual calls but can take minutes, so this
+        suits storyboarding; pass use_batch_api=False (or call process_user_prompt) when
+        latency matters. Every prompt in a batch sees the story context as it was before
+        the batch; process_user_prompt builds each scene on the previous one instead.
+        
+        Args:
+            user_prompts: One prompt per new scene, in story order
+            duration_seconds: Duration of every scene
+            use_batch_api: Submit a Gemini batch job if google-genai is installed
+        
+        Returns:
+            The recorded breakdowns, in prompt order
+        """
+        if not self.current_story_id:
+            await self.start_story_session()
+        
+        duration_seconds = duration_seconds or DEFAULT_SCENE_DURATION
+        first_scene = self.next_scene_number()
+        scene_numbers = list(range(first_scene, first_scene + len(user_prompts)))
+        
+        breakdowns = None
+        if use_batch_api and len(user_prompts) > 1 and self.gemini_model and GEMINI_BATCH_AVAILABLE:
+            try:
+                breakdowns = await self._generate_with_batch_api(user_prompts, scene_numbers, duration_seconds)
+            except Exception as e:
+                print(f"⚠️ Gemini batch job failed ({e}) - generating scenes individually")
+        
+        if breakdowns is None:
+            return await self.process_user_prompts([
+                (user_prompt, scene_number, duration_seconds)
+                for user_prompt, scene_number in zip(user_prompts, scene_numbers)
+            ])
+        
+        return [
+            self.record_scene(breakdown, scene_number)
+            for breakdown, scene_number in zip(breakdowns, scene_numbers)
+        ]
+    
+    async def _generate_with_batch_api(
+        self,
+        user_prompts: List[str],
+        scene_numbers: List[int],
+        duration_seconds: int
+    ) -> List[VideoProductionBreakdown]:
+        """Submit one inline Gemini batch job for all prompts and parse each result."""
+        client = genai_sdk.Client(api_key=self.google_api_key)
+        system_prompts = await asyncio.gather(*(
+            self._build_gemini_prompt(user_prompt, duration_seconds) for user_prompt in user_prompts
+        ))
+        requests = [
+            {
+                "contents": [{"role": "user", "parts": [{"text": system_prompt}]}],
+                "config": {"temperature": self.temperature, "max_output_tokens": self.max_tokens}
+            }
+            for system_prompt in system_prompts
+        ]
+        
+        job = await client.aio.batches.create(
+            model=getattr(self.gemini_model, "model_name", FAST_MODEL_NAME),
+            src=requests,
+            config={"display_name": f"cinegen-{self.current_story_id}-scenes-{scene_numbers[0]}"}
+        )
+        print(f"Submitted Gemini batch job {job.name} for {len(requests)} scenes...")
+        
+        while job.state.name not in BATCH_DONE_STATES:
+            await asyncio.sleep(BATCH_POLL_SECONDS)
+            job = await client.aio.batches.get(name=job.name)
+        
+        if job.state.name != "JOB_STATE_SUCCEEDED":
+            raise RuntimeError(f"batch job {job.name} ended in {job.state.name}")
+        if len(job.dest.inlined_responses) != len(requests):
+            raise RuntimeError(f"batch job {job.name} returned {len(job.dest.inlined_responses)} of {len(requests)} results")
+        
+        breakdowns = []
+        # Inline responses come back in request order
+        for user_prompt, scene_number, result in zip(user_prompts, scene_numbers, job.dest.inlined_responses):
+            if result.response is None:
+                print(f"⚠️ Batch request for Scene {scene_number} failed: {result.error}")
+                breakdowns.append(await self._generate_mock_breakdown(user_prompt, scene_number, duration_seconds))
+            else:
+                breakdowns.append(self._parse_gemini_response(result.response.text, duration_seconds, scene_number))
+        return breakdowns
+    
     async def _generate_production_breakdown(
         self,
         user_prompt: str,
@@ -237,6 +745,29 @@ class EnhancedCinegenAgent:
         else:
             return await self._generate_mock_breakdown(user_prompt, scene_number, duration_seconds)
     
+    def _select_model(self, user_prompt: str):
+        """Route short single-subject prompts to the fast model, everything else to the main one."""
+        words = user_prompt.lower().split()
+        if len(words) >= FAST_PROMPT_MAX_WORDS or not MULTI_SUBJECT_WORDS.isdisjoint(words):
+            return self.gemini_model
+        try:
+            return _generative_model(FAST_MODEL_NAME)
+        except Exception as e:
+            print(f"⚠️ Fast model {FAST_MODEL_NAME} unavailable: {e}")
+            return self.gemini_model
+    
+    async def _timed_generate(self, model, system_prompt: str):
+        """Call generate_content off the event loop, recording the model's latency."""
+        async with self.gemini_slots:
+            started = time.perf_counter()
+            response = await asyncio.to_thread(
+                model.generate_content,
+                system_prompt,
+                generation_config=self._gen_config
+            )
+        _record_latency(getattr(model, "model_name", "gemini"), time.perf_counter() - started)
+        return response
+    
     async def _generate_with_gemini(
         self,
         user_prompt: str,
@@ -245,72 +776,119 @@ class EnhancedCinegenAgent:
     ) -> VideoProductionBreakdown:
         """Generate breakdown using Gemini AI."""
         
-        # Build story context
-        story_context = ""
-        if self.scenes:
-            story_context = f"\n\nSTORY CONTEXT:\n"
-            story_context += f"Previous scenes: {len(self.scenes)}\n"
-            if len(self.scenes) >= 1:
-                last_scene = self.scenes[-1]
-                story_context += f"Previous scene: {last_scene.action[:100]}...\n"
-        
-        # Retrieve persona context from vector store
-        persona_context = await self._get_persona_context(user_prompt)
+        cache_scope = (tuple(sorted(self.persona_ids)), duration_seconds, scene_number)
+        cached_breakdown = await self.breakdown_cache.get(cache_scope, user_prompt)
+        if cached_breakdown is not None:
+            print("✅ Reusing cached breakdown for a near-identical request")
+            # Copy so later edits to this scene never leak into the cache
+            return replace(cached_breakdown)
         
-        # Create focused Gemini prompt
-        system_prompt = f"""You are CINEGEN, an AI video director. Take the user's scene request and create a professional video breakdown.
-
-IMPORTANT: When the user mentions "I", "me", "myself", they refer to the main persona in the scene.
-
-{persona_context}
-
-USER REQUEST: "{user_prompt}"
-SCENE DURATION: {duration_seconds} seconds{story_context}
-
-Your job: Create a SPECIFIC scene breakdown based on exactly what the user described. Don't use templates or generic descriptions.
-
-Respond with:
-
-SUBJECT: [Exactly who is in the scene and what they're doing - be specific to the user's request]
-
-SETTING: [The exact location described - be specific and detailed]
-
-ACTION: [What specifically happens in this {duration_seconds}-second scene - timeline of events]
-
-STYLE: [Visual style that matches this specific scene]
-
-CAMERA: [Camera work that captures this particular action]
-
-LIGHTING: [Lighting that enhances this specific setting and mood]
-
-AUDIO: [Sound design for this exact scene]
-
-GENERATION_PROMPT: [Clean, detailed prompt optimized for Veo - no fluff, just the visual scene]
-
-BE SPECIFIC to the user's request. Don't use generic templates."""
+        cached_model = await self._get_context_cached_model()
+        if cached_model is not None:
+            # The session prefix already lives in the cache; send only the per-scene tail
+            model = cached_model
+            system_prompt = await self._build_gemini_prompt(user_prompt, duration_seconds, include_prefix=False)
+        else:
+            model = self._select_model(user_prompt)
+            system_prompt = await self._build_gemini_prompt(user_prompt, duration_seconds)
         
         try:
             print("Generating scene breakdown with Gemini AI...")
             
-            response = await asyncio.to_thread(
-                self.gemini_model.generate_content,
-                system_prompt,
-                generation_config=genai.types.GenerationConfig(
-                    temperature=self.temperature,
-                    max_output_tokens=2048
-                )
-            )
+            try:
+                response = await self._timed_generate(model, system_prompt)
+            except Exception as e:
+                if model is self.gemini_model:
+                    raise
+                if model is cached_model:
+                    # The context cache may have expired or been deleted server-side;
+                    # drop it (the next scene rebuilds it) and send the full prompt once
+                    print(f"⚠️ Cached-context call failed ({e}) - retrying with the full prompt")
+                    self._context_cache_prefix = None
+                    self._context_cached_model = None
+                    system_prompt = await self._build_gemini_prompt(user_prompt, duration_seconds)
+                else:
+                    print(f"⚠️ Fast model failed ({e}) - retrying with the main model")
+                response = await self._timed_generate(self.gemini_model, system_prompt)
             
             # Parse the response
             breakdown = self._parse_gemini_response(
                 response.text, duration_seconds, scene_number
             )
+            await self.breakdown_cache.set(cache_scope, user_prompt, replace(breakdown))
             return breakdown
             
         except Exception as e:
             print(f"Gemini generation failed: {e}")
             return await self._generate_mock_breakdown(user_prompt, scene_number, duration_seconds)
     
+    async def _get_context_cached_model(self):
+        """
+        Return a model whose Gemini context cache holds this session's prompt prefix.
+        
+        Returns None when caching is unavailable or the prefix is below the explicit
+        cache minimum (the usual case for the built-in instructions), in which case
+        the full prompt is sent and implicit prefix caching applies.
+        """
+        if not GEMINI_CACHING_AVAILABLE or not self.gemini_model:
+            return None
+        if self._context_cache_prefix == self._prompt_prefix and (
+            self._context_cached_model is None or time.monotonic() < self._context_cache_expires_at
+        ):
+            return self._context_cached_model
+        
+        self._context_cache_prefix = self._prompt_prefix
+        self._context_cached_model = None
+        # Rough 4-characters-per-token estimate, so small prefixes cost no API call
+        if len(self._prompt_prefix) // 4 < CONTEXT_CACHE_MIN_TOKENS:
+            return None
+        
+        try:
+            cached_content = await asyncio.to_thread(
+                caching.CachedContent.create,
+                model=self.gemini_model.model_name,
+                system_instruction=self._prompt_prefix,
+                ttl=CONTEXT_CACHE_TTL
+            )
+            self._context_cached_model = genai.GenerativeModel.from_cached_content(cached_content=cached_content)
+            self._context_cache_expires_at = (
+                time.monotonic() + CONTEXT_CACHE_TTL.total_seconds() - CONTEXT_CACHE_EXPIRY_MARGIN
+            )
+            print(f"✅ Cached the session prompt prefix in Gemini ({cached_content.name})")
+        except Exception as e:
+            print(f"⚠️ Gemini context cache unavailable - sending the full prompt: {e}")
+        return self._context_cached_model
+    
+    async def _build_gemini_prompt(
+        self,
+        user_prompt: str,
+        duration_seconds: int,
+        include_prefix: bool = True
+    ) -> str:
+        """Build the Gemini breakdown prompt for a user request (without the session prefix if cached)."""
+        
+        # Build story context
+        story_context = ""
+        scenes = self.story_scenes()
+        if scenes:
+            story_context = STORY_CONTEXT_TEMPLATE.format(
+                scene_count=len(scenes),
+                last_action=scenes[max(scenes)].action[:100]
+            )
+        
+        # Retrieve persona context from vector store
+        persona_context = await self._get_persona_context(user_prompt)
+        
+        # The session prefix never changes between scenes, so the provider can
+        # serve it from its prompt cache; only the template tail varies per request
+        return SCENE_PROMPT_TEMPLATE.format_map({
+            "prefix": self._prompt_prefix if include_prefix else "",
+            "persona_context": persona_context,
+            "user_prompt": user_prompt,
+            "duration_seconds": duration_seconds,
+            "story_context": story_context
+        })
+    
     def _parse_gemini_response(
         self, 
         response_text: str, 
@@ -319,54 +897,9 @@ BE SPECIFIC to the user's request. Don't use generic templates."""
     ) -> VideoProductionBreakdown:
         """Parse Gemini response into structured breakdown."""
         
-        lines = response_text.strip().split('\n')
-        breakdown_data = {
-            'subject': '',
-            'context_setting': '',
-            'action': '',
-            'style_aesthetic': '',
-            'camera_composition': '',
-            'lighting_ambience': '',
-            'audio_dialogue': '',
-            'generation_prompt': ''
-        }
-        
-        current_field = None
-        
-        # Parse the response
-        for line in lines:
-            line = line.strip()
-            if not line:
-                continue
-                
-            # Check for field headers
-            if line.upper().startswith('SUBJECT:'):
-                current_field = 'subject'
-                breakdown_data[current_field] = line[8:].strip()
-            elif line.upper().startswith('SETTING:'):
-                current_field = 'context_setting'
-                breakdown_data[current_field] = line[8:].strip()
-            elif line.upper().startswith('ACTION:'):
-                current_field = 'action'
-                breakdown_data[current_field] = line[7:].strip()
-            elif line.upper().startswith('STYLE:'):
-                current_field = 'style_aesthetic'
-                breakdown_data[current_field] = line[6:].strip()
-            elif line.upper().startswith('CAMERA:'):
-                current_field = 'camera_composition'
-                breakdown_data[current_field] = line[7:].strip()
-            elif line.upper().startswith('LIGHTING:'):
-                current_field = 'lighting_ambience'
-                breakdown_data[current_field] = line[9:].strip()
-            elif line.upper().startswith('AUDIO:'):
-                current_field = 'audio_dialogue'
-                breakdown_data[current_field] = line[6:].strip()
-            elif line.upper().startswith('GENERATION_PROMPT:'):
-                current_field = 'generation_prompt'
-                breakdown_data[current_field] = line[18:].strip()
-            elif current_field and line and not line.upper().startswith(('SUBJECT:', 'SETTING:', 'ACTION:', 'STYLE:', 'CAMERA:', 'LIGHTING:', 'AUDIO:', 'GENERATION_PROMPT:')):
-                # Continue previous field
-                breakdown_data[current_field] += ' ' + line
+        # One regex pass over the whole response
+        breakdown_data = dict.fromkeys(_FIELD_KEYS.values(), '')
+        breakdown_data.update(_parse_sections(response_text))
         
         # Create the breakdown object
         return VideoProductionBreakdown(
@@ -396,14 +929,19 @@ PERSONA INFO (fallback):
 - Adaptable energy and conversational style
 """
             
+            cached = self._persona_context_cache.get(user_prompt)
+            if cached and cached[0] > time.monotonic():
+                print("✅ Reusing persona context for repeated prompt")
+                return cached[1]
+            
             # Generate embedding for the user prompt to find relevant persona info
             print("🔍 Querying vector store for persona context...")
-            import sentence_transformers
-            model = sentence_transformers.SentenceTransformer('all-MiniLM-L6-v2')
-            query_embedding = model.encode(user_prompt).tolist()
+            query_embedding = await asyncio.to_thread(embed_text, user_prompt)
+            if query_embedding is None:
+                raise ImportError("sentence-transformers is not installed")
             
             results = await self.vector_store.search_similar(
-                query_embedding=query_embedding,
+                query_embedding=query_embedding,  # float32 ndarray, FAISS's native format
                 limit=5,  # Get top 5 most relevant chunks
                 metadata_filter={}  # Will use any available persona
             )
@@ -425,6 +963,9 @@ PERSONA INFO (fallback):
                 if context_parts:
                     persona_context = "\n\nPERSONA INFO (from your embeddings):\n" + "\n\n".join(context_parts[:3])
                     print(f"✅ Built persona context from {len(context_parts[:3])} chunks")
+                    self._persona_context_cache[user_prompt] = (
+                        time.monotonic() + PERSONA_CONTEXT_TTL, persona_context
+                    )
                     return persona_context
             
             # If we got here, no results or empty results
@@ -472,6 +1013,25 @@ PERSONA INFO (fallback - error occurred):
             scene_transitions=None
         )
     
+    def format_breakdown_output(self, breakdown: VideoProductionBreakdown, scene_number: int) -> str:
+        """Render a breakdown as a readable production sheet."""
+        sections = [
+            ("SUBJECT", breakdown.subject),
+            ("SETTING", breakdown.context_setting),
+            ("ACTION", breakdown.action),
+            ("STYLE", breakdown.style_aesthetic),
+            ("CAMERA", breakdown.camera_composition),
+            ("LIGHTING", breakdown.lighting_ambience),
+            ("AUDIO", breakdown.audio_dialogue),
+            ("PACING", breakdown.pacing_notes),
+            ("GENERATION PROMPT", breakdown.generation_prompt)
+        ]
+        lines = [f"SCENE {scene_number} ({breakdown.duration_seconds}s)", ""]
+        lines.extend(f"{title}: {text}" for title, text in sections if text)
+        if breakdown.personas_involved:
+            lines.append(f"PERSONAS: {', '.join(breakdown.personas_involved)}")
+        return "\n".join(lines)
+    
     async def get_video_generation_script(
         self,
         breakdown: VideoProductionBreakdown,
@@ -479,6 +1039,25 @@ PERSONA INFO (fallback - error occurred):
         aspect_ratio: str = "16:9"
     ) -> Dict[str, Any]:
         """Convert breakdown into Veo-ready video generation script."""
+        task = breakdown._script_task
+        if task is not None:
+            try:
+                script = await task
+            except Exception:
+                pass  # Prefetch failed; build the script below instead
+            else:
+                # Callers adjust top-level keys, so each gets its own copy
+                return dict(script, quality=quality, aspect_ratio=aspect_ratio)
+        
+        return await self._build_video_generation_script(breakdown, quality, aspect_ratio)
+    
+    async def _build_video_generation_script(
+        self,
+        breakdown: VideoProductionBreakdown,
+        quality: str = "standard",
+        aspect_ratio: str = "16:9"
+    ) -> Dict[str, Any]:
+        """Build the Veo script for a breakdown."""
         
         # The generation_prompt is already optimized for Veo by Gemini
         video_prompt = breakdown.generation_prompt
@@ -488,7 +1067,7 @@ PERSONA INFO (fallback - error occurred):
             video_prompt = f"{breakdown.subject}. {breakdown.context_setting}. {breakdown.action}"
         
         # Load reference images for subject consistency (YOUR face/body)
-        reference_images = self._get_reference_images_for_personas(breakdown.personas_involved)
+        reference_images = await self._get_reference_images_for_personas(breakdown.personas_involved)
         
         return {
             "prompt": video_prompt,
@@ -508,47 +1087,66 @@ PERSONA INFO (fallback - error occurred):
             }
         }
     
-    def _get_reference_images_for_personas(self, personas: List[str]) -> List[str]:
+    async def _get_reference_images_for_personas(self, personas: List[str]) -> List[str]:
         """Get reference image paths for the personas in the scene."""
-        import json
-        from pathlib import Path
+        # Only scenes featuring a persona get reference images
+        if personas and not any(persona == "default_persona" or persona in self.persona_ids for persona in personas):
+            return []
         
-        reference_images = []
-        
-        # Check if any persona is in the scene
-        if not personas or any(persona in ["default_persona"] + list(self.active_personas.keys()) for persona in personas):
-            # Load reference frame manifest - find first available persona
-            personas_dir = Path(__file__).parent.parent / "personas"
+        # The manifests are read once per story session, not once per scene, and
+        # off the event loop so other scenes keep being served meanwhile
+        if self._reference_images is None:
+            self._reference_images = await asyncio.to_thread(self._load_reference_images)
+        return list(self._reference_images)
+    
+    def _load_reference_images(self) -> Tuple[str, ...]:
+        """Load the neutral reference frames of the first persona with a manifest."""
+        # Get first available persona
+        for persona_dir in self._persona_dirs:
+            manifest_path = persona_dir / "reference_frames" / "manifest.json"
             
-            if personas_dir.exists():
-                # Get first available persona
-                persona_dirs = [d for d in personas_dir.iterdir() if d.is_dir() and d.name != "example_persona"]
-                
-                for persona_dir in persona_dirs:
-                    manifest_path = persona_dir / "reference_frames" / "manifest.json"
+            if manifest_path.exists():
+                try:
+                    raw_manifest = manifest_path.read_bytes()
+                    manifest = orjson.loads(raw_manifest) if ORJSON_AVAILABLE else json.loads(raw_manifest)
                     
-                    if manifest_path.exists():
-                        try:
-                            with open(manifest_path, 'r') as f:
-                                manifest = json.load(f)
-                            
-                            # Get neutral frames as primary reference (most versatile)
-                            if "neutral" in manifest.get("reference_frames", {}):
-                                reference_images.extend(manifest["reference_frames"]["neutral"])
-                                print(f"✅ Loaded {len(manifest['reference_frames']['neutral'])} reference images from {persona_dir.name}")
-                                break  # Use first available persona
-                        except Exception as e:
-                            print(f"⚠️ Could not load reference images from {persona_dir.name}: {e}")
-        
-        return reference_images
-    
-    async def export_story(self) -> Dict[str, Any]:
-        """Export the current story session."""
+                    # Get neutral frames as primary reference (most versatile)
+                    if "neutral" in manifest.get("reference_frames", {}):
+                        reference_images = tuple(manifest["reference_frames"]["neutral"])
+                        print(f"✅ Loaded {len(reference_images)} reference images from {persona_dir.name}")
+                        return reference_images  # Use first available persona
+                except Exception as e:
+                    print(f"⚠️ Could not load reference images from {persona_dir.name}: {e}")
+        
+        return ()
+    
+    async def export_story(self, story_id: str = None) -> Dict[str, Any]:
+        """Export a story session (the current one by default)."""
+        story_id = story_id or self.current_story_id
+        scenes = [scene for _, scene in sorted(self.story_scenes(story_id).items())]
         return {
-            "story_id": self.current_story_id,
-            "scenes": [s.to_dict() for s in self.scenes],
-            "scene_count": len(self.scenes),
-            "total_duration": sum(self.scene_durations),
+            "story_id": story_id,
+            "scenes": [s.to_dict() for s in scenes],
+            "scene_count": len(scenes),
+            "total_duration": sum(s.duration_seconds for s in scenes),
             "target_duration": self.target_video_duration,
-            "active_personas": list(self.active_personas.keys())
-        }
\ No newline at end of file
+            "active_personas": self.persona_ids
+        }
+    
+    async def export_story_json(self, story_id: str = None) -> bytes:
+        """Export a story session as encoded JSON, ready to send as a response body."""
+        story = await self.export_story(story_id)
+        if ORJSON_AVAILABLE:
+            return orjson.dumps(story)
+        return json.dumps(story, separators=(",", ":")).encode("utf-8")
+    
+    def get_status(self) -> Dict[str, Any]:
+        """Get agent status, including per-model Gemini latency percentiles."""
+        return {
+            "gemini_model": getattr(self.gemini_model, "model_name", None),
+            "fast_model": FAST_MODEL_NAME if self.gemini_model else None,
+            "model_latency": _latency_summary(),
+            "current_story_id": self.current_story_id,
+            "stories": len(self.scenes),
+            "active_personas": self.persona_ids
+        }
@@ -0,0 +1,143 @@
+"""
+Semantic response cache for CINEGEN breakdowns.
+Serves repeated and near-duplicate prompts from memory instead of calling Gemini again.
+"""
+import asyncio
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Callable, Hashable, Optional, Tuple
+
+from .embeddings import embed_prompt
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+
+class SemanticResponseCache:
+    """
+    LRU cache with a TTL, keyed by a scope plus the meaning of a prompt.
+    
+    A lookup first tries the normalized prompt text, then the cached prompt in the
+    same scope with the highest cosine similarity above the threshold. Without
+    sentence-transformers only exact (normalized) matches hit.
+    """
+    
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        ttl_seconds: float = 3600.0,
+        similarity_threshold: float = 0.95,
+        embed: Optional[Callable[[str], Optional["np.ndarray"]]] = embed_prompt
+    ):
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        # get() and set() embed the same prompt back to back on a miss
+        self._embed = lru_cache(maxsize=256)(embed) if embed else None
+        # (scope, normalized prompt) -> (expires_at, value, embedding)
+        self._entries: "OrderedDict[Tuple[Hashable, str], Tuple[float, Any, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+    
+    @staticmethod
+    def _normalize(prompt: str) -> str:
+        """Case- and whitespace-insensitive form of a prompt."""
+        return " ".join(prompt.lower().split())
+    
+    async def _embedding(self, text: str) -> Optional["np.ndarray"]:
+        """Embed text off the event loop; None if embeddings are unavailable."""
+        if self._embed is None:
+            return None
+        try:
+            return await asyncio.to_thread(self._embed, text)
+        except Exception as e:
+            print(f"⚠️ Semantic cache embedding failed, using exact matches only: {e}")
+            self._embed = None
+            return None
+    
+    async def get(self, scope: Hashable, prompt: str) -> Optional[Any]:
+        """
+        Return the cached value for a prompt in the given scope.
+        
+        Args:
+            scope: Hashable partition key (e.g. persona set and duration)
+            prompt: User prompt text
+        
+        Returns:
+            Cached value, or None on a miss
+        """
+        now = time.monotonic()
+        key = (scope, self._normalize(prompt))
+        entry = self._entries.get(key)
+        
+        if entry is None or entry[0] <= now:
+            key = await self._closest_key(scope, key[1], now)
+            entry = self._entries.get(key) if key else None
+        
+        if entry is None:
+            self.misses += 1
+            return None
+        
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+    
+    async def _closest_key(self, scope: Hashable, text: str, now: float) -> Optional[Tuple[Hashable, str]]:
+        """Find the live entry in scope whose prompt is most similar to text."""
+        candidates = [
+            (key, embedding) for key, (expires_at, _, embedding) in self._entries.items()
+            if key[0] == scope and expires_at > now and embedding is not None
+        ]
+        if not candidates:
+            return None
+        
+        query = await self._embedding(text)
+        if query is None:
+            return None
+        
+        # Embeddings are unit length, so one matrix-vector product gives every cosine
+        similarities = np.stack([embedding for _, embedding in candidates]) @ query
+        best = int(np.argmax(similarities))
+        if similarities[best] < self.similarity_threshold:
+            return None
+        return candidates[best][0]
+    
+    async def set(self, scope: Hashable, prompt: str, value: Any):
+        """
+        Cache a value for a prompt in the given scope.
+        
+        Args:
+            scope: Hashable partition key (e.g. persona set and duration)
+            prompt: User prompt text
+            value: Value to return for this and similar prompts
+        """
+        text = self._normalize(prompt)
+        embedding = await self._embedding(text)
+        key = (scope, text)
+        
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value, embedding)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+    
+    def invalidate(self, predicate: Callable[[Hashable], bool]):
+        """Drop every entry whose scope matches predicate (e.g. after the underlying data changed)."""
+        for key in [key for key in self._entries if predicate(key[0])]:
+            del self._entries[key]
+    
+    def clear(self):
+        """Drop every cached entry."""
+        self._entries.clear()
+    
+    def get_stats(self) -> dict:
+        """Get cache size and hit/miss counters."""
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses
+        }
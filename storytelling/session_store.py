@@ -0,0 +1,117 @@
+"""
+Local persistence for CINEGEN story sessions.
+Lets a restarted (or different) worker pick a story up where it left off.
+"""
+import asyncio
+import json
+import logging
+import os
+import re
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+try:
+    import aiofiles
+    AIOFILES_AVAILABLE = True
+except ImportError:
+    AIOFILES_AVAILABLE = False
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SESSION_DIR = os.getenv("CINEGEN_SESSION_DIR", "sessions")
+
+# Story IDs come from URL paths, so only plain names may become file names
+_SAFE_STORY_ID = re.compile(r"^[A-Za-z0-9_-]{1,128}$")
+
+
+class SessionStore:
+    """
+    One JSON document per story, written atomically.
+    
+    File IO goes through aiofiles (or a worker thread without it), so saving
+    and restoring sessions never blocks the event loop.
+    """
+    
+    def __init__(self, session_dir: str = DEFAULT_SESSION_DIR):
+        self.session_dir = Path(session_dir)
+        try:
+            self.session_dir.mkdir(parents=True, exist_ok=True)
+        except OSError as e:
+            logger.warning("Story sessions will not persist (%s): %s", self.session_dir, e)
+    
+    def _path(self, story_id: str) -> Optional[Path]:
+        """File holding a story's session, or None for IDs that are not safe file names."""
+        if not _SAFE_STORY_ID.match(story_id):
+            return None
+        return self.session_dir / f"{story_id}.json"
+    
+    async def save(self, story_id: str, state: Dict[str, Any]) -> bool:
+        """
+        Persist a story session.
+        
+        Args:
+            story_id: Story identifier
+            state: JSON-serializable session state
+        
+        Returns:
+            True if the session was written
+        """
+        path = self._path(story_id)
+        if path is None:
+            return False
+        
+        if ORJSON_AVAILABLE:
+            data = orjson.dumps(state)
+        else:
+            data = json.dumps(state, separators=(",", ":")).encode("utf-8")
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            if AIOFILES_AVAILABLE:
+                async with aiofiles.open(tmp_path, "wb") as f:
+                    await f.write(data)
+            else:
+                await asyncio.to_thread(tmp_path.write_bytes, data)
+            # Readers only ever see a complete file
+            await asyncio.to_thread(os.replace, tmp_path, path)
+            return True
+        except OSError as e:
+            logger.warning("Could not save story session %s: %s", story_id, e)
+            return False
+    
+    async def load(self, story_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Load a persisted story session.
+        
+        Args:
+            story_id: Story identifier
+        
+        Returns:
+            Session state, or None if the story was never saved
+        """
+        path = self._path(story_id)
+        if path is None:
+            return None
+        
+        try:
+            if AIOFILES_AVAILABLE:
+                async with aiofiles.open(path, "rb") as f:
+                    data = await f.read()
+            else:
+                data = await asyncio.to_thread(path.read_bytes)
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            logger.warning("Could not read story session %s: %s", story_id, e)
+            return None
+        
+        try:
+            return orjson.loads(data) if ORJSON_AVAILABLE else json.loads(data)
+        except ValueError as e:
+            logger.warning("Ignoring corrupt story session %s: %s", story_id, e)
+            return None
@@ -2,12 +2,104 @@
 Story Memory System for CINEGEN Agent.
 Manages story continuity and persona context using vector embeddings.
 """
+import asyncio
 import json
+import logging
+import re
+import time
 import uuid
-from typing import Dict, Any, List, Optional
-from datetime import datetime, timedelta
+from collections import Counter
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, AsyncIterator, Tuple
 from storage.vector_store import VectorStore
 from storage.db import DatabaseClient
+from .embeddings import embed_text, get_embedder
+from .semantic_cache import SemanticResponseCache
+
+try:
+    import numpy as np
+    from .arc_kernels import consecutive_cosine
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Story events are embedded and written in batches: whatever arrives within this
+# window (up to the batch size) shares one encode pass and one vector store write
+EVENT_FLUSH_INTERVAL = 0.1  # seconds
+EVENT_FLUSH_MAX_BATCH = 32
+# Recent memories are read from the vector store in pages of this size
+STORY_CONTEXT_PAGE_SIZE = 25
+
+# Fixed query behind get_emotional_context; embedded once per StoryMemory
+EMOTIONAL_QUERY = "emotion mood feeling atmosphere tone"
+
+# Traits a persona's embeddings are scored against
+BASE_TRAITS = (
+    "confident", "creative", "analytical", "empathetic", "energetic",
+    "thoughtful", "expressive", "calm", "dynamic", "authentic"
+)
+TOP_TRAITS = 5
+
+# Mean change between consecutive memory embeddings (1 - cosine) that counts as
+# slow or fast pacing, and the per-step change in it that counts as a trend
+SLOW_PACING_DRIFT = 0.2
+FAST_PACING_DRIFT = 0.5
+PACING_TREND_STEP = 0.05
+
+
+@lru_cache(maxsize=1)
+def trait_axes() -> Optional["np.ndarray"]:
+    """Unit-length (T, D) embeddings of BASE_TRAITS, computed once (None without an embedder)."""
+    model = get_embedder()
+    if model is None or not NUMPY_AVAILABLE:
+        return None
+    return np.asarray(model.encode(list(BASE_TRAITS), normalize_embeddings=True), dtype=np.float32)
+
+
+# Mood keywords, in priority order when a memory mentions several moods
+MOOD_KEYWORDS = {
+    "positive": ("happy", "joy", "excited", "celebration"),
+    "negative": ("sad", "melancholy", "loss", "grief"),
+    "dramatic": ("tense", "conflict", "dramatic", "intense")
+}
+KEYWORD_MOODS = {keyword: mood for mood, keywords in MOOD_KEYWORDS.items() for keyword in keywords}
+# One alternation over the whole lexicon (substring matches, like "sad" in "sadness")
+MOOD_RE = re.compile("|".join(sorted(KEYWORD_MOODS, key=len, reverse=True)))
+# Moods by the integer code stored with each memory
+MOODS = (*MOOD_KEYWORDS, "neutral")
+MOOD_CODES = {mood: code for code, mood in enumerate(MOODS)}
+
+
+def classify_mood(content: str) -> str:
+    """Highest-priority mood mentioned in content ("neutral" if none)."""
+    found = {KEYWORD_MOODS[keyword] for keyword in MOOD_RE.findall(content.lower())}
+    return next((mood for mood in MOOD_KEYWORDS if mood in found), "neutral")
+
+
+@dataclass(slots=True, frozen=True)
+class MemoryEntry:
+    """One story event waiting to be embedded and stored."""
+    id: str
+    story_id: str
+    event_type: str
+    content: str
+    # JSON-encoded: vector store backends only accept flat metadata values
+    metadata: str
+    # Wall-clock nanoseconds (time.time_ns); format only when displayed
+    timestamp_ns: int
+    # Index into MOODS, classified once at write time
+    mood_code: int
+
+
+def _memory_field(memory: Dict[str, Any], key: str) -> Any:
+    """Field of a retrieved memory (stored entries keep their fields in the row metadata)."""
+    metadata = memory.get("metadata")
+    if isinstance(metadata, dict) and key in metadata:
+        return metadata[key]
+    return memory.get(key)
 
 
 class StoryMemory:
@@ -16,6 +108,11 @@ class StoryMemory:
     Integrates with SoRa Core's vector store for embedding-based memory.
     """
     
+    __slots__ = (
+        "vector_store", "db_client", "memory_table", "context_type", "context_cache",
+        "_pending_events", "_flusher_task", "_emotional_query_embedding", "_backend_name"
+    )
+    
     def __init__(
         self,
         vector_store: VectorStore = None,
@@ -27,63 +124,126 @@ class StoryMemory:
         self.db_client = db_client or DatabaseClient()
         self.memory_table = memory_table
         self.context_type = context_type
+        self._backend_name = type(self.vector_store).__name__
+        # Recurring queries (e.g. the fixed emotional-context query) and near-duplicates
+        # reuse earlier search results until the story gains a new memory
+        self.context_cache = SemanticResponseCache(maxsize=256, ttl_seconds=600, similarity_threshold=0.9)
+        # (memory entry, future) pairs waiting for the background flusher
+        self._pending_events: Optional[asyncio.Queue] = None
+        self._flusher_task: Optional[asyncio.Task] = None
+        self._emotional_query_embedding: Optional["np.ndarray"] = None
         
-        print(f"🧠 Story Memory initialized")
-        print(f"   Table: {self.memory_table}")
-        print(f"   Context Type: {self.context_type}")
+        logger.info("Story Memory initialized (table: %s, context type: %s)", self.memory_table, self.context_type)
     
     async def store_story_event(
         self,
         story_id: str,
         event_type: str,
         content: str,
-        metadata: Dict[str, Any] = None
+        metadata: Dict[str, Any] = None,
+        wait_for_flush: bool = False
     ) -> str:
         """
         Store a story event with embedding for semantic search.
         
+        Events are queued and embedded/written in batches by a background task,
+        so by default this returns as soon as the event is queued.
+        
         Args:
             story_id: Unique story session ID
             event_type: Type of event (scene_generated, persona_interaction, etc.)
             content: Text content to embed
             metadata: Additional metadata
+            wait_for_flush: Wait until the event's batch has been written
             
         Returns:
-            Memory entry ID
+            Memory entry ID (None if wait_for_flush and the write failed)
         """
-        entry_id = str(uuid.uuid4())
+        entry_id = uuid.uuid4().hex
+        
+        memory_entry = MemoryEntry(
+            id=entry_id,
+            story_id=story_id,
+            event_type=event_type,
+            content=content,
+            metadata=json.dumps(metadata or {}),
+            timestamp_ns=time.time_ns(),
+            mood_code=MOOD_CODES[classify_mood(content)]
+        )
+        
+        if self._flusher_task is None or self._flusher_task.done():
+            self._pending_events = asyncio.Queue()
+            self._flusher_task = asyncio.create_task(self._flush_events())
+        
+        future = asyncio.get_running_loop().create_future()
+        await self._pending_events.put((memory_entry, future))
         
+        if wait_for_flush and not await future:
+            return None
+        return entry_id
+    
+    async def _flush_events(self):
+        """Drain queued story events, embedding and storing up to EVENT_FLUSH_MAX_BATCH at once."""
+        queue = self._pending_events
+        loop = asyncio.get_running_loop()
+        
+        while True:
+            batch = [await queue.get()]
+            deadline = loop.time() + EVENT_FLUSH_INTERVAL
+            
+            while len(batch) < EVENT_FLUSH_MAX_BATCH:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            
+            stored = await self._store_events([entry for entry, _ in batch])
+            for _, future in batch:
+                if not future.done():
+                    future.set_result(stored)
+                queue.task_done()
+    
+    async def _store_events(self, entries: List[MemoryEntry]) -> bool:
+        """Embed a batch of memory entries in one encode pass and store them in one write."""
         try:
-            # Create memory entry
-            memory_entry = {
-                "id": entry_id,
-                "story_id": story_id,
-                "event_type": event_type,
-                "content": content,
-                "metadata": metadata or {},
-                "timestamp": datetime.utcnow().isoformat()
-            }
+            model = get_embedder()
+            if model is None:
+                raise ImportError("sentence-transformers is not installed")
             
-            # Store in vector store with embedding
-            await self.vector_store.store_memory(
-                collection_name=self.memory_table,
-                entry_id=entry_id,
-                content=content,
-                metadata=memory_entry
+            embeddings = await asyncio.to_thread(model.encode, [entry.content for entry in entries])
+            stored = await self.vector_store.store_embeddings_batch(
+                [entry.id for entry in entries], embeddings, [asdict(entry) for entry in entries]
             )
             
-            print(f"💾 Stored story memory: {event_type} ({entry_id[:8]})")
-            return entry_id
+            # Cached search results for these stories no longer include every memory
+            story_ids = {entry.story_id for entry in entries}
+            self.context_cache.invalidate(lambda scope: scope[0] in story_ids)
+            
+            logger.info("Stored %d story memories", len(entries))
+            return stored
             
         except Exception as e:
-            print(f"❌ Error storing story memory: {e}")
-            return None
+            logger.error("Error storing story memory: %s", e)
+            return False
+    
+    async def aclose(self):
+        """Write any queued story events, then stop the background flusher."""
+        if self._flusher_task is None:
+            return
+        if not self._flusher_task.done():
+            await self._pending_events.join()
+            self._flusher_task.cancel()
+        self._flusher_task = None
     
     async def retrieve_story_context(
         self,
         story_id: str,
         query: str = None,
-        limit: int = 5
+        limit: int = 5,
+        query_embedding: "np.ndarray" = None
     ) -> List[Dict[str, Any]]:
         """
         Retrieve relevant story context for continuity.
@@ -92,34 +252,87 @@ class StoryMemory:
             story_id: Story session ID
             query: Optional semantic query for relevant memories
             limit: Maximum number of memories to return
+            query_embedding: Precomputed embedding of query (skips the encode)
             
         Returns:
             List of relevant memory entries
         """
         try:
             if query:
+                cache_scope = (story_id, limit)
+                cached_results = await self.context_cache.get(cache_scope, query)
+                if cached_results is not None:
+                    logger.debug("Reused %d cached story memories", len(cached_results))
+                    return list(cached_results)
+                
+                if query_embedding is None:
+                    query_embedding = await asyncio.to_thread(embed_text, query)
+                    if query_embedding is None:
+                        raise ImportError("sentence-transformers is not installed")
+                
                 # Semantic search for relevant memories
                 results = await self.vector_store.search_similar(
-                    collection_name=self.memory_table,
-                    query_text=query,
+                    query_embedding=query_embedding,
                     limit=limit,
-                    filter_metadata={"story_id": story_id}
+                    metadata_filter={"story_id": story_id}
                 )
+                await self.context_cache.set(cache_scope, query, list(results))
             else:
-                # Get recent memories for this story
-                results = await self.vector_store.get_recent_memories(
-                    collection_name=self.memory_table,
-                    story_id=story_id,
-                    limit=limit
-                )
+                # Get recent memories for this story, newest first
+                results = [
+                    memory async for memory in self.iter_story_context(story_id, limit=limit, newest_first=True)
+                ]
             
-            print(f"🔍 Retrieved {len(results)} story memories")
+            logger.debug("Retrieved %d story memories", len(results))
             return results
             
         except Exception as e:
-            print(f"❌ Error retrieving story context: {e}")
+            logger.error("Error retrieving story context: %s", e)
             return []
     
+    async def iter_story_context(
+        self,
+        story_id: str,
+        query: str = None,
+        limit: int = 50,
+        newest_first: bool = False
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Yield story memories one at a time, so callers can aggregate or stop early.
+        
+        A semantic query is answered by one search. Recent memories are read in
+        pages of STORY_CONTEXT_PAGE_SIZE, and pages after the caller stops are
+        never fetched.
+        
+        Args:
+            story_id: Story session ID
+            query: Optional semantic query for relevant memories
+            limit: Maximum number of memories to yield
+            newest_first: Yield recent memories newest first (by timestamp_ns)
+            
+        Yields:
+            Memory entries
+        """
+        if query:
+            for memory in await self.retrieve_story_context(story_id, query, limit):
+                yield memory
+            return
+        
+        offset = 0
+        while offset < limit:
+            page_size = min(STORY_CONTEXT_PAGE_SIZE, limit - offset)
+            page = await self.vector_store.list_embeddings(
+                limit=page_size,
+                offset=offset,
+                metadata_filter={"story_id": story_id},
+                newest_first=newest_first
+            )
+            for memory in page:
+                yield memory
+            if len(page) < page_size:
+                return
+            offset += page_size
+    
     async def get_persona_traits(
         self,
         persona_id: str,
@@ -136,20 +349,19 @@ class StoryMemory:
             Persona traits and characteristics
         """
         try:
-            # Get persona embeddings and analyze for traits
-            embeddings = await self.vector_store.get_persona_embeddings(persona_id)
+            # Get persona embeddings (one (N, D) matrix) and analyze for traits
+            _, embeddings = await self.vector_store.get_persona_embeddings(persona_id)
             
-            if not embeddings:
+            if not len(embeddings):
                 return {"traits": [], "characteristics": []}
             
-            # Mock trait extraction - in real implementation would use ML
             traits = await self._extract_persona_traits(embeddings, trait_type)
             
-            print(f"🎭 Retrieved persona traits for {persona_id}")
+            logger.debug("Retrieved persona traits for %s", persona_id)
             return traits
             
         except Exception as e:
-            print(f"❌ Error getting persona traits: {e}")
+            logger.error("Error getting persona traits: %s", e)
             return {"traits": [], "characteristics": []}
     
     async def analyze_story_arc(self, story_id: str) -> Dict[str, Any]:
@@ -163,26 +375,85 @@ class StoryMemory:
             Story arc analysis and suggestions
         """
         try:
-            # Get all story memories
-            memories = await self.retrieve_story_context(story_id, limit=50)
-            
-            if not memories:
-                return {
-                    "arc_stage": "beginning",
-                    "emotional_progression": "neutral",
-                    "suggestions": ["Establish setting and character", "Introduce conflict or goal"]
-                }
+            memory_count, scene_count, embeddings, _ = await self._scan_story(story_id)
             
             # Analyze story progression
-            analysis = await self._analyze_narrative_arc(memories)
+            analysis = self._story_arc(memory_count, scene_count, embeddings)
             
-            print(f"📊 Analyzed story arc for {story_id}")
+            logger.debug("Analyzed story arc for %s", story_id)
             return analysis
             
         except Exception as e:
-            print(f"❌ Error analyzing story arc: {e}")
+            logger.error("Error analyzing story arc: %s", e)
             return {"error": str(e)}
     
+    async def get_story_snapshot(self, story_id: str) -> Dict[str, Any]:
+        """
+        Story arc and emotional context from a single pass over the story's memories.
+        
+        Use this instead of calling analyze_story_arc and get_emotional_context
+        back to back: one vector store read serves both. The emotional context
+        comes from the most recent memories rather than a semantic search.
+        
+        Args:
+            story_id: Story session ID
+            
+        Returns:
+            {"arc": story arc analysis, "emotion": emotional context}
+        """
+        try:
+            memory_count, scene_count, embeddings, recent = await self._scan_story(story_id, recent=3)
+            
+            snapshot = {
+                "arc": self._story_arc(memory_count, scene_count, embeddings),
+                "emotion": await self._extract_emotional_context(recent)
+            }
+            
+            logger.debug("Built story snapshot for %s", story_id)
+            return snapshot
+            
+        except Exception as e:
+            logger.error("Error building story snapshot: %s", e)
+            return {"arc": {"error": str(e)}, "emotion": {"mood": "neutral", "energy": "balanced"}}
+    
+    async def _scan_story(
+        self,
+        story_id: str,
+        recent: int = 0
+    ) -> Tuple[int, int, List[Any], List[Dict[str, Any]]]:
+        """
+        Stream a story's 50 latest memories once, keeping only the counts, the
+        embeddings and the `recent` newest memories (both in story order).
+        """
+        memory_count = 0
+        scene_count = 0
+        embeddings = []
+        last_memories = []
+        async for memory in self.iter_story_context(story_id, limit=50, newest_first=True):
+            memory_count += 1
+            if _memory_field(memory, "event_type") == "scene_generated":
+                scene_count += 1
+            # Chroma returns vectors as arrays, which have no truth value
+            embedding = memory.get("embedding")
+            if embedding is not None and len(embedding):
+                embeddings.append(embedding)
+            if len(last_memories) < recent:
+                last_memories.append(memory)
+        # Read newest first, so the window is the latest beats; analysis wants story order
+        embeddings.reverse()
+        last_memories.reverse()
+        return memory_count, scene_count, embeddings, last_memories
+    
+    def _story_arc(self, memory_count: int, scene_count: int, embeddings: List[Any]) -> Dict[str, Any]:
+        """Arc analysis for a scanned story (a fixed opening suggestion when it has no memories)."""
+        if not memory_count:
+            return {
+                "arc_stage": "beginning",
+                "emotional_progression": "neutral",
+                "suggestions": ["Establish setting and character", "Introduce conflict or goal"]
+            }
+        return self._analyze_narrative_arc(scene_count, embeddings)
+    
     async def get_emotional_context(
         self,
         story_id: str,
@@ -199,36 +470,41 @@ class StoryMemory:
             Emotional context and mood suggestions
         """
         try:
-            # Get recent emotional beats from story
-            query = "emotion mood feeling atmosphere tone"
-            memories = await self.retrieve_story_context(story_id, query, limit=3)
+            # Get recent emotional beats from story; the query never changes, so
+            # it is embedded on the first call only
+            if self._emotional_query_embedding is None:
+                self._emotional_query_embedding = await asyncio.to_thread(embed_text, EMOTIONAL_QUERY)
+            memories = await self.retrieve_story_context(
+                story_id, EMOTIONAL_QUERY, limit=3,
+                query_embedding=self._emotional_query_embedding
+            )
             
             # Extract emotional progression
             emotional_context = await self._extract_emotional_context(memories)
             
-            print(f"💭 Retrieved emotional context for story {story_id}")
+            logger.debug("Retrieved emotional context for story %s", story_id)
             return emotional_context
             
         except Exception as e:
-            print(f"❌ Error getting emotional context: {e}")
+            logger.error("Error getting emotional context: %s", e)
             return {"mood": "neutral", "energy": "balanced"}
     
     async def _extract_persona_traits(
         self,
-        embeddings: List[Dict[str, Any]],
+        embeddings: "np.ndarray",
         trait_type: str = None
     ) -> Dict[str, Any]:
-        """Extract personality traits from persona embeddings (mock implementation)."""
+        """Rank BASE_TRAITS by how close they sit to a persona's (N, D) embeddings."""
         
-        # Mock trait extraction - real implementation would use ML analysis
-        base_traits = [
-            "confident", "creative", "analytical", "empathetic", "energetic",
-            "thoughtful", "expressive", "calm", "dynamic", "authentic"
-        ]
-        
-        # Simulate trait extraction based on embedding count and metadata
-        num_traits = min(len(embeddings), 5)
-        selected_traits = base_traits[:num_traits]
+        axes = await asyncio.to_thread(trait_axes)
+        if axes is not None and np.ndim(embeddings) == 2 and np.shape(embeddings)[1] == axes.shape[1]:
+            # One matmul scores every embedding against every trait (N x T)
+            scores = np.asarray(embeddings, dtype=np.float32) @ axes.T
+            top = np.argsort(-scores.mean(axis=0))[:TOP_TRAITS]
+            selected_traits = [BASE_TRAITS[index] for index in top]
+        else:
+            # No embedder (or embeddings from another model): fall back to the fixed list
+            selected_traits = list(BASE_TRAITS[:min(len(embeddings), TOP_TRAITS)])
         
         characteristics = [
             "Natural speaking rhythm with authentic pauses",
@@ -244,10 +520,8 @@ class StoryMemory:
             "embedding_count": len(embeddings)
         }
     
-    async def _analyze_narrative_arc(self, memories: List[Dict[str, Any]]) -> Dict[str, Any]:
-        """Analyze narrative progression from story memories (mock implementation)."""
-        
-        scene_count = len([m for m in memories if m.get("event_type") == "scene_generated"])
+    def _analyze_narrative_arc(self, scene_count: int, embeddings: List[Any]) -> Dict[str, Any]:
+        """Analyze narrative progression from a story's scene count and memory embeddings (mock implementation)."""
         
         if scene_count <= 1:
             arc_stage = "beginning"
@@ -266,34 +540,57 @@ class StoryMemory:
             "arc_stage": arc_stage,
             "scene_count": scene_count,
             "emotional_progression": "building",
-            "pacing": "balanced",
+            **self._analyze_pacing(embeddings),
             "suggestions": suggestions
         }
     
+    @staticmethod
+    def _analyze_pacing(embeddings: List[Any]) -> Dict[str, str]:
+        """Classify pacing from how far consecutive memory embeddings (in story order) drift apart."""
+        if not NUMPY_AVAILABLE or len(embeddings) < 3 or len({len(e) for e in embeddings}) != 1:
+            return {"pacing": "balanced", "pacing_trend": "steady"}
+        
+        drift = 1.0 - consecutive_cosine(np.asarray(embeddings, dtype=np.float32))
+        mean_drift = float(drift.mean())
+        gradient = float(np.diff(drift).mean())
+        
+        if mean_drift < SLOW_PACING_DRIFT:
+            pacing = "slow"
+        elif mean_drift > FAST_PACING_DRIFT:
+            pacing = "fast"
+        else:
+            pacing = "balanced"
+        
+        if gradient > PACING_TREND_STEP:
+            trend = "accelerating"
+        elif gradient < -PACING_TREND_STEP:
+            trend = "decelerating"
+        else:
+            trend = "steady"
+        
+        return {"pacing": pacing, "pacing_trend": trend}
+    
     async def _extract_emotional_context(self, memories: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Extract emotional context from recent memories (mock implementation)."""
         
         if not memories:
             return {"mood": "neutral", "energy": "balanced", "tone": "conversational"}
         
-        # Mock emotional analysis
-        recent_moods = []
+        # Moods are classified when a memory is stored; memories stored without
+        # a mood code fall back to one regex scan
+        codes = []
         for memory in memories:
-            content = memory.get("content", "").lower()
-            if any(word in content for word in ["happy", "joy", "excited", "celebration"]):
-                recent_moods.append("positive")
-            elif any(word in content for word in ["sad", "melancholy", "loss", "grief"]):
-                recent_moods.append("negative")
-            elif any(word in content for word in ["tense", "conflict", "dramatic", "intense"]):
-                recent_moods.append("dramatic")
-            else:
-                recent_moods.append("neutral")
+            code = _memory_field(memory, "mood_code")
+            if code is None:
+                code = MOOD_CODES[classify_mood(_memory_field(memory, "content") or "")]
+            codes.append(int(code))
+        recent_moods = [MOODS[code] for code in codes]
         
         # Determine overall emotional context
-        if recent_moods:
-            dominant_mood = max(set(recent_moods), key=recent_moods.count)
+        if NUMPY_AVAILABLE:
+            dominant_mood = MOODS[int(np.bincount(np.asarray(codes, dtype=np.int8), minlength=len(MOODS)).argmax())]
         else:
-            dominant_mood = "neutral"
+            dominant_mood = Counter(recent_moods).most_common(1)[0][0]
         
         return {
             "mood": dominant_mood,
@@ -305,20 +602,25 @@ class StoryMemory:
     async def cleanup_old_memories(self, days_old: int = 30) -> int:
         """Clean up old story memories to maintain performance."""
         try:
-            cutoff_date = datetime.utcnow() - timedelta(days=days_old)
+            # Integer timestamps make this one range delete instead of parsing every date
+            cutoff_ns = time.time_ns() - days_old * 86_400 * 1_000_000_000
+            deleted = await self.vector_store.delete_older_than(cutoff_ns)
+            
+            # Cached searches may still list the deleted memories
+            if deleted:
+                self.context_cache.clear()
             
-            # In real implementation, would delete old memories from vector store
-            print(f"🧹 Cleaned up memories older than {days_old} days")
-            return 0  # Mock return
+            logger.info("Cleaned up %d memories older than %d days", deleted, days_old)
+            return deleted
             
         except Exception as e:
-            print(f"❌ Error cleaning up memories: {e}")
+            logger.error("Error cleaning up memories: %s", e)
             return 0
     
     def get_status(self) -> Dict[str, Any]:
         """Get memory system status."""
         return {
-            "memory_backend": type(self.vector_store).__name__,
+            "memory_backend": self._backend_name,
             "table": self.memory_table,
             "context_type": self.context_type,
             "status": "active"
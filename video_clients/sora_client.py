@@ -3,10 +3,13 @@ Mock Sora client for future OpenAI Sora API integration.
 Provides placeholder functionality until Sora API is available.
 """
 import asyncio
+import logging
 import uuid
 import time
 from typing import Dict, Any, Optional
 
+logger = logging.getLogger(__name__)
+
 class SoraClient:
     """Mock client for future OpenAI Sora video generation."""
     
@@ -14,12 +17,12 @@ class SoraClient:
         self.api_key = api_key
         self.model_name = "sora-1.0"
         self.available = False  # Sora not yet publicly available
-        print("[INIT] Sora Client initialized (mock mode - API not yet available)")
+        logger.info("Sora Client initialized (mock mode - API not yet available)")
     
     async def generate_video(self, script: Dict[str, Any], **kwargs) -> Dict[str, Any]:
         """Generate video from script using mock Sora responses."""
         
-        print("🎬 Starting Sora video generation (mock mode)...")
+        logger.info("Starting Sora video generation (mock mode)")
         
         # Simulate API processing time
         await asyncio.sleep(3)
@@ -43,9 +46,10 @@ class SoraClient:
     
     def _extract_prompt_from_script(self, script: Dict[str, Any]) -> str:
         """Extract the main prompt from script."""
-        if "scenes" in script and script["scenes"]:
-            return script["scenes"][0].get("sora_prompt", 
-                   script["scenes"][0].get("description", "A sample video"))
+        scenes = script.get("scenes")
+        if scenes:
+            first_scene = scenes[0]
+            return first_scene.get("sora_prompt") or first_scene.get("description") or "A sample video"
         return script.get("prompt", "A sample video")
     
     async def validate_prompt(self, prompt: str) -> Dict[str, Any]:
@@ -4,10 +4,41 @@ Clean extraction focusing on core video generation functionality.
 """
 from typing import Dict, Any, List, Optional, Union
 import asyncio
+import logging
+import time
 from datetime import datetime
+from functools import lru_cache
+from types import MappingProxyType
 from .sora_client import SoraClient
 from .velo_client import VeloClient
 
+logger = logging.getLogger(__name__)
+
+# Seconds a provider status snapshot is reused by get_available_providers()
+PROVIDER_STATUS_TTL = 5.0
+
+# Provider-specific generation defaults, shared read-only across calls
+PROVIDER_DEFAULTS = {
+    # Velo-specific optimizations
+    "velo": MappingProxyType({"temperature": 0.7, "aspect_ratio": "16:9"}),
+    # Sora-specific optimizations (when available)
+    "sora": MappingProxyType({"style": "natural"})
+}
+
+
+@lru_cache(maxsize=32)
+def _selection_reason(selected: str, requested: Optional[str], preferred: str) -> str:
+    """Human-readable reason for a provider selection (a handful of distinct inputs)."""
+    if requested and requested == selected:
+        return f"User requested {selected}"
+    elif requested and requested != selected:
+        return f"User requested {requested} but {selected} was selected due to availability"
+    elif preferred == selected:
+        return f"Preferred provider {selected}"
+    else:
+        return f"Auto-selected {selected} based on availability"
+
+
 class UnifiedVideoClient:
     """
     Unified client for multiple video generation providers.
@@ -16,12 +47,23 @@ class UnifiedVideoClient:
     
     def __init__(self, preferred_provider: str = "auto"):
         self.preferred_provider = preferred_provider
+        # Providers are constructed on first use; only built clients live in self.providers
         self.providers = {}
+        self._provider_factories = {}
+        self._provider_locks = {}
         self.fallback_order = ["velo", "sora"]  # Velo first since it's available now
         self._initialize_providers()
+        # Status fields that never change after construction
+        self._static_status = {
+            "unified_client_version": "1.0.0",
+            "preferred_provider": self.preferred_provider,
+            "fallback_order": self.fallback_order
+        }
+        self._providers_info: Optional[List[Dict[str, Any]]] = None
+        self._providers_info_expires = 0.0
     
     def _initialize_providers(self):
-        """Initialize all available video generation providers."""
+        """Register a factory for every video generation provider (nothing is built yet)."""
         
         # Load settings for proper configuration
         try:
@@ -35,18 +77,17 @@ class UnifiedVideoClient:
                 google_location = os.getenv("GOOGLE_LOCATION", "us-central1")
             settings = MockSettings()
         
-        try:
-            self.providers["sora"] = SoraClient()
-            print("[OK] Sora client initialized (mock mode)")
-        except Exception as e:
-            print(f"[ERROR] Sora client initialization failed: {e}")
+        def create_sora():
+            client = SoraClient()
+            logger.info("Sora client initialized (mock mode)")
+            return client
         
-        try:
+        def create_velo():
             # Check if we should use reference images (full VEO model)
             import os
             use_reference_images = os.getenv("VEO_USE_REFERENCE_IMAGES", "true").lower() == "true"
             
-            self.providers["velo"] = VeloClient(
+            client = VeloClient(
                 api_key=settings.google_api_key,
                 project_id=settings.google_project_id,
                 location=settings.google_location,
@@ -54,15 +95,67 @@ class UnifiedVideoClient:
             )
             
             if settings.google_api_key:
-                print("[OK] Velo client initialized with real API key")
+                logger.info("Velo client initialized with real API key")
             else:
-                print("[OK] Velo client initialized (demo mode)")
+                logger.info("Velo client initialized (demo mode)")
+            return client
+        
+        self._provider_factories = {"sora": create_sora, "velo": create_velo}
+    
+    def _build_provider(self, provider: str):
+        """Construct a provider synchronously if it has not been built yet."""
+        if provider in self.providers or provider not in self._provider_factories:
+            return self.providers.get(provider)
+        try:
+            self.providers[provider] = self._provider_factories[provider]()
+            self._providers_info = None
         except Exception as e:
-            print(f"[ERROR] Velo client initialization failed: {e}")
+            logger.error("%s client initialization failed: %s", provider.capitalize(), e)
+            # Do not retry a provider that cannot be constructed
+            self._provider_factories.pop(provider)
+        return self.providers.get(provider)
+    
+    async def _ensure(self, provider: str):
+        """Construct a provider off the event loop on first use; concurrent callers share one build."""
+        if provider in self.providers or provider not in self._provider_factories:
+            return self.providers.get(provider)
+        lock = self._provider_locks.setdefault(provider, asyncio.Lock())
+        async with lock:
+            if provider not in self.providers:
+                await asyncio.to_thread(self._build_provider, provider)
+        return self.providers.get(provider)
+    
+    async def _ensure_all(self):
+        """Construct every remaining provider concurrently."""
+        await asyncio.gather(*(self._ensure(provider) for provider in list(self._provider_factories)))
+    
+    async def _resolve_provider(self, requested_provider: str = None) -> Optional[str]:
+        """Build only the providers needed to honour the request, then select one."""
+        explicit = requested_provider or (self.preferred_provider if self.preferred_provider != "auto" else None)
+        if not explicit or await self._ensure(explicit) is None:
+            # Auto-selection compares providers, so all of them are needed
+            await self._ensure_all()
+        return self._select_provider(requested_provider)
     
     def get_client(self, provider: str):
         """Get a specific client instance."""
-        return self.providers.get(provider)
+        return self._build_provider(provider)
+    
+    async def prepare(self, provider: str = None) -> Dict[str, Any]:
+        """
+        Run the selected provider's script-independent setup ahead of generation.
+        
+        Args:
+            provider: Specific provider to use ("sora", "velo", or None for auto)
+            
+        Returns:
+            Context to pass to generate_video(prepared=...)
+        """
+        selected_provider = await self._resolve_provider(provider)
+        client = self.providers.get(selected_provider)
+        if client is None or not hasattr(client, "prepare"):
+            return {"provider": selected_provider}
+        return {"provider": selected_provider, "context": await client.prepare()}
     
     async def generate_video(
         self,
@@ -70,6 +163,7 @@ class UnifiedVideoClient:
         provider: str = None,
         quality: str = "hd",
         format: str = "mp4",
+        prepared: Optional[Dict[str, Any]] = None,
         **kwargs
     ) -> Dict[str, Any]:
         """
@@ -84,6 +178,7 @@ class UnifiedVideoClient:
             provider: Specific provider to use ("sora", "velo", or None for auto)
             quality: Video quality preference
             format: Output format preference
+            prepared: Result of prepare(), reused if it targets the selected provider
             **kwargs: Additional provider-specific parameters
             
         Returns:
@@ -91,7 +186,7 @@ class UnifiedVideoClient:
         """
         
         # Determine which provider to use
-        selected_provider = self._select_provider(provider)
+        selected_provider = await self._resolve_provider(provider)
         
         if not selected_provider:
             return {
@@ -101,7 +196,7 @@ class UnifiedVideoClient:
             }
         
         try:
-            print(f"[INFO] Generating video using {selected_provider.upper()}")
+            logger.info("Generating video using %s", selected_provider.upper())
             
             client = self.providers[selected_provider]
             
@@ -111,6 +206,8 @@ class UnifiedVideoClient:
                 "quality": quality,
                 "format": format
             })
+            if prepared and prepared.get("provider") == selected_provider and "context" in prepared:
+                optimized_kwargs["prepared"] = prepared["context"]
             
             # Generate video (personas auto-detected from prompt)
             result = await client.generate_video(script, **optimized_kwargs)
@@ -123,10 +220,10 @@ class UnifiedVideoClient:
             return result
             
         except Exception as e:
-            print(f"[ERROR] Video generation failed with {selected_provider}: {e}")
+            logger.error("Video generation failed with %s: %s", selected_provider, e)
             
             # Try fallback if enabled and not already using fallback
-            if provider is None and len(self.providers) > 1:
+            if provider is None and len(self._provider_factories) > 1:
                 return await self._try_fallback(script, selected_provider, quality, format, **kwargs)
             
             return {
@@ -135,6 +232,42 @@ class UnifiedVideoClient:
                 "provider": selected_provider
             }
     
+    async def generate_video_batch(
+        self,
+        scripts: List[Dict[str, Any]],
+        provider: str = None,
+        prepared: Optional[List[Optional[Dict[str, Any]]]] = None,
+        **kwargs
+    ) -> List[Dict[str, Any]]:
+        """
+        Generate several videos in one submission.
+        
+        Providers take one prompt per request, so the batch is fanned out
+        concurrently; each script gets its own result in input order.
+        
+        Args:
+            scripts: Scripts to generate
+            provider: Specific provider to use ("sora", "velo", or None for auto)
+            prepared: Optional prepare() result per script
+            **kwargs: Passed to generate_video for every script
+            
+        Returns:
+            One generation result per script
+        """
+        prepared = prepared or [None] * len(scripts)
+        results = await asyncio.gather(
+            *(
+                self.generate_video(script, provider=provider, prepared=context, **kwargs)
+                for script, context in zip(scripts, prepared)
+            ),
+            return_exceptions=True
+        )
+        return [
+            {"success": False, "error": f"Video generation failed: {result}"}
+            if isinstance(result, Exception) else result
+            for result in results
+        ]
+    
     def _select_provider(self, requested_provider: str = None) -> Optional[str]:
         """Select the best available provider."""
         
@@ -158,31 +291,11 @@ class UnifiedVideoClient:
     
     def _get_selection_reason(self, selected: str, requested: str = None) -> str:
         """Get human-readable reason for provider selection."""
-        
-        if requested and requested == selected:
-            return f"User requested {selected}"
-        elif requested and requested != selected:
-            return f"User requested {requested} but {selected} was selected due to availability"
-        elif self.preferred_provider == selected:
-            return f"Preferred provider {selected}"
-        else:
-            return f"Auto-selected {selected} based on availability"
+        return _selection_reason(selected, requested, self.preferred_provider)
     
     def _optimize_for_provider(self, provider: str, kwargs: Dict[str, Any]) -> Dict[str, Any]:
-        """Apply provider-specific optimizations."""
-        
-        optimized = kwargs.copy()
-        
-        if provider == "velo":
-            # Velo-specific optimizations
-            optimized.setdefault("temperature", 0.7)
-            optimized.setdefault("aspect_ratio", "16:9")
-            
-        elif provider == "sora":
-            # Sora-specific optimizations (when available)
-            optimized.setdefault("style", "natural")
-            
-        return optimized
+        """Apply provider-specific optimizations (explicit kwargs win over the defaults)."""
+        return {**PROVIDER_DEFAULTS.get(provider, {}), **kwargs}
     
     async def _try_fallback(
         self,
@@ -194,13 +307,14 @@ class UnifiedVideoClient:
     ) -> Dict[str, Any]:
         """Try fallback providers when primary fails."""
         
-        print(f"[INFO] Trying fallback providers after {failed_provider} failed")
+        logger.info("Trying fallback providers after %s failed", failed_provider)
         
+        await self._ensure_all()
         remaining_providers = [p for p in self.fallback_order if p != failed_provider and p in self.providers]
         
         for provider in remaining_providers:
             try:
-                print(f"[INFO] Attempting fallback to {provider}")
+                logger.info("Attempting fallback to %s", provider)
                 
                 client = self.providers[provider]
                 optimized_kwargs = self._optimize_for_provider(provider, kwargs)
@@ -214,11 +328,11 @@ class UnifiedVideoClient:
                     result["selected_provider"] = provider
                     result["provider_selection_reason"] = f"Fallback to {provider} after {failed_provider} failed"
                     
-                    print(f"[SUCCESS] Fallback to {provider} successful")
+                    logger.info("Fallback to %s successful", provider)
                     return result
                 
             except Exception as e:
-                print(f"[ERROR] Fallback to {provider} also failed: {e}")
+                logger.error("Fallback to %s also failed: %s", provider, e)
                 continue
         
         return {
@@ -248,32 +362,36 @@ class UnifiedVideoClient:
             validation_result["valid"] = False
             validation_result["issues"].append("Script must contain either 'scenes' or 'prompt'")
         
-        # Validate individual providers
-        for provider_name, client in self.providers.items():
-            if hasattr(client, 'validate_prompt'):
-                try:
-                    # Extract prompt for validation
-                    if "scenes" in script and script["scenes"]:
-                        prompt = script["scenes"][0].get("description", "")
-                    else:
-                        prompt = script.get("prompt", "")
-                    
-                    if prompt:
-                        provider_validation = await client.validate_prompt(prompt)
-                        validation_result["provider_compatibility"][provider_name] = provider_validation
-                except Exception as e:
-                    validation_result["provider_compatibility"][provider_name] = {
-                        "valid": False,
-                        "error": str(e)
-                    }
+        # Validate individual providers concurrently
+        await self._ensure_all()
+        # Extract prompt for validation (once, shared by every provider)
+        scenes = script.get("scenes")
+        prompt = scenes[0].get("description", "") if scenes else script.get("prompt", "")
+        
+        if prompt:
+            names = [name for name, client in self.providers.items() if hasattr(client, 'validate_prompt')]
+            results = await asyncio.gather(
+                *(self.providers[name].validate_prompt(prompt) for name in names),
+                return_exceptions=True
+            )
+            for provider_name, provider_validation in zip(names, results):
+                if isinstance(provider_validation, Exception):
+                    provider_validation = {"valid": False, "error": str(provider_validation)}
+                validation_result["provider_compatibility"][provider_name] = provider_validation
         
         return validation_result
     
     def get_available_providers(self) -> List[Dict[str, Any]]:
-        """Get list of available providers with their status."""
+        """Get list of available providers with their status (reused for PROVIDER_STATUS_TTL seconds)."""
+        
+        now = time.monotonic()
+        if self._providers_info is not None and now < self._providers_info_expires:
+            return list(self._providers_info)
         
         providers_info = []
         
+        for provider_name in list(self._provider_factories):
+            self._build_provider(provider_name)
         for provider_name, client in self.providers.items():
             try:
                 status = client.get_status() if hasattr(client, 'get_status') else {}
@@ -289,15 +407,15 @@ class UnifiedVideoClient:
                     "error": str(e)
                 })
         
-        return providers_info
+        self._providers_info = providers_info
+        self._providers_info_expires = now + PROVIDER_STATUS_TTL
+        return list(providers_info)
     
     def get_status(self) -> Dict[str, Any]:
         """Get unified client status."""
         
         return {
-            "unified_client_version": "1.0.0",
-            "preferred_provider": self.preferred_provider,
-            "fallback_order": self.fallback_order,
+            **self._static_status,
             "providers": self.get_available_providers(),
             "total_providers": len(self.providers)
         }
\ No newline at end of file
@@ -3,19 +3,277 @@ Google Velo 3.1 client for AI video generation using Vertex AI.
 Clean extraction from original codebase.
 """
 import asyncio
+import hashlib
 import httpx
+import importlib.util
 import json
+import logging
+import random
+import shutil
+import threading
 import uuid
-from typing import Dict, Any, List, Optional
+from dataclasses import dataclass
+from datetime import timezone
+from functools import lru_cache
+from pathlib import Path
+from types import MappingProxyType
+from typing import Dict, Any, List, Optional, Tuple, Union
 import time
 import os
 import base64
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import google.auth
+    import google.auth.transport.requests
+    GOOGLE_AUTH_AVAILABLE = True
+except ImportError:
+    GOOGLE_AUTH_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+CLOUD_PLATFORM_SCOPE = "https://www.googleapis.com/auth/cloud-platform"
+# A cached token is reused until this many seconds before it expires...
+TOKEN_EXPIRY_MARGIN = 60
+# ...and the background refresher replaces it this many seconds before expiry
+TOKEN_REFRESH_LEAD = 300
+# gcloud does not report expiry; its access tokens live for an hour
+GCLOUD_TOKEN_LIFETIME = 3600
+
+# One pooled connection set per client: Veo calls reuse TLS connections to the
+# regional endpoint instead of handshaking for every generation
+HTTP_TIMEOUT = httpx.Timeout(300.0, connect=10.0)
+HTTP_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=20)
+# httpx only speaks HTTP/2 with the h2 package (httpx[http2])
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+
+# Scenes packed into one predictLongRunning request (all_scenes=True); larger
+# scripts are sent as several requests
+MAX_INSTANCES_PER_REQUEST = 4
+# Statuses meaning the backend will not take a multi-instance request, so the
+# scenes are retried one request each
+SPLIT_ON_STATUS = (400, 413)
+# Default window (seconds) in which concurrent single-scene Vertex calls are
+# coalesced into one request; 0 disables micro-batching
+DEFAULT_BATCH_WINDOW = float(os.getenv("VEO_BATCH_WINDOW_MS", "0")) / 1000
+
+
+# Vertex request parameters, in request order, and the generate_video kwargs
+# that override them
+VERTEX_PARAMETER_DEFAULTS = MappingProxyType({
+    "aspectRatio": "16:9",
+    "sampleCount": 1,  # Number of video variations
+    "durationSeconds": "8",  # Must be string
+    "personGeneration": "allow_all",  # Allow generation of people based on prompt
+    "addWatermark": False,  # Set to True if you want watermark
+    "includeRaiReason": True,  # Include safety/content filtering reasons
+    "generateAudio": True,
+    "resolution": "720p"  # 720p or 1080p
+})
+VERTEX_PARAMETER_KWARGS = (
+    ("aspect_ratio", "aspectRatio"),
+    ("sample_count", "sampleCount"),
+    ("generate_audio", "generateAudio"),
+    ("resolution", "resolution")
+)
+
+
+# Terms validate_prompt() looks for before suggesting descriptive wording
+DESCRIPTIVE_TERMS = ("cinematic", "professional", "detailed")
+
+
+# Long-running operations are first polled after OPERATION_POLL_INITIAL_DELAY
+# seconds, then at doubling (jittered) intervals of at most OPERATION_POLL_MAX_DELAY
+OPERATION_POLL_INITIAL_DELAY = 5.0
+OPERATION_POLL_MAX_DELAY = 30.0
+# Poll failures that are retried on the next tick instead of failing the wait
+RETRY_POLL_STATUS = (429, 500, 502, 503, 504)
+
+
+# Local cache of Veo results for byte-identical requests (eval and CI re-runs)
+RESPONSE_CACHE_MODES = ("on", "read_only", "write_only", "off")
+RESPONSE_CACHE_MODE = os.getenv("VEO_RESPONSE_CACHE", "off")
+RESPONSE_CACHE_DIR = Path(os.getenv("VEO_RESPONSE_CACHE_DIR", Path.home() / ".cache" / "velo"))
+RESPONSE_CACHE_MAX_AGE = float(os.getenv("VEO_RESPONSE_CACHE_MAX_AGE", str(7 * 24 * 3600)))
+
+
+# Base64 characters decoded per write; a multiple of 4, so every chunk decodes on
+# its own (Vertex sends unbroken base64, without line breaks)
+BASE64_DECODE_CHUNK = 4 * 256 * 1024
+
+
+# Scene fields that may hold the prompt, most specific first
+SCENE_PROMPT_FIELDS = ("sora_prompt", "velo_prompt", "visual_description", "description")
+
+
+@lru_cache(maxsize=4096)
+def _validate_prompt_text(prompt: str) -> Tuple[bool, Tuple[str, ...], Tuple[str, ...], float]:
+    """Pure part of validate_prompt(): (valid, issues, suggestions, estimated duration), memoized per prompt."""
+    issues = []
+    suggestions = []
+    
+    # Basic validation; the cheap length checks come first
+    valid = len(prompt.strip()) >= 10
+    if not valid:
+        issues.append("Prompt too short (minimum 10 characters)")
+    
+    if len(prompt) > 500:
+        issues.append("Prompt quite long - consider shortening for better results")
+    
+    estimated_duration = min(max(len(prompt) / 10, 5), 60)  # 5-60 seconds
+    
+    # Suggestions; one case-folded copy serves every term lookup
+    folded = prompt.casefold()
+    if "high quality" not in folded:
+        suggestions.append("Consider adding 'high quality' for better results")
+    
+    if not any(term in folded for term in DESCRIPTIVE_TERMS):
+        suggestions.append("Adding descriptive terms like 'cinematic' can improve quality")
+    
+    return valid, tuple(issues), tuple(suggestions), estimated_duration
+
+
+def create_http_session() -> httpx.AsyncClient:
+    """Pooled (and, when available, HTTP/2) client for Veo requests."""
+    return httpx.AsyncClient(timeout=HTTP_TIMEOUT, limits=HTTP_LIMITS, http2=HTTP2_AVAILABLE)
+
+
+def _encode_binary(value: Any) -> str:
+    """Serialize raw bytes (e.g. base64 image data kept as bytes) as ASCII strings."""
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return bytes(value).decode('ascii')
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def serialize_veo_request(payload: Dict[str, Any]) -> bytes:
+    """
+    Serialize a VEO request body in a single call.
+    
+    orjson copies the multi-megabyte base64 reference images straight into the
+    output instead of scanning every character for escapes like the stdlib does.
+    """
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(payload, default=_encode_binary)
+    return json.dumps(payload, default=_encode_binary, separators=(",", ":")).encode("utf-8")
+
+
+def parse_veo_response(body: Union[bytes, str]) -> Any:
+    """Parse a VEO response body; orjson reads the raw bytes without decoding them to str first."""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(body)
+    return json.loads(body)
+
+
+def request_cache_key(url: str, payload: Dict[str, Any]) -> str:
+    """SHA-256 of the endpoint and the canonical (key-sorted) request body."""
+    if ORJSON_AVAILABLE:
+        body = orjson.dumps(payload, default=_encode_binary, option=orjson.OPT_SORT_KEYS)
+    else:
+        body = json.dumps(payload, default=_encode_binary, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    return hashlib.sha256(url.encode("utf-8") + b"\0" + body).hexdigest()
+
+
+def write_base64_file(filename: str, base64_data: str) -> int:
+    """
+    Decode base64 into a file chunk by chunk; returns the number of bytes written.
+    
+    Only one chunk's worth of decoded bytes exists at a time instead of a second
+    copy of the whole video. Where the platform supports it the file is
+    preallocated to its final size up front, so the filesystem can lay it out
+    in one extent instead of growing it chunk by chunk.
+    """
+    padding = 2 if base64_data.endswith("==") else 1 if base64_data.endswith("=") else 0
+    decoded_size = len(base64_data) // 4 * 3 - padding
+    
+    written = 0
+    with open(filename, 'wb') as f:
+        if hasattr(os, "posix_fallocate") and decoded_size > 0:
+            try:
+                os.posix_fallocate(f.fileno(), 0, decoded_size)
+            except OSError:
+                pass  # Not supported by this filesystem; the writes below still work
+        for start in range(0, len(base64_data), BASE64_DECODE_CHUNK):
+            written += f.write(base64.b64decode(base64_data[start:start + BASE64_DECODE_CHUNK]))
+        # Never leave preallocated zeros behind if the estimate was off
+        f.truncate()
+    return written
+
+
+class VeoResponseCache:
+    """
+    On-disk cache of successful Veo results, one JSON file per request key.
+    
+    Only results whose video was saved locally are stored. The cache keeps its
+    own copy of the video ({key}.mp4) and serves a hit only while that copy is
+    intact, so a cached answer never points at a file that was since replaced
+    or deleted in the output directory.
+    """
+    
+    def __init__(self, cache_dir: Path = RESPONSE_CACHE_DIR, max_age: float = RESPONSE_CACHE_MAX_AGE):
+        self.cache_dir = Path(cache_dir)
+        self.max_age = max_age
+    
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached result for a request key, or None."""
+        try:
+            entry = parse_veo_response((self.cache_dir / f"{key}.json").read_bytes())
+        except (OSError, ValueError):
+            return None
+        if time.time() - entry["stored_at"] > self.max_age:
+            return None
+        try:
+            if os.path.getsize(entry["result"]["video_path"]) != entry["video_size"]:
+                return None
+        except (OSError, KeyError):
+            return None
+        return entry["result"]
+    
+    def set(self, key: str, result: Dict[str, Any]):
+        """Store a successful result, and a private copy of its video, under a request key."""
+        path = self.cache_dir / f"{key}.json"
+        video_path = self.cache_dir / f"{key}.mp4"
+        # Unique per writer, so concurrent sets of the same key never share a temp file
+        suffix = f".{os.getpid()}.{uuid.uuid4().hex}.tmp"
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp_video = video_path.with_suffix(suffix)
+            shutil.copyfile(result["video_path"], tmp_video)
+            os.replace(tmp_video, video_path)
+            
+            entry = {
+                "stored_at": time.time(),
+                "video_size": video_path.stat().st_size,
+                "result": {**result, "video_path": str(video_path)}
+            }
+            tmp_path = path.with_suffix(suffix)
+            tmp_path.write_text(json.dumps(entry))
+            os.replace(tmp_path, path)
+        except (OSError, TypeError) as e:
+            logger.warning("Could not cache Veo result: %s", e)
+
+
+@dataclass
+class PendingOperation:
+    """A long-running operation awaited by one or more wait_for_operation() callers."""
+    future: asyncio.Future
+    due_at: float
+    delay: float
+    max_delay: float
+    waiters: int = 0
+
+
 class VeloClient:
     """Client for Google Velo 3.1 video generation via Vertex AI."""
     
     def __init__(self, api_key: Optional[str] = None, project_id: Optional[str] = None, 
-                 location: str = "us-central1", use_reference_images: bool = False):
+                 location: str = "us-central1", use_reference_images: bool = False,
+                 session: Optional[httpx.AsyncClient] = None, batch_window: float = DEFAULT_BATCH_WINDOW):
         # Use service account key for Veo (different from Gemini key)
         # For Veo: try GOOGLE_ACCESS_TOKEN first (Bearer token), then API keys
         self.api_key = api_key or os.getenv("GOOGLE_ACCESS_TOKEN") or os.getenv("GOOGLE_SERVICE_ACCOUNT_KEY") or os.getenv("GEMINI_API_KEY") or os.getenv("GOOGLE_API_KEY")
@@ -38,25 +296,93 @@ class VeloClient:
             self.base_url = f"https://generativelanguage.googleapis.com/v1beta/models/{self.model_name}:generateVideo"
             self.use_vertex = False
         
-        self.session = None
-        print(f"[INIT] Velo Client initialized - Using {'Vertex AI' if self.use_vertex else 'Generative AI'} API")
-        print(f"[INIT] Model: {self.model_name} | Reference Images: {'Enabled' if use_reference_images else 'Disabled'}")
+        # A caller-supplied session is shared with other clients and stays open on aclose()
+        self._owns_session = session is None
+        self.session = session or (create_http_session() if self.api_key else None)
+        # Vertex access token cache, shared by request paths and the background refresher
+        self._token: Optional[str] = None
+        self._token_expiry = 0.0
+        self._token_lock = threading.Lock()
+        self._credentials = None
+        self._token_refresher: Optional[asyncio.Task] = None
+        # Micro-batching of concurrent Vertex calls: (payload, headers, future) items
+        self.batch_window = batch_window
+        self._batch_queue: Optional[asyncio.Queue] = None
+        self._batcher_task: Optional[asyncio.Task] = None
+        self._batch_posts = set()
+        # Operations awaited through wait_for_operation(), all polled by one task
+        self._pending_ops: Dict[str, PendingOperation] = {}
+        self._operation_poller: Optional[asyncio.Task] = None
+        self._poll_wakeup: Optional[asyncio.Event] = None
+        self.response_cache = VeoResponseCache()
+        logger.info(
+            "Velo client initialized - using %s API, model %s, reference images %s",
+            "Vertex AI" if self.use_vertex else "Generative AI",
+            self.model_name,
+            "enabled" if use_reference_images else "disabled"
+        )
     
     def _get_auth_token(self) -> str:
-        """Get authentication token for Vertex AI."""
-        import subprocess
+        """Get authentication token for Vertex AI (cached until shortly before it expires)."""
         
         # First check for GOOGLE_ACCESS_TOKEN in env
         access_token = os.getenv("GOOGLE_ACCESS_TOKEN")
         if access_token and access_token.startswith("ya29."):
-            print("✅ Using access token from environment")
             return access_token
         
         # If api_key looks like a token already, use it
         if self.api_key and (self.api_key.startswith("ya29.") or len(self.api_key) > 100):
             return self.api_key
         
-        # Try to get token from gcloud
+        if self._token and time.time() < self._token_expiry - TOKEN_EXPIRY_MARGIN:
+            return self._token
+        return self._refresh_auth_token(force=False) or self.api_key or ""
+    
+    async def _get_auth_token_async(self) -> str:
+        """_get_auth_token for async callers; a fetch (if needed) runs off the event loop."""
+        if self._token and time.time() < self._token_expiry - TOKEN_EXPIRY_MARGIN:
+            token = self._get_auth_token()
+        else:
+            token = await asyncio.to_thread(self._get_auth_token)
+        if self._token:
+            self._start_token_refresher()
+        return token
+    
+    def _refresh_auth_token(self, force: bool = True) -> Optional[str]:
+        """Fetch a new access token into the cache; concurrent callers share one fetch."""
+        with self._token_lock:
+            if not force and self._token and time.time() < self._token_expiry - TOKEN_EXPIRY_MARGIN:
+                return self._token
+            
+            fetched = self._fetch_google_auth_token() or self._fetch_gcloud_token()
+            if fetched:
+                self._token, self._token_expiry = fetched
+            return self._token if fetched else None
+    
+    def _fetch_google_auth_token(self) -> Optional[Tuple[str, float]]:
+        """Refresh Application Default Credentials in-process (no subprocess)."""
+        if not GOOGLE_AUTH_AVAILABLE:
+            return None
+        try:
+            if self._credentials is None:
+                self._credentials, _ = google.auth.default(scopes=[CLOUD_PLATFORM_SCOPE])
+            self._credentials.refresh(google.auth.transport.requests.Request())
+            expiry = self._credentials.expiry
+            # google-auth reports expiry as a naive UTC datetime
+            expires_at = (
+                expiry.replace(tzinfo=timezone.utc).timestamp() if expiry
+                else time.time() + GCLOUD_TOKEN_LIFETIME
+            )
+            logger.debug("Refreshed auth token from application default credentials")
+            return self._credentials.token, expires_at
+        except Exception as e:
+            logger.warning("Could not refresh default credentials: %s", e)
+            return None
+    
+    def _fetch_gcloud_token(self) -> Optional[Tuple[str, float]]:
+        """Fall back to the gcloud CLI when google-auth is unavailable or has no credentials."""
+        import subprocess
+        
         try:
             result = subprocess.run(
                 ["gcloud", "auth", "print-access-token"],
@@ -65,27 +391,82 @@ class VeloClient:
                 timeout=10
             )
             if result.returncode == 0:
-                token = result.stdout.strip()
-                print("✅ Got auth token from gcloud")
-                return token
+                logger.debug("Got auth token from gcloud")
+                return result.stdout.strip(), time.time() + GCLOUD_TOKEN_LIFETIME
         except Exception as e:
-            print(f"⚠️ Could not get gcloud token: {e}")
-        
-        # Fallback - try to use api_key as-is
-        return self.api_key or ""
+            logger.warning("Could not get gcloud token: %s", e)
+        return None
+    
+    def _start_token_refresher(self):
+        """Keep the cached token fresh in the background so requests never wait on a refresh."""
+        if self._token_refresher is None or self._token_refresher.done():
+            self._token_refresher = asyncio.create_task(self._refresh_token_periodically())
+    
+    async def _refresh_token_periodically(self):
+        """Refresh the cached token TOKEN_REFRESH_LEAD seconds before each expiry."""
+        while self._token:
+            await asyncio.sleep(max(self._token_expiry - TOKEN_REFRESH_LEAD - time.time(), 0))
+            if not await asyncio.to_thread(self._refresh_auth_token):
+                # Leave the current token in place and retry shortly
+                await asyncio.sleep(TOKEN_EXPIRY_MARGIN)
+    
+    def _get_session(self) -> httpx.AsyncClient:
+        """The pooled HTTP session (reopened if the client was closed and is used again)."""
+        if self.session is None or self.session.is_closed:
+            self.session = create_http_session()
+            self._owns_session = True
+        return self.session
+    
+    async def aclose(self):
+        """Stop the token refresher and close the HTTP session if this client owns it."""
+        if self._token_refresher:
+            self._token_refresher.cancel()
+            self._token_refresher = None
+        if self._operation_poller:
+            self._operation_poller.cancel()
+            self._operation_poller = None
+            for pending in self._pending_ops.values():
+                pending.future.cancel()
+            self._pending_ops.clear()
+        if self._batcher_task:
+            # Callers already waiting on a batch still get their responses
+            await self._batch_queue.join()
+            await asyncio.gather(*self._batch_posts)
+            self._batcher_task.cancel()
+            self._batcher_task = None
+        if self.session and self._owns_session:
+            await self.session.aclose()
+        self.session = None
     
     async def __aenter__(self):
         """Async context manager entry."""
-        if self.api_key:
-            self.session = httpx.AsyncClient(timeout=300.0)
         return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         """Async context manager exit."""
-        if self.session:
-            await self.session.aclose()
+        await self.aclose()
+    
+    async def prepare(self) -> Dict[str, Any]:
+        """Do the script-independent setup (auth token, HTTP session) for a generation.
+        
+        Callers can run this while the script is still being built and pass the
+        result to generate_video(prepared=...).
+        """
+        if not self.api_key:
+            return {}
+        
+        self._get_session()
+        
+        if not self.use_vertex:
+            return {}
+        return {"auth_token": await self._get_auth_token_async()}
     
-    async def generate_video(self, script: Dict[str, Any], **kwargs) -> Dict[str, Any]:
+    async def generate_video(
+        self,
+        script: Dict[str, Any],
+        prepared: Optional[Dict[str, Any]] = None,
+        **kwargs
+    ) -> Dict[str, Any]:
         """Generate video from script using Google Velo 3.1.
         
         Automatically detects personas mentioned in the prompt and loads their reference images.
@@ -93,13 +474,15 @@ class VeloClient:
         
         Args:
             script: Script dictionary with prompt and metadata
-            **kwargs: Additional parameters
+            prepared: Result of prepare(), if it was run ahead of time
+            **kwargs: Additional parameters; all_scenes=True generates every scene
+                (packed into as few Vertex requests as possible) instead of the first
         """
         
-        print("🎬 Starting Velo video generation...")
+        logger.debug("Starting Velo video generation")
         
         if not self.api_key:
-            print("🎭 No API key found - using mock response")
+            logger.info("No API key found - using mock response")
             return await self._generate_mock_video(script)
         
         try:
@@ -113,9 +496,12 @@ class VeloClient:
                     "provider": "velo"
                 }
             
-            print(f"📝 Extracted {len(prompts)} prompts from script")
+            logger.debug("Extracted %d prompts from script", len(prompts))
             
-            # For multi-scene scripts, process the first scene
+            # For multi-scene scripts, process the first scene unless all scenes were asked for
+            all_scenes = kwargs.pop("all_scenes", False) and len(prompts) > 1
+            if not all_scenes:
+                prompts = prompts[:1]
             main_prompt = prompts[0]
             
             # AUTO-DETECT PERSONAS from prompt
@@ -123,67 +509,139 @@ class VeloClient:
             from storage.persona_loader import PersonaLoader
             
             detector = PersonaDetector()
-            detected_personas = detector.detect_personas_in_prompt(main_prompt)
+            # Scenes in one request share their reference images, so detect across all of them
+            detected_personas = detector.detect_personas_in_prompt(" ".join(prompts))
             
             reference_images = []
             
             if detected_personas:
-                print(f"🔍 Detected {len(detected_personas)} persona(s): {', '.join(detected_personas)}")
+                logger.info("Detected %d persona(s): %s", len(detected_personas), ", ".join(detected_personas))
                 
                 loader = PersonaLoader()
                 
-                # Load reference images for each detected persona
+                # Load reference images for every detected persona concurrently
                 if self.use_reference_images:
-                    for persona_name in detected_personas:
-                        persona_images = loader.get_persona_reference_images(
+                    persona_image_sets = await asyncio.gather(*(
+                        loader.aget_persona_reference_images(
                             persona_name, 
                             max_images=3 // len(detected_personas),  # Distribute images among personas
                             emotion=script.get("emotion")
                         )
+                        for persona_name in detected_personas
+                    ))
+                    for persona_name, persona_images in zip(detected_personas, persona_image_sets):
                         if persona_images:
                             reference_images.extend(persona_images)
-                            print(f"� Loaded {len(persona_images)} reference images for {persona_name}")
+                            logger.debug("Loaded %d reference images for %s", len(persona_images), persona_name)
                 
                 # DO NOT modify the prompt - user already mentioned the persona by name
                 # Their original phrasing is what they intended
             else:
-                print(f"👤 No personas detected - generating generic video")
+                logger.debug("No personas detected - generating generic video")
             
-            print(f"🎯 Using prompt: {main_prompt[:100]}...")
+            logger.debug("Using prompt: %.100s", main_prompt)
             
             # Add reference images to script metadata
             if reference_images:
                 script["reference_images"] = reference_images
             
             # Generate video
-            result = await self._call_velo_api(main_prompt, script, **kwargs)
+            auth_token = (prepared or {}).get("auth_token")
+            if all_scenes:
+                result = await self._call_velo_api_scenes(prompts, script, auth_token=auth_token, **kwargs)
+            else:
+                result = await self._call_velo_api(main_prompt, script, auth_token=auth_token, **kwargs)
             
             if result["success"]:
-                print("✅ Velo video generation successful!")
+                logger.info("Velo video generation successful")
             else:
-                print(f"❌ Velo generation failed: {result.get('error')}")
+                logger.error("Velo generation failed: %s", result.get("error"))
             
             return result
             
         except Exception as e:
-            print(f"❌ Velo client error: {str(e)}")
+            logger.error("Velo client error: %s", e)
             return {
                 "success": False,
                 "error": f"Velo generation failed: {str(e)}",
                 "provider": "velo"
             }
     
-    async def _call_velo_api(self, prompt: str, script: Dict[str, Any], **kwargs) -> Dict[str, Any]:
-        """Make the actual API call to Velo."""
+    async def _call_velo_api_scenes(
+        self,
+        prompts: List[str],
+        script: Dict[str, Any],
+        auth_token: Optional[str] = None,
+        **kwargs
+    ) -> Dict[str, Any]:
+        """Generate several scenes with as few requests as possible.
+        
+        On Vertex, up to MAX_INSTANCES_PER_REQUEST scenes travel as the instances of
+        one predictLongRunning call. If the backend rejects a packed request, its
+        scenes are resubmitted one per request, concurrently.
+        """
+        if self.use_vertex:
+            chunks = [
+                prompts[start:start + MAX_INSTANCES_PER_REQUEST]
+                for start in range(0, len(prompts), MAX_INSTANCES_PER_REQUEST)
+            ]
+        else:
+            # The Generative AI endpoint takes a single prompt per request
+            chunks = [[prompt] for prompt in prompts]
+        
+        async def submit(chunk: List[str]) -> List[Dict[str, Any]]:
+            result = await self._call_velo_api(
+                chunk if len(chunk) > 1 else chunk[0], script, auth_token=auth_token, **kwargs
+            )
+            if len(chunk) > 1 and result.get("status_code") in SPLIT_ON_STATUS:
+                logger.warning("Multi-scene request rejected (%s) - sending scenes separately", result["status_code"])
+                return list(await asyncio.gather(
+                    *(self._call_velo_api(prompt, script, auth_token=auth_token, **kwargs) for prompt in chunk)
+                ))
+            return [result]
+        
+        results = [result for chunk_results in await asyncio.gather(*(submit(chunk) for chunk in chunks))
+                   for result in chunk_results]
+        failed = [result for result in results if not result.get("success")]
+        
+        return {
+            "success": not failed,
+            "status": "processing" if any(result.get("status") == "processing" for result in results) else "completed",
+            "operation_ids": [result["operation_id"] for result in results if "operation_id" in result],
+            "provider": "velo",
+            "model": self.model_name,
+            "duration": script.get("duration", 8),
+            "prompts": prompts,
+            "scene_count": len(prompts),
+            "requests": results,
+            "error": "; ".join(result.get("error", "") for result in failed) or None,
+            "generated_at": time.time()
+        }
+    
+    async def _call_velo_api(
+        self,
+        prompt: Union[str, List[str]],
+        script: Dict[str, Any],
+        auth_token: Optional[str] = None,
+        **kwargs
+    ) -> Dict[str, Any]:
+        """Make the actual API call to Velo (a list of prompts becomes one multi-instance Vertex request).
+        
+        cache_mode (on, read_only, write_only or off; default VEO_RESPONSE_CACHE) controls
+        whether identical requests are answered from, or recorded in, the local result cache.
+        """
+        first_prompt = prompt if isinstance(prompt, str) else prompt[0]
+        cache_mode = kwargs.pop("cache_mode", RESPONSE_CACHE_MODE)
+        if cache_mode not in RESPONSE_CACHE_MODES:
+            raise ValueError(f"cache_mode must be one of {RESPONSE_CACHE_MODES}, got {cache_mode!r}")
         
         # Prepare request payload
         if self.use_vertex:
             # Pass script dict as kwargs (it already contains duration, reference_images, etc.)
             payload = self._prepare_vertex_payload(prompt, **{k: v for k, v in script.items() if k != 'prompt'})
             
-            # For Vertex AI, we need gcloud auth token
-            # Try to get it via subprocess if api_key looks like a path to service account
-            auth_token = self._get_auth_token()
+            # For Vertex AI, we need an OAuth access token (cached and refreshed in the background)
+            auth_token = auth_token or await self._get_auth_token_async()
             
             headers = {
                 "Authorization": f"Bearer {auth_token}",
@@ -196,74 +654,88 @@ class VeloClient:
                 "Content-Type": "application/json"
             }
         
-        if not self.session:
-            self.session = httpx.AsyncClient(timeout=300.0)
+        cache_key = None
+        if cache_mode != "off":
+            # Hashing multi-megabyte reference images is CPU work, so keep it off the loop
+            cache_key = await asyncio.to_thread(request_cache_key, self.base_url, payload)
+            if cache_mode in ("on", "read_only"):
+                cached = await asyncio.to_thread(self.response_cache.get, cache_key)
+                if cached is not None:
+                    logger.info("Reusing cached Veo result: %s", cached["video_path"])
+                    return {**cached, "cached": True}
         
-        print(f"🌐 Making API call to: {self.base_url}")
+        logger.debug("Making API call to: %s", self.base_url)
         
         try:
-            response = await self.session.post(
-                self.base_url,
-                json=payload,
-                headers=headers
-            )
+            if self.batch_window > 0 and self.use_vertex and isinstance(prompt, str):
+                # Share one POST with other calls arriving within the batch window
+                status_code, result, error_text = await self._post_batched(payload, headers)
+            else:
+                status_code, result, error_text = await self._post_payload(payload, headers)
             
-            print(f"📡 API Response Status: {response.status_code}")
+            logger.debug("API response status: %s", status_code)
             
-            if response.status_code not in [200, 201, 202]:
-                error_text = response.text
-                print(f"❌ API Error Response: {error_text}")
+            if result is None:
+                # Error bodies can be large; only handle them when they will be shown
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("API error response: %s", error_text)
                 
                 # Try to extract meaningful error
                 try:
-                    error_json = response.json()
+                    error_json = parse_veo_response(error_text)
                     error_message = error_json.get("error", {}).get("message", error_text)
                 except:
                     error_message = error_text
                 
                 return {
                     "success": False,
-                    "error": f"Velo API error ({response.status_code}): {error_message}",
+                    "error": f"Velo API error ({status_code}): {error_message}",
+                    "status_code": status_code,
                     "provider": "velo"
                 }
             
-            result = response.json()
-            print("✅ Received successful API response")
-            
-            # Check if this is a completed operation with video data
-            if "predictions" in result and isinstance(result["predictions"], list):
-                # This is a completed operation - extract and save video
-                video_path = self._save_video_from_response(result, prompt)
-                if video_path:
-                    return {
-                        "success": True,
-                        "video_id": f"velo_{uuid.uuid4().hex[:8]}",
-                        "video_path": video_path,
-                        "provider": "velo",
-                        "model": self.model_name,
-                        "duration": script.get("duration", 8),
-                        "prompt": prompt,
-                        "generated_at": time.time()
-                    }
+            logger.debug("Received successful API response")
             
-            # Veo 3.1 returns a long-running operation
+            # Veo 3.1 returns a long-running operation; checked first, as it is the common case
             if "name" in result:
                 operation_id = result["name"]
-                print(f"🔄 Video generation started - Operation ID: {operation_id}")
+                logger.info("Video generation started - operation ID: %s", operation_id)
                 
                 return {
                     "success": True,
                     "status": "processing",
                     "operation_id": operation_id,
+                    # Position of this prompt in an operation shared by a micro-batch
+                    "instance_index": result.get("instanceIndex", 0),
                     "provider": "velo",
                     "model": self.model_name,
                     "duration": script.get("duration", 8),
                     "prompt": prompt,
-                    "message": "Video generation in progress. Use operation_id to check status.",
+                    "message": "Video generation in progress. Use wait_for_operation(operation_id) to get the result.",
                     "generated_at": time.time()
                 }
             
-            # Legacy format - immediate video URL
+            # Check if this is a completed operation with video data
+            if "predictions" in result and isinstance(result["predictions"], list):
+                # This is a completed operation - extract and save video; decoding and
+                # writing tens of MB happens in a worker thread, off the event loop
+                video_path = await asyncio.to_thread(self._save_video_from_response, result, first_prompt)
+                if video_path:
+                    video_result = {
+                        "success": True,
+                        "video_id": f"velo_{uuid.uuid4().hex[:8]}",
+                        "video_path": video_path,
+                        "provider": "velo",
+                        "model": self.model_name,
+                        "duration": script.get("duration", 8),
+                        "prompt": prompt,
+                        "generated_at": time.time()
+                    }
+                    if cache_key and cache_mode in ("on", "write_only"):
+                        await asyncio.to_thread(self.response_cache.set, cache_key, video_result)
+                    return video_result
+            
+            # Legacy format - immediate video URL (or predictions without inline video data)
             video_url = self._extract_video_url_from_response(result)
             
             return {
@@ -285,8 +757,231 @@ class VeloClient:
                 "provider": "velo"
             }
     
-    def _prepare_vertex_payload(self, prompt: str, **kwargs) -> Dict[str, Any]:
-        """Prepare payload for Veo 3.1 API.
+    async def _post_payload(
+        self,
+        payload: Dict[str, Any],
+        headers: Dict[str, str]
+    ) -> Tuple[int, Optional[Dict[str, Any]], str]:
+        """POST one request body; returns (status code, parsed JSON on success, error body text)."""
+        response = await self._get_session().post(
+            self.base_url,
+            content=serialize_veo_request(payload),
+            headers=headers
+        )
+        if response.status_code in (200, 201, 202):
+            return response.status_code, parse_veo_response(response.content), ""
+        return response.status_code, None, response.text
+    
+    async def _post_batched(
+        self,
+        payload: Dict[str, Any],
+        headers: Dict[str, str]
+    ) -> Tuple[int, Optional[Dict[str, Any]], str]:
+        """Queue a single-instance Vertex request for the micro-batcher and wait for its share of the response."""
+        if self._batcher_task is None or self._batcher_task.done():
+            self._batch_queue = asyncio.Queue()
+            self._batcher_task = asyncio.create_task(self._run_batcher())
+        
+        future = asyncio.get_running_loop().create_future()
+        await self._batch_queue.put((payload, headers, future))
+        return await future
+    
+    async def _run_batcher(self):
+        """Collect queued requests for up to batch_window seconds (MAX_INSTANCES_PER_REQUEST at most) and post them together."""
+        queue = self._batch_queue
+        loop = asyncio.get_running_loop()
+        
+        while True:
+            batch = [await queue.get()]
+            deadline = loop.time() + self.batch_window
+            
+            while len(batch) < MAX_INSTANCES_PER_REQUEST:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            
+            # Only requests with identical parameters and credentials can share a body
+            groups: Dict[Tuple[bytes, Optional[str]], List[Tuple]] = {}
+            for item in batch:
+                payload, headers, _ = item
+                groups.setdefault((serialize_veo_request(payload["parameters"]), headers.get("Authorization")), []).append(item)
+            
+            # Posting happens in the background so the next batch can start filling
+            for group in groups.values():
+                task = asyncio.create_task(self._post_group(group))
+                self._batch_posts.add(task)
+                task.add_done_callback(self._batch_posts.discard)
+            for _ in batch:
+                queue.task_done()
+    
+    async def _post_group(self, group: List[Tuple]):
+        """Post a group of single-instance requests as one multi-instance request and fan the response out."""
+        payloads = [payload for payload, _, _ in group]
+        headers = group[0][1]
+        futures = [future for _, _, future in group]
+        
+        try:
+            if len(group) == 1:
+                results = [await self._post_payload(payloads[0], headers)]
+            else:
+                merged = {
+                    **payloads[0],
+                    "instances": [instance for payload in payloads for instance in payload["instances"]]
+                }
+                status_code, body, error_text = await self._post_payload(merged, headers)
+                if status_code in SPLIT_ON_STATUS:
+                    logger.warning("Batched request rejected (%s) - sending %d requests separately", status_code, len(group))
+                    results = await asyncio.gather(*(self._post_payload(payload, headers) for payload in payloads))
+                else:
+                    results = [
+                        (status_code, self._instance_response(body, index), error_text)
+                        for index in range(len(group))
+                    ]
+            
+            for future, result in zip(futures, results):
+                if not future.done():
+                    future.set_result(result)
+        except Exception as e:
+            for future in futures:
+                if not future.done():
+                    future.set_exception(e)
+    
+    @staticmethod
+    def _instance_response(body: Optional[Dict[str, Any]], index: int) -> Optional[Dict[str, Any]]:
+        """The part of a multi-instance response that belongs to one instance."""
+        if body is None:
+            return None
+        if isinstance(body.get("predictions"), list):
+            return {**body, "predictions": body["predictions"][index:index + 1]}
+        # A long-running operation covers every instance; callers keep their position in it
+        return {**body, "instanceIndex": index}
+    
+    async def wait_for_operation(
+        self,
+        operation_id: str,
+        initial_delay: float = OPERATION_POLL_INITIAL_DELAY,
+        max_delay: float = OPERATION_POLL_MAX_DELAY,
+        timeout: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """Wait for a long-running generation started by generate_video() to finish.
+        
+        Every awaited operation is polled by one shared task, with exponential
+        backoff and jitter per operation; callers waiting on the same operation
+        (e.g. the scenes of one micro-batch) share its polls.
+        
+        Args:
+            operation_id: The operation_id returned by generate_video()
+            initial_delay: Seconds before the first poll
+            max_delay: Upper bound on the interval between polls
+            timeout: Seconds to wait before giving up (None waits indefinitely)
+        
+        Returns:
+            The finished operation ("done": true, with "response" or "error")
+        
+        Raises:
+            asyncio.TimeoutError: If timeout elapses first
+        """
+        loop = asyncio.get_running_loop()
+        pending = self._pending_ops.get(operation_id)
+        if pending is None:
+            pending = PendingOperation(
+                future=loop.create_future(),
+                due_at=loop.time() + initial_delay,
+                delay=initial_delay,
+                max_delay=max_delay
+            )
+            self._pending_ops[operation_id] = pending
+        
+        if self._operation_poller is None or self._operation_poller.done():
+            self._poll_wakeup = asyncio.Event()
+            self._operation_poller = asyncio.create_task(self._poll_operations())
+        # The poller may be sleeping until a later deadline than this operation's
+        self._poll_wakeup.set()
+        
+        pending.waiters += 1
+        try:
+            # Shielded, so one caller timing out does not cancel the others' wait
+            return await asyncio.wait_for(asyncio.shield(pending.future), timeout)
+        finally:
+            pending.waiters -= 1
+            if not pending.waiters and not pending.future.done():
+                # Nobody is waiting any more, so stop polling this operation
+                pending.future.cancel()
+                self._pending_ops.pop(operation_id, None)
+    
+    async def _poll_operations(self):
+        """Poll every pending operation that is due, then sleep until the next one is."""
+        loop = asyncio.get_running_loop()
+        
+        while self._pending_ops:
+            now = loop.time()
+            next_due = min(pending.due_at for pending in self._pending_ops.values())
+            if next_due > now:
+                self._poll_wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._poll_wakeup.wait(), next_due - now)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            
+            due = [
+                (operation_id, pending) for operation_id, pending in self._pending_ops.items()
+                if pending.due_at <= now
+            ]
+            results = await asyncio.gather(
+                *(self._fetch_operation(operation_id) for operation_id, _ in due),
+                return_exceptions=True
+            )
+            
+            for (operation_id, pending), result in zip(due, results):
+                if pending.future.done():
+                    continue
+                if isinstance(result, Exception):
+                    logger.warning("Could not poll operation %s: %s", operation_id, result)
+                else:
+                    status_code, body, error_text = result
+                    if body is not None and body.get("done"):
+                        pending.future.set_result(body)
+                    elif body is None and status_code not in RETRY_POLL_STATUS:
+                        # Report the failed lookup in the shape of a failed operation
+                        pending.future.set_result({
+                            "name": operation_id,
+                            "done": True,
+                            "error": {"code": status_code, "message": error_text}
+                        })
+                if pending.future.done():
+                    self._pending_ops.pop(operation_id, None)
+                    continue
+                
+                # Exponential backoff with +/-20% jitter, so operations started
+                # together do not keep polling in lockstep
+                pending.delay = min(pending.delay * 2, pending.max_delay)
+                pending.due_at = loop.time() + pending.delay * random.uniform(0.8, 1.2)
+    
+    async def _fetch_operation(self, operation_id: str) -> Tuple[int, Optional[Dict[str, Any]], str]:
+        """Fetch the current state of an operation; returns (status code, parsed JSON on success, error body text)."""
+        if self.use_vertex:
+            auth_token = await self._get_auth_token_async()
+            response = await self._get_session().post(
+                self.base_url.replace(":predictLongRunning", ":fetchPredictOperation"),
+                content=serialize_veo_request({"operationName": operation_id}),
+                headers={"Authorization": f"Bearer {auth_token}", "Content-Type": "application/json"}
+            )
+        else:
+            response = await self._get_session().get(
+                f"https://generativelanguage.googleapis.com/v1beta/{operation_id}",
+                headers={"x-goog-api-key": self.api_key}
+            )
+        if response.status_code == 200:
+            return response.status_code, parse_veo_response(response.content), ""
+        return response.status_code, None, response.text
+    
+    def _prepare_vertex_payload(self, prompt: Union[str, List[str]], **kwargs) -> Dict[str, Any]:
+        """Prepare payload for Veo 3.1 API (one instance per prompt).
         
         Reference images are supported by:
         - veo-2.0-generate-exp
@@ -294,31 +989,27 @@ class VeloClient:
         """
         
         # Build instances with prompt
-        instance = {"prompt": prompt}
+        prompts = [prompt] if isinstance(prompt, str) else prompt
+        instances = [{"prompt": text} for text in prompts]
         
         # Add reference images if provided
         # veo-3.1-generate-preview supports referenceImages parameter
         reference_images = kwargs.get("reference_images", [])
         if reference_images and self.use_reference_images:
-            instance["referenceImages"] = reference_images
-            print(f"📸 Added {len(reference_images)} reference images to request")
-        
-        # Build payload
-        payload = {
-            "instances": [instance],
-            "parameters": {
-                "aspectRatio": kwargs.get("aspect_ratio", "16:9"),
-                "sampleCount": kwargs.get("sample_count", 1),  # Number of video variations
-                "durationSeconds": str(kwargs.get("duration", 8)),  # Must be string
-                "personGeneration": "allow_all",  # Allow generation of people based on prompt
-                "addWatermark": False,  # Set to True if you want watermark
-                "includeRaiReason": True,  # Include safety/content filtering reasons
-                "generateAudio": kwargs.get("generate_audio", True),
-                "resolution": kwargs.get("resolution", "720p")  # 720p or 1080p
-            }
-        }
+            for instance in instances:
+                instance["referenceImages"] = reference_images
+            logger.debug("Added %d reference images to request", len(reference_images))
+        
+        # Start from the precomputed defaults and patch in only what the script sets;
+        # sampleCount is per instance, so it does not change with the scene count
+        parameters = dict(VERTEX_PARAMETER_DEFAULTS)
+        if "duration" in kwargs:
+            parameters["durationSeconds"] = str(kwargs["duration"])
+        for key, name in VERTEX_PARAMETER_KWARGS:
+            if key in kwargs:
+                parameters[name] = kwargs[key]
         
-        return payload
+        return {"instances": instances, "parameters": parameters}
     
     def _prepare_genai_payload(self, prompt: str, **kwargs) -> Dict[str, Any]:
         """Prepare payload for Generative AI API."""
@@ -337,14 +1028,13 @@ class VeloClient:
     
     def _save_video_from_response(self, response: Dict[str, Any], prompt: str) -> str:
         """Extract video from response and save to file."""
-        import base64
         from datetime import datetime
         
         try:
             # Extract video data from predictions
             predictions = response.get("predictions", [])
             if not predictions:
-                print("❌ No predictions in response")
+                logger.error("No predictions in response")
                 return None
             
             # Get first prediction
@@ -352,98 +1042,90 @@ class VeloClient:
             generated_samples = prediction.get("generatedSamples", [])
             
             if not generated_samples:
-                print("❌ No generated samples in prediction")
+                logger.error("No generated samples in prediction")
                 return None
             
             # Get first sample
             sample = generated_samples[0]
             video_data = sample.get("video", {})
             
-            # Get base64 encoded video
-            base64_video = video_data.get("bytesBase64Encoded")
+            # Take the base64 video out of the response so the multi-megabyte string
+            # is freed as soon as it has been written, not when the response is
+            base64_video = video_data.pop("bytesBase64Encoded", None)
             if not base64_video:
-                print("❌ No video data in sample")
+                logger.error("No video data in sample")
                 return None
             
-            # Decode base64 to binary
-            video_bytes = base64.b64decode(base64_video)
-            
-            # Generate filename with timestamp
+            # Generate filename with timestamp; the random suffix keeps videos saved
+            # in the same second (micro-batches, concurrent saves) from sharing a file
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"veo_video_{timestamp}.mp4"
-            
-            # Save to main directory
-            with open(filename, 'wb') as f:
-                f.write(video_bytes)
+            filename = f"veo_video_{timestamp}_{uuid.uuid4().hex[:8]}.mp4"
             
-            file_size_mb = len(video_bytes) / 1024 / 1024
-            print(f"✅ Video saved: {filename}")
-            print(f"   File size: {file_size_mb:.2f} MB")
-            print(f"   Prompt: {prompt[:80]}...")
+            # Decode base64 straight into the file in the main directory
+            file_size_mb = write_base64_file(filename, base64_video) / 1024 / 1024
+            del base64_video
+            logger.info("Video saved: %s (%.2f MB, prompt: %.80s)", filename, file_size_mb, prompt)
             
             return filename
             
         except Exception as e:
-            print(f"❌ Error saving video: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Error saving video: %s", e)
             return None
     
     def _extract_video_url_from_response(self, response: Dict[str, Any]) -> str:
         """Extract video URL from API response."""
         
         try:
-            # Try Vertex AI response format
+            # Only the parser for the response's own format runs: Vertex AI
+            # predictions, Generative AI candidates, or a direct response
             if "predictions" in response:
-                for prediction in response["predictions"]:
-                    if "videoUrl" in prediction:
-                        return prediction["videoUrl"]
-                    elif "video_uri" in prediction:
-                        return prediction["video_uri"]
-            
-            # Try Generative AI response format
-            if "candidates" in response:
-                for candidate in response["candidates"]:
-                    if "content" in candidate:
-                        parts = candidate["content"].get("parts", [])
-                        for part in parts:
-                            if "videoUrl" in part:
-                                return part["videoUrl"]
-                            elif "fileData" in part:
-                                return part["fileData"].get("fileUri", "")
-            
-            # Fallback for direct response
-            if "videoUrl" in response:
-                return response["videoUrl"]
-            elif "video_uri" in response:
-                return response["video_uri"]
+                video_url = self._video_url_from_predictions(response["predictions"])
+            elif "candidates" in response:
+                video_url = self._video_url_from_candidates(response["candidates"])
+            else:
+                video_url = response.get("videoUrl") or response.get("video_uri")
+            if video_url is not None:
+                return video_url
             
             # Generate placeholder URL if no video found
             video_id = uuid.uuid4().hex[:12]
             return f"https://storage.googleapis.com/velo-generated-videos/{video_id}.mp4"
             
         except Exception as e:
-            print(f"⚠️ Warning: Could not extract video URL: {e}")
+            logger.warning("Could not extract video URL: %s", e)
             video_id = uuid.uuid4().hex[:12] 
             return f"https://storage.googleapis.com/velo-generated-videos/{video_id}.mp4"
     
+    @staticmethod
+    def _video_url_from_predictions(predictions: List[Dict[str, Any]]) -> Optional[str]:
+        """First video URL in Vertex AI predictions."""
+        for prediction in predictions:
+            if "videoUrl" in prediction:
+                return prediction["videoUrl"]
+            elif "video_uri" in prediction:
+                return prediction["video_uri"]
+        return None
+    
+    @staticmethod
+    def _video_url_from_candidates(candidates: List[Dict[str, Any]]) -> Optional[str]:
+        """First video URL in Generative AI candidates."""
+        for candidate in candidates:
+            for part in candidate.get("content", {}).get("parts", []):
+                if "videoUrl" in part:
+                    return part["videoUrl"]
+                elif "fileData" in part:
+                    return part["fileData"].get("fileUri", "")
+        return None
+    
     def _extract_velo_prompts(self, script: Dict[str, Any]) -> List[str]:
         """Extract prompts suitable for Velo from script."""
         
-        prompts = []
-        
-        if "scenes" in script:
-            for scene in script["scenes"]:
-                # Try different prompt fields
-                prompt = (scene.get("sora_prompt") or 
-                         scene.get("velo_prompt") or 
-                         scene.get("visual_description") or 
-                         scene.get("description", ""))
-                
-                if prompt:
-                    # Optimize prompt for Velo
-                    optimized_prompt = self._optimize_prompt_for_velo(prompt)
-                    prompts.append(optimized_prompt)
+        # First non-empty prompt field of each scene, optimized for Velo
+        scene_prompts = (
+            next((scene[field] for field in SCENE_PROMPT_FIELDS if scene.get(field)), "")
+            for scene in script.get("scenes", ())
+        )
+        prompts = [self._optimize_prompt_for_velo(prompt) for prompt in scene_prompts if prompt]
         
         # Fallback to script-level prompt
         if not prompts and "prompt" in script:
@@ -451,8 +1133,10 @@ class VeloClient:
         
         return prompts
     
-    def _optimize_prompt_for_velo(self, prompt: str) -> str:
-        """Optimize prompt specifically for Velo 3.1."""
+    @staticmethod
+    @lru_cache(maxsize=2048)
+    def _optimize_prompt_for_velo(prompt: str) -> str:
+        """Optimize prompt specifically for Velo 3.1 (pure, so memoized per prompt)."""
         
         # Remove Sora-specific terms
         optimized = prompt.replace("Sora", "").replace("sora", "")
@@ -492,35 +1176,18 @@ class VeloClient:
     async def validate_prompt(self, prompt: str) -> Dict[str, Any]:
         """Validate a prompt for Velo generation."""
         
-        validation_result = {
-            "valid": True,
+        valid, issues, suggestions, estimated_duration = _validate_prompt_text(prompt)
+        
+        # Fresh lists per call, so callers can extend them without touching the cache
+        return {
+            "valid": valid,
             "provider": "velo",
-            "issues": [],
-            "suggestions": [],
-            "estimated_cost": 0.0
+            "issues": list(issues),
+            "suggestions": list(suggestions),
+            # Cost estimation (mock)
+            "estimated_cost": estimated_duration * 0.10,  # $0.10 per second estimate
+            "estimated_duration": estimated_duration
         }
-        
-        # Basic validation
-        if len(prompt.strip()) < 10:
-            validation_result["valid"] = False
-            validation_result["issues"].append("Prompt too short (minimum 10 characters)")
-        
-        if len(prompt) > 500:
-            validation_result["issues"].append("Prompt quite long - consider shortening for better results")
-        
-        # Cost estimation (mock)
-        estimated_duration = min(max(len(prompt) / 10, 5), 60)  # 5-60 seconds
-        validation_result["estimated_cost"] = estimated_duration * 0.10  # $0.10 per second estimate
-        validation_result["estimated_duration"] = estimated_duration
-        
-        # Suggestions
-        if "high quality" not in prompt.lower():
-            validation_result["suggestions"].append("Consider adding 'high quality' for better results")
-        
-        if not any(word in prompt.lower() for word in ["cinematic", "professional", "detailed"]):
-            validation_result["suggestions"].append("Adding descriptive terms like 'cinematic' can improve quality")
-        
-        return validation_result
     
     def get_status(self) -> Dict[str, Any]:
         """Get client status information."""